@@ -24,9 +24,23 @@ try:
 except ImportError:
     __version__ = "?"
 
+from .buffer_parser import *
+from .column_store import *
 from .commands_factory import *
 from .config_schema import *
 from .controller import *
 from .csc import *
 from .enums import *
+from .error_tracker import *
+from .fits_writer import *
+from .instrument_state import *
+from .intensity_window import *
+from .mock_farm import *
+from .mock_network import *
 from .mock_server import *
+from .mock_signal import *
+from .obs_id_pool import *
+from .readout_model import *
+from .scan_plan import *
+from .tick_scheduler import *
+from .upload_spool import *
@@ -0,0 +1,242 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = [
+    "StreamingBufferParser",
+    "parse_binary_buffer",
+    "parse_buffer",
+    "parse_buffer_reference",
+]
+
+import re
+import warnings
+
+import numpy as np
+
+from . import enums
+
+NUMBER_REGEX = re.compile(rb"[-+]?[.]?[\d]+(?:,\d\d\d)*[\.]?\d*(?:[eE][-+]?\d+)?")
+"""Regular expression matching a number in the buffer reply."""
+NUMBER_BYTES = frozenset(b"0123456789+-.eE")
+"""Bytes that can be part of a number.
+
+`NUMBER_REGEX` also accepts thousands separators, but those numbers cannot
+be converted to float, so commas are always treated as separators.
+"""
+SEPARATORS = bytes(byte if byte in NUMBER_BYTES else ord(" ") for byte in range(256))
+"""Translation table that turns every byte that is not part of a number into
+a space."""
+BINARY_DTYPES = {
+    enums.DataFormat.REAL32: np.dtype(">f4"),
+    enums.DataFormat.REAL64: np.dtype(">f8"),
+}
+"""The numpy type of each binary data format, with the normal (big-endian)
+byte order."""
+MAX_TOKEN_LENGTH = 64
+"""How far back from the end of a chunk to look for the end of the last
+complete value."""
+
+
+class StreamingBufferParser:
+    """Parse the buffer reply piece by piece while it is being received.
+
+    The values are written into a `ColumnStore` as soon as they are
+    complete; a value that is split between two pieces is kept until the
+    next piece arrives.
+
+    Parameters
+    ----------
+    store : `ColumnStore`
+        The store that receives the values.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._partial = b""
+
+    def feed(self, piece):
+        """Parse the next piece of the reply.
+
+        Parameters
+        ----------
+        piece : `bytes`
+            The next bytes of the reply.
+        """
+        data = self._partial + piece if self._partial else piece
+        end = find_last_separator(data)
+        self._partial = data[end:]
+        if end > 0:
+            self.store.extend(tokenize(data[:end]))
+
+    def close(self):
+        """Parse the remainder of the reply."""
+        if self._partial:
+            self.store.extend(tokenize(self._partial))
+            self._partial = b""
+
+
+def parse_buffer(response, num_categories=2):
+    """Parse the buffer values.
+
+    Parameters
+    ----------
+    response : `str` or `bytes`
+        The response from the read buffer command.
+    num_categories : `int`, optional
+        The number of values stored for each reading.
+
+    Returns
+    -------
+    values : `numpy.ndarray`
+        The values with shape ``(readings, num_categories)``;
+        ``values[:, i]`` is a view of category ``i``.
+        If the last reading is incomplete its missing values are NaN.
+    """
+    if isinstance(response, str):
+        response = response.encode()
+    values = tokenize(response)
+    remainder = values.size % num_categories
+    if remainder:
+        values = np.concatenate([values, np.full(num_categories - remainder, np.nan)])
+    return values.reshape(-1, num_categories)
+
+
+def parse_binary_buffer(block, num_categories=2, data_format=enums.DataFormat.REAL64):
+    """Parse the buffer values sent as a binary block.
+
+    Parameters
+    ----------
+    block : `bytes` or `bytearray`
+        The contents of the block, without the header.
+    num_categories : `int`, optional
+        The number of values stored for each reading.
+    data_format : `DataFormat`, optional
+        The binary format of the values.
+
+    Returns
+    -------
+    values : `numpy.ndarray`
+        The values with shape ``(readings, num_categories)``.
+        Unless the last reading is incomplete, this is a view of ``block``
+        and no data is copied; otherwise its missing values are NaN.
+
+    Raises
+    ------
+    ValueError
+        If the length of the block is not a multiple of the value size.
+    """
+    dtype = BINARY_DTYPES[enums.DataFormat(data_format)]
+    if len(block) % dtype.itemsize != 0:
+        raise ValueError(
+            f"Block of {len(block)} bytes does not hold a whole number "
+            f"of {data_format} values."
+        )
+    values = np.frombuffer(block, dtype=dtype)
+    remainder = values.size % num_categories
+    if remainder:
+        values = np.concatenate(
+            [values, np.full(num_categories - remainder, np.nan, dtype=dtype)]
+        )
+    return values.reshape(-1, num_categories)
+
+
+def parse_buffer_reference(response, num_categories=2):
+    """Parse the buffer values one at a time.
+
+    This is the original, pure Python implementation of `parse_buffer`,
+    kept as a reference for tests and benchmarks.
+
+    Parameters
+    ----------
+    response : `str`
+        The response from the read buffer command.
+    num_categories : `int`, optional
+        The number of values stored for each reading.
+
+    Returns
+    -------
+    categorized_lists : `list` of `list` of `float`
+        The values of each category.
+    """
+    regex_numbers = r"[-+]?[.]?[\d]+(?:,\d\d\d)*[\.]?\d*(?:[eE][-+]?\d+)?"
+    raw_values = list(map(float, re.findall(regex_numbers, response)))
+
+    # Converting each value to a float
+    raw_str_values = [float(value) for value in raw_values]
+
+    # Creating separate lists for each category
+    categorized_lists = [[] for _ in range(num_categories)]
+    for i, value in enumerate(raw_str_values):
+        category_index = i % num_categories
+        categorized_lists[category_index].append(value)
+    return categorized_lists
+
+
+def tokenize(data):
+    """Return the numbers in (part of) a buffer reply.
+
+    The common case, numbers separated by commas, whitespace and unit
+    suffixes, is converted in bulk; anything else falls back to
+    `NUMBER_REGEX`. The values are the same as those of
+    `parse_buffer_reference`, whenever that succeeds.
+
+    Parameters
+    ----------
+    data : `bytes`
+        The reply, or a piece of it that does not split a number.
+
+    Returns
+    -------
+    values : `numpy.ndarray`
+        The values as float64.
+    """
+    text = b" " + data.translate(SEPARATORS) + b" "
+    # An exponent character left over from a suffix, e.g. "secs".
+    text = text.replace(b" e ", b"   ").replace(b" E ", b"   ")
+    if text.isspace():
+        return np.empty(0)
+    try:
+        with warnings.catch_warnings():
+            # Older numpy versions only warn about unparsable data.
+            warnings.simplefilter("error", DeprecationWarning)
+            return np.fromstring(text, dtype=np.float64, sep=" ")
+    except (ValueError, DeprecationWarning):
+        return np.array(NUMBER_REGEX.findall(data), dtype=bytes).astype(np.float64)
+
+
+def find_last_separator(data):
+    """Return the index just after the last byte that cannot be part of a
+    number, or 0 if there is none near the end of the data.
+
+    Parameters
+    ----------
+    data : `bytes`
+        The data to search.
+
+    Returns
+    -------
+    index : `int`
+        Everything before this index can be tokenized on its own.
+    """
+    for index in range(len(data) - 1, max(len(data) - MAX_TOKEN_LENGTH, 0) - 1, -1):
+        if data[index] not in NUMBER_BYTES:
+            return index + 1
+    return 0
@@ -0,0 +1,125 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["ColumnStore"]
+
+import numpy as np
+
+DEFAULT_CAPACITY = 50000
+"""The default number of rows to preallocate, the size of the Keithley
+buffer."""
+
+
+class ColumnStore:
+    """In-memory store of the columns read from the electrometer buffer.
+
+    Values are written row by row into a single preallocated
+    ``(capacity, num_columns)`` array that grows when it is full.
+    Each column is a strided view into that array, so no copy is made
+    when the columns are handed over.
+
+    Parameters
+    ----------
+    num_columns : `int`
+        The number of columns (trace elements) in each row.
+    capacity : `int`, optional
+        The number of rows to preallocate.
+
+    Attributes
+    ----------
+    num_columns : `int`
+        The number of columns in each row.
+    """
+
+    def __init__(self, num_columns, capacity=DEFAULT_CAPACITY):
+        if num_columns < 1:
+            raise ValueError(f"{num_columns=} must be positive.")
+        self.num_columns = num_columns
+        self._array = np.empty((max(capacity, 1), num_columns))
+        self._num_values = 0
+
+    def __len__(self):
+        """Return the number of rows, including a partial last row."""
+        return -(-self._num_values // self.num_columns)
+
+    @property
+    def capacity(self):
+        """The number of rows that fit before the store grows."""
+        return self._array.shape[0]
+
+    @property
+    def num_values(self):
+        """The number of values written."""
+        return self._num_values
+
+    def reserve(self, num_rows):
+        """Make sure that at least ``num_rows`` rows fit without growing.
+
+        Parameters
+        ----------
+        num_rows : `int`
+            The number of rows.
+        """
+        if num_rows <= self.capacity:
+            return
+        array = np.empty((num_rows, self.num_columns))
+        array.reshape(-1)[: self._num_values] = self._array.reshape(-1)[
+            : self._num_values
+        ]
+        self._array = array
+
+    def extend(self, values):
+        """Append values in row-major order.
+
+        The values do not have to be a whole number of rows; the next call
+        continues where this one stopped.
+
+        Parameters
+        ----------
+        values : `numpy.ndarray`
+            The values to append, of any shape.
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        end = self._num_values + values.size
+        if end > self._array.size:
+            self.reserve(max(2 * self.capacity, -(-end // self.num_columns)))
+        self._array.reshape(-1)[self._num_values : end] = values
+        self._num_values = end
+
+    def clear(self):
+        """Remove all values, keeping the allocated memory."""
+        self._num_values = 0
+
+    @property
+    def data(self):
+        """The stored rows as a ``(rows, num_columns)`` view.
+
+        If the last row is incomplete its missing values are NaN.
+        """
+        num_rows = len(self)
+        flat = self._array.reshape(-1)
+        flat[self._num_values : num_rows * self.num_columns] = np.nan
+        return self._array[:num_rows]
+
+    @property
+    def columns(self):
+        """The stored columns; ``columns[i]`` is a view of column ``i``."""
+        return self.data.T
@@ -23,6 +23,7 @@ __all__ = ["Commander"]
 
 import asyncio
 import logging
+from collections.abc import Callable, Sequence
 
 from lsst.ts import tcpip
 
@@ -31,6 +32,10 @@ DEFAULT_TIMEOUT = 240
 RETRY_DELAY = 1
 RECONNECTION_DELAY = 1
 NUMBER_OF_RETRIES = 10
+READ_CHUNK_SIZE = 2**16
+"""The maximum number of bytes requested from the stream per read."""
+MAX_LINE_LENGTH = 250
+"""The maximum length of a line of batched commands."""
 
 
 class Commander:
@@ -58,6 +63,16 @@ class Commander:
         The amount of time to wait until a message is not received.
     connected : bool
         Whether the electrometer is connected or not.
+    read_buffer : bytearray
+        Bytes received from the electrometer that have not been returned as
+        part of a reply yet.
+    terminator : bytes
+        The line terminator of the electrometer.
+    encoding : str
+        The text encoding of the electrometer.
+    num_connections : int
+        The number of times the connection was opened, including
+        reconnections after it was lost.
     """
 
     def __init__(
@@ -77,7 +92,15 @@ class Commander:
         self.timeout: int = 10
         self.long_timeout: int = 30
         self.brand: str | None = brand
+        if self.brand == "Keysight":
+            self.terminator: bytes = tcpip.DEFAULT_TERMINATOR
+            self.encoding: str = "latin_1"
+        else:
+            self.terminator = b"\r"
+            self.encoding = tcpip.DEFAULT_ENCODING
         self.client: tcpip.Client = tcpip.Client(host="", port=None, log=log)
+        self.read_buffer: bytearray = bytearray()
+        self.num_connections: int = 0
 
     @property
     def connected(self) -> bool:
@@ -85,37 +108,38 @@ class Commander:
 
     async def connect(self) -> None:
         """Connect to the electrometer"""
-        if self.brand == "Keysight":
-            self.client = tcpip.Client(
-                host=self.hostname,
-                port=self.port,
-                name=f"{self.brand} Client",
-                log=self.log,
-                encoding="latin_1",
-                limit=LIMIT,
-            )
-        else:
-            self.client = tcpip.Client(
-                host=self.hostname,
-                port=self.port,
-                name=f"{self.brand} Client",
-                log=self.log,
-                terminator=b"\r",
-                limit=LIMIT,
-            )
+        async with self.lock:
+            await self._connect()
+
+    async def _connect(self) -> None:
+        """Connect to the electrometer.
+
+        The caller must hold the lock.
+        """
+        self.read_buffer.clear()
+        self.client = tcpip.Client(
+            host=self.hostname,
+            port=self.port,
+            name=f"{self.brand} Client",
+            log=self.log,
+            terminator=self.terminator,
+            encoding=self.encoding,
+            limit=LIMIT,
+        )
         await self.client.start_task
+        self.num_connections += 1
         if self.brand == "Keysight":
             # ignore welcome message
-            async with self.lock:
-                try:
-                    await self.client.read_str()
-                except asyncio.IncompleteReadError as e:
-                    self.log.exception(f"{e.partial=}")
+            try:
+                await self.client.read_str()
+            except asyncio.IncompleteReadError as e:
+                self.log.exception(f"{e.partial=}")
 
     async def disconnect(self) -> None:
         """Disconnect from the electrometer."""
         await self.client.close()
         self.client = tcpip.Client(host="", port=None, log=self.log)
+        self.read_buffer.clear()
 
     async def send_command(
         self, msg: str, has_reply: bool, timeout: None | float = None
@@ -129,7 +153,8 @@ class Commander:
         has_reply : bool
             Does the command expect a reply?
         timeout : None | float, optional
-            How long to wait before timing out reply, by default None.
+            How long to wait before timing out reply, by default None,
+            which waits up to `DEFAULT_TIMEOUT` seconds.
 
         Returns
         -------
@@ -137,47 +162,369 @@ class Commander:
             Return the reply if expected else return None.
         """
         if not timeout:
-            timeout = self.timeout
-        else:
-            timeout = timeout
+            timeout = DEFAULT_TIMEOUT
         async with self.lock:
             if not self.connected:
-                await self.connect()
+                await self._connect()
             await self.client.write_str(msg)
             if self.brand == "Keysight":
                 async with asyncio.timeout(DEFAULT_TIMEOUT):
-                    await self.client.read_str()
+                    await self.read_reply()
             if has_reply:
-                async with asyncio.timeout(DEFAULT_TIMEOUT):
-                    reply = b""
-                    while not reply.endswith(self.client.terminator):
-                        for _ in range(NUMBER_OF_RETRIES):
-                            try:
-                                byte = await self.client.read(1)
-                                if byte:
-                                    reply += byte
-                                    break
-                            except ConnectionError:
-                                self.log.exception(
-                                    f"Connection lost...Reconnecting in {RECONNECTION_DELAY} second(s)."
-                                )
-                                await self.disconnect()
-                                await asyncio.sleep(RECONNECTION_DELAY)
-                                await self.connect()
-                                continue
-                            except Exception:
-                                self.log.exception(
-                                    f"Getting reply failed... trying again in {RETRY_DELAY} second(s)."
-                                )
-                                await asyncio.sleep(RETRY_DELAY)
-                reply = reply.rstrip(self.client.terminator).decode(
-                    self.client.encoding
-                )
-                return reply
+                async with asyncio.timeout(timeout):
+                    reply = await self.read_reply()
+                return reply.decode(self.client.encoding)
             else:
                 return None
 
+    async def send_commands(
+        self, commands: list[str], timeout: None | float = None
+    ) -> list[str]:
+        """Send several commands with as few writes and round trips as
+        possible.
+
+        The commands are joined into lines of up to `MAX_LINE_LENGTH`
+        characters, see `batch_commands`. All lines are written before any
+        reply is read; the electrometer answers all queries of a line in
+        one reply, separated by ``;``.
+
+        Parameters
+        ----------
+        commands : list[str]
+            The commands to be sent, which must not return binary blocks.
+        timeout : None | float, optional
+            How long to wait for each reply, by default None,
+            which waits up to `DEFAULT_TIMEOUT` seconds.
+
+        Returns
+        -------
+        list[str]
+            The replies to the queries, in order.
+        """
+        lines = batch_commands(commands)
+        data = b"".join(
+            line.encode(self.encoding) + self.terminator for line, _ in lines
+        )
+        return await self.send_lines(
+            data, [num_queries for _, num_queries in lines], timeout=timeout
+        )
+
+    async def send_plan(self, plan, timeout: None | float = None) -> list[str]:
+        """Send a precompiled batch of commands.
+
+        Parameters
+        ----------
+        plan : ScanPlan
+            The commands, compiled by `compile_plan`.
+        timeout : None | float, optional
+            How long to wait for each reply, by default None,
+            which waits up to `DEFAULT_TIMEOUT` seconds.
+
+        Returns
+        -------
+        list[str]
+            The replies to the queries, in order.
+        """
+        return await self.send_lines(plan.data, plan.num_queries, timeout=timeout)
+
+    async def send_lines(
+        self, data: bytes, num_queries: Sequence[int], timeout: None | float = None
+    ) -> list[str]:
+        """Write encoded lines of commands in one go and read the replies.
+
+        Parameters
+        ----------
+        data : bytes
+            The encoded lines, each with its terminator.
+        num_queries : Sequence[int]
+            The number of queries in each line.
+        timeout : None | float, optional
+            How long to wait for each reply, by default None,
+            which waits up to `DEFAULT_TIMEOUT` seconds.
+
+        Returns
+        -------
+        list[str]
+            The replies to the queries, in order.
+        """
+        replies = []
+        async with self.lock:
+            if not self.connected:
+                await self._connect()
+            await self.client.write(data)
+            for line_queries in num_queries:
+                async with asyncio.timeout(timeout or DEFAULT_TIMEOUT):
+                    if self.brand == "Keysight":
+                        await self.read_reply()
+                    if line_queries == 0:
+                        continue
+                    reply = await self.read_reply()
+                line_replies = reply.decode(self.encoding).split(";")
+                if len(line_replies) != line_queries:
+                    self.log.warning(
+                        f"Expected {line_queries} replies, got {len(line_replies)}: "
+                        f"{line_replies}."
+                    )
+                replies += line_replies
+        return replies
+
+    async def send_command_streaming(
+        self, msg: str, consumer: Callable[[bytes], None], timeout: None | float = None
+    ) -> None:
+        """Send a query and pass the reply on while it is being received.
+
+        This avoids holding large replies, such as the buffer contents,
+        in memory as a whole.
+
+        Parameters
+        ----------
+        msg : str
+            The query to be sent.
+        consumer : Callable[[bytes], None]
+            Called with each piece of the reply, without the terminator,
+            in order.
+        timeout : None | float, optional
+            How long to wait before timing out reply, by default None,
+            which waits up to `DEFAULT_TIMEOUT` seconds.
+        """
+        async with self.lock:
+            if not self.connected:
+                await self._connect()
+            await self.client.write_str(msg)
+            if self.brand == "Keysight":
+                async with asyncio.timeout(DEFAULT_TIMEOUT):
+                    await self.read_reply()
+            async with asyncio.timeout(timeout or DEFAULT_TIMEOUT):
+                await self.read_reply(consumer=consumer)
+
+    async def send_command_block(
+        self, msg: str, num_bytes: None | int = None, timeout: None | float = None
+    ) -> bytearray:
+        """Send a query whose reply is an IEEE-488.2 binary block.
+
+        Parameters
+        ----------
+        msg : str
+            The query to be sent.
+        num_bytes : None | int, optional
+            The size of the block contents, only used if the electrometer
+            sends an indefinite length block, by default None.
+        timeout : None | float, optional
+            How long to wait before timing out reply, by default None,
+            which waits up to `DEFAULT_TIMEOUT` seconds.
+
+        Returns
+        -------
+        bytearray
+            The contents of the block.
+        """
+        async with self.lock:
+            if not self.connected:
+                await self._connect()
+            await self.client.write_str(msg)
+            if self.brand == "Keysight":
+                async with asyncio.timeout(DEFAULT_TIMEOUT):
+                    await self.read_reply()
+            async with asyncio.timeout(timeout or DEFAULT_TIMEOUT):
+                return await self.read_block(num_bytes=num_bytes)
+
+    async def read_block(self, num_bytes: None | int = None) -> bytearray:
+        """Read an IEEE-488.2 binary block and the terminator after it.
+
+        A definite length block starts with ``#``, the number of digits of
+        the length, and the length, e.g. ``#18`` for 8 bytes. An indefinite
+        length block starts with ``#0``; as the terminator can also occur in
+        binary data, its length must be given.
+        The caller must hold the lock.
+
+        Parameters
+        ----------
+        num_bytes : None | int, optional
+            The size of the contents of an indefinite length block.
+
+        Returns
+        -------
+        bytearray
+            The contents of the block.
+
+        Raises
+        ------
+        RuntimeError
+            If the reply is not a binary block.
+        ValueError
+            If the block has an indefinite length and ``num_bytes`` is None.
+        """
+        await self.fill_read_buffer(2)
+        if self.read_buffer[:1] != b"#" or not chr(self.read_buffer[1]).isdigit():
+            raise RuntimeError(
+                f"Expected a binary block, got {bytes(self.read_buffer[:20])!r}."
+            )
+        num_digits = int(chr(self.read_buffer[1]))
+        await self.fill_read_buffer(2 + num_digits)
+        if num_digits > 0:
+            num_bytes = int(self.read_buffer[2 : 2 + num_digits])
+        elif num_bytes is None:
+            raise ValueError("The size of an indefinite length block is needed.")
+        del self.read_buffer[: 2 + num_digits]
+
+        # Copy the contents straight from the stream into the block, so that
+        # a large block is not copied again when it is removed from the
+        # read buffer.
+        block = bytearray(num_bytes)
+        view = memoryview(block)
+        filled = 0
+        while True:
+            size = min(len(self.read_buffer), num_bytes - filled)
+            view[filled : filled + size] = self.read_buffer[:size]
+            del self.read_buffer[:size]
+            filled += size
+            if filled == num_bytes:
+                break
+            await self.read_chunk()
+        view.release()
+
+        leftover = await self.read_reply()
+        if leftover:
+            self.log.warning(f"Ignoring {len(leftover)} bytes after binary block.")
+        return block
+
+    async def fill_read_buffer(self, num_bytes: int) -> None:
+        """Read until `read_buffer` holds at least ``num_bytes`` bytes.
+
+        The caller must hold the lock.
+
+        Parameters
+        ----------
+        num_bytes : int
+            The number of bytes needed.
+        """
+        while len(self.read_buffer) < num_bytes:
+            await self.read_chunk()
+
+    async def read_reply(
+        self, consumer: None | Callable[[bytes], None] = None
+    ) -> bytes:
+        """Read a single reply from the electrometer.
+
+        The stream is read in chunks of up to `READ_CHUNK_SIZE` bytes and
+        searched for the reply terminator. Any bytes received after the
+        terminator are kept in `read_buffer` for the next reply.
+        The caller must hold the lock.
+
+        Parameters
+        ----------
+        consumer : None | Callable[[bytes], None], optional
+            If given, it is called with each piece of the reply as soon as
+            it is received, instead of collecting the whole reply.
+
+        Returns
+        -------
+        bytes
+            The reply without the terminator, or empty if ``consumer`` is
+            given.
+        """
+        terminator = self.client.terminator
+        start = 0
+        while True:
+            index = self.read_buffer.find(terminator, start)
+            if index >= 0:
+                reply = bytes(self.read_buffer[:index])
+                del self.read_buffer[: index + len(terminator)]
+                reply = reply.rstrip(terminator)
+                if consumer is None:
+                    return reply
+                if reply:
+                    consumer(reply)
+                return b""
+            # The terminator can be split between two chunks, so only skip
+            # the part of the buffer that cannot contain its first byte.
+            size = len(self.read_buffer)
+            start = max(size - len(terminator) + 1, 0)
+            if consumer is not None and start > 0:
+                consumer(bytes(self.read_buffer[:start]))
+                del self.read_buffer[:start]
+                size -= start
+                start = 0
+            await self.read_chunk()
+            if len(self.read_buffer) < size:
+                # The buffer was dropped when reconnecting.
+                start = 0
+
+    async def read_chunk(self) -> None:
+        """Append the next chunk of the stream to `read_buffer`.
+
+        Reconnect if the connection is lost and retry if the read fails,
+        up to `NUMBER_OF_RETRIES` times. The caller must hold the lock.
+        """
+        for _ in range(NUMBER_OF_RETRIES):
+            try:
+                chunk = await self.client.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    raise ConnectionError("Connection closed by the electrometer.")
+                self.read_buffer += chunk
+                return
+            except ConnectionError:
+                self.log.exception(
+                    f"Connection lost...Reconnecting in {RECONNECTION_DELAY} second(s)."
+                )
+                await self.disconnect()
+                await asyncio.sleep(RECONNECTION_DELAY)
+                await self._connect()
+                continue
+            except Exception:
+                self.log.exception(
+                    f"Getting reply failed... trying again in {RETRY_DELAY} second(s)."
+                )
+                await asyncio.sleep(RETRY_DELAY)
+
     def configure(self, config):
         self.hostname = config.hostname
         self.port = config.port
         self.timeout = config.timeout
+
+
+def batch_commands(
+    commands: list[str], max_length: int = MAX_LINE_LENGTH
+) -> list[tuple[str, int]]:
+    """Join commands into as few lines as possible.
+
+    Each command is terminated with ``;`` if it is not already and line
+    breaks inside commands are removed, as they would end the line early.
+    A command longer than ``max_length`` gets a line of its own.
+
+    The instrument resolves a header that does not start with ``:`` from
+    the path of the previous command of the line, so ``:trac:cle;sens:func?``
+    would be read as ``:trac:sens:func?``. Each command that is not a
+    common command (``*``) is therefore given a leading ``:``.
+
+    Parameters
+    ----------
+    commands : list[str]
+        The commands, each of which can hold several ``;`` separated
+        commands.
+    max_length : int, optional
+        The maximum length of a line.
+
+    Returns
+    -------
+    list[tuple[str, int]]
+        Each line and the number of queries in it.
+    """
+    lines = []
+    line = ""
+    for command in commands:
+        parts = [part.strip() for part in command.replace("\n", "").split(";")]
+        command = "".join(
+            (part if part.startswith((":", "*")) else f":{part}") + ";"
+            for part in parts
+            if part
+        )
+        if not command:
+            continue
+        if line and len(line) + len(command) > max_length:
+            lines.append(line)
+            line = ""
+        line += command
+    if line:
+        lines.append(line)
+    return [(line, sum("?" in part for part in line.split(";"))) for line in lines]
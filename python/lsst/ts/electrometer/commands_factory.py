@@ -293,6 +293,57 @@ class ElectrometerCommandFactory:
         command = ":trac:data?;"
         return command
 
+    def read_buffer_range(self, start, count):
+        """Return read part of the buffer.
+
+        Parameters
+        ----------
+        start : `int`
+            The index of the first reading to read, starting at 0.
+        count : `int`
+            The number of readings to read.
+
+        Returns
+        -------
+        command : `str`
+            The generated command string.
+        """
+        command = f":trac:data:sel? {start:d},{count:d};"
+        return command
+
+    def set_data_format(self, data_format):
+        """Return set data format.
+
+        Parameters
+        ----------
+        data_format : `DataFormat`
+            The format of the data sent by the electrometer.
+
+        Returns
+        -------
+        command : `str`
+            The generated command string.
+        """
+        command = f":form:data {enums.DataFormat(data_format).value};"
+        return command
+
+    def set_byte_order(self, swapped=False):
+        """Return set byte order of binary data.
+
+        Parameters
+        ----------
+        swapped : `bool`
+            Whether to send the least significant byte first
+            instead of the most significant byte.
+
+        Returns
+        -------
+        command : `str`
+            The generated command string.
+        """
+        command = ":form:bord SWAP;" if swapped else ":form:bord NORM;"
+        return command
+
     def output_trigger_line(self, output_trigger_input):
         """Sets output trigger line
 
@@ -701,6 +752,40 @@ class ElectrometerCommandFactory:
     def clear(self):
         return "*CLS;"
 
+    def operation_complete(self):
+        """Return set the operation complete bit once all pending commands
+        are done.
+
+        Returns
+        -------
+        command : `str`
+            The generated command string.
+        """
+        command = "*OPC;"
+        return command
+
+    def get_event_status(self):
+        """Return get and clear the standard event status register.
+
+        Returns
+        -------
+        command : `str`
+            The generated command string.
+        """
+        command = "*ESR?;"
+        return command
+
+    def get_status_byte(self):
+        """Return get the status byte.
+
+        Returns
+        -------
+        command : `str`
+            The generated command string.
+        """
+        command = "*STB?;"
+        return command
+
 
 class KeithleyElectrometerCommandFactory(ElectrometerCommandFactory):
     """Class that formats commands to control the electrometer via RS-232."""
@@ -965,6 +1050,35 @@ class KeysightElectrometerCommandFactory(ElectrometerCommandFactory):
         command = ":sens:data?;"
         return command
 
+    def read_buffer_range(self, start, count):
+        """Return read part of the buffer.
+
+        Parameters
+        ----------
+        start : `int`
+            The index of the first reading to read, starting at 0.
+        count : `int`
+            The number of readings to read.
+
+        Returns
+        -------
+        command : `str`
+            The generated command string.
+        """
+        command = f":sens:data? {start:d},{count:d};"
+        return command
+
+    def get_buffer_quantity(self):
+        """Return get buffer quantity.
+
+        Returns
+        -------
+        command : `str`
+            The generated command string.
+        """
+        command = ":sens:data:poin?;"
+        return command
+
     def output_trigger_line(self):
         """Sets output trigger line
 
@@ -26,7 +26,7 @@ CONFIG_SCHEMA = yaml.safe_load(
     """
 $schema: http://json-schema.org/draft-07/schema#
 $id: https://github.com/lsst-ts/ts_electrometer/blob/main/schema/Electrometer.yaml
-title: Electrometer v7
+title: Electrometer v8
 description: Schema for Electrometer configuration files.
 type: object
 properties:
@@ -118,6 +118,73 @@ properties:
           type: string
         electrometer_config:
           type: object
+        buffer_readout:
+          description: >-
+            How the buffer is read at the end of a scan.
+            text: read the whole reply, then parse it.
+            stream: parse the reply while it is being received.
+            binary: transfer the values as IEEE-754 doubles instead of text.
+          type: string
+          enum:
+            - text
+            - stream
+            - binary
+          default: stream
+        buffer_drain_interval:
+          description: >-
+            How often to read the new readings from the buffer during a scan
+            (s). The readings are then kept by the CSC, so that a scan can be
+            longer than the buffer of the electrometer and only the last
+            readings are read at the end of the scan. 0 to only read the
+            buffer at the end of the scan.
+          type: number
+          minimum: 0
+          default: 0
+        ready_timeout:
+          description: >-
+            The longest time to wait for the electrometer to finish pending
+            commands, e.g. before reading the buffer (s).
+          type: number
+          exclusiveMinimum: 0
+          default: 10
+        intensity_publish_interval:
+          description: >-
+            The shortest time between intensity events during a scan (s).
+            The readings taken in between are read from the buffer together
+            and aggregated; the event reports the latest one.
+            0 to publish after every read.
+          type: number
+          minimum: 0
+          default: 1
+        fits_compression:
+          description: >-
+            How the scan FITS files are compressed before they are uploaded.
+            none: not compressed.
+            gzip: the whole file is gzipped (.fits.gz), which FITS readers
+            open transparently.
+          type: string
+          enum:
+            - none
+            - gzip
+          default: none
+        fits_compression_level:
+          description: >-
+            The compression level, from 1 (fastest) to 9 (smallest).
+            Higher levels barely shrink scan files further, but take several
+            times longer.
+          type: integer
+          minimum: 1
+          maximum: 9
+          default: 1
+        obs_id_pool_size:
+          description: >-
+            The number of obs IDs fetched ahead of time from the image name
+            service, so that writing a FITS file does not wait for it.
+            Obs IDs still in the pool when the CSC disconnects are not used.
+            0 to fetch each one when the FITS file is written.
+          type: integer
+          minimum: 0
+          default: 2
       required:
         - sal_index
         - mode
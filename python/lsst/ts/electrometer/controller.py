@@ -27,27 +27,56 @@ __all__ = [
 
 import abc
 import asyncio
-import io
+import concurrent.futures
+import functools
 import logging
 import pathlib
-import re
+import time
 import types
 
-import astropy.io.fits as fits
-import astropy.time
 import yaml
-from astropy import table
 from lsst.ts import utils
 from lsst.ts.xml.enums.Electrometer import DetailedState
 
-from . import commander, commands_factory, enums
-
-TIME_PER_LINE = 0.0047
-"""The time per line is calculated based on the result that 200 samples takes
-~4 seconds."""
-OVERHEAD_FACTOR = 1.3
-"""Assume a 30% overhead when gathering data from the buffer."""
-SLEEP = 2
+from . import (
+    buffer_parser,
+    column_store,
+    commander,
+    commands_factory,
+    enums,
+    error_tracker,
+    fits_writer,
+    instrument_state,
+    intensity_window,
+    obs_id_pool,
+    readout_model,
+    scan_plan,
+    tick_scheduler,
+    upload_spool,
+)
+
+READY_POLL_INTERVAL = 0.05
+"""How often to check whether the electrometer finished pending commands
+(s)."""
+BUFFER_SIZE = 50000
+"""The number of readings stored in the Keithley buffer during a scan."""
+KEYSIGHT_BUFFER_SIZE = 100000
+"""The number of readings the Keysight buffer holds."""
+READOUT_MODEL_FILENAME = "readout_model.yaml"
+"""The name of the file in `fits_file_path` where the readout model is
+saved."""
+BINARY_DATA_FORMAT = enums.DataFormat.REAL64
+"""The format of the buffer values when they are read as a binary block."""
+SIGNAL_ELEMENTS = ["CURR", "CHAR", "VOLT", "RES", "READ"]
+"""The trace elements that hold the signal."""
+FITS_WORKERS = 1
+"""The number of threads that encode and write FITS files."""
+MAX_PENDING_FITS_JOBS = 2
+"""The number of FITS jobs that can be queued or running at once; further
+jobs wait for one to finish."""
+UPLOAD_SPOOL_DIRECTORY = "upload_spool"
+"""The directory in `fits_file_path` where FITS files wait to be
+uploaded."""
 
 
 class ElectrometerController(abc.ABC):
@@ -102,6 +131,81 @@ class ElectrometerController(abc.ABC):
         The temperature (deg_C) returned from the probe.
     vsource : `float`
         The voltage (V) source input.
+    buffer_readout : `str`
+        How the buffer is read at the end of a scan; "text" to read the
+        whole reply before parsing it, "stream" to parse it while it is
+        being received or "binary" to read it as a binary block.
+    buffer_drain_interval : `float`
+        How often to read the new readings from the buffer during a scan
+        (s); 0 to only read the buffer at the end of the scan.
+    drain_store : `ColumnStore` | None
+        The readings read from the buffer during the current scan,
+        None if the buffer is not being drained.
+    drained_readings : `int`
+        The number of readings in the buffer that were read already.
+    buffer_size : `int`
+        The number of readings the buffer holds; it is cleared when it is
+        full while it is drained.
+    drain_task : `asyncio.Future`
+        The task that drains the buffer during a scan.
+    drain_in_background : `bool`
+        Whether `drain_task` drains the buffer; otherwise the buffer is
+        drained when the intensity is polled.
+    readout_model : `ReadoutModel`
+        The measured time it takes to read the buffer, used to choose the
+        read timeout.
+    readout_stats : `types.SimpleNamespace`
+        The number of readings, timeout, duration and modelled time per
+        reading of the last read of the buffer.
+    ready_timeout : `float`
+        The longest time to wait for the electrometer to finish pending
+        commands (s).
+    ready_stats : `dict` [`str`, `types.SimpleNamespace`]
+        How often and how long the controller waited for the electrometer
+        to be ready, by the name of the operation.
+    scan_plans : `ScanPlanCache`
+        The compiled commands that set up scans, for the current settings.
+    instrument_state : `InstrumentState`
+        The settings last applied to the electrometer, used to skip
+        commands that would not change them.
+    error_tracker : `ErrorTracker`
+        The commands sent since the last error check, and the errors the
+        electrometer reported.
+    state_connection : `int`
+        The connection of the commander that `instrument_state` applies to.
+    intensity_publish_interval : `float`
+        The shortest time between intensity events during a scan (s).
+    intensity_window : `IntensityWindow`
+        The readings taken since the last intensity event.
+    intensity_stats : `types.SimpleNamespace`
+        The number of readings and their minimum, maximum, mean and latest
+        value in the last intensity event.
+    live_readings : `int`
+        The number of readings in the buffer that were read for the
+        intensity events already.
+    sampling_stats : `types.SimpleNamespace` | None
+        The number of polls, polls skipped, mean period, jitter and
+        maximum lateness of the polls of the last scan with a set
+        duration, see `TickScheduler.get_stats`; None for other scans.
+    fits_executor : `concurrent.futures.ThreadPoolExecutor`
+        The threads that encode and write FITS files, so that the event
+        loop is not blocked.
+    fits_stats : `dict` [`str`, `types.SimpleNamespace`]
+        How often and how long FITS jobs took, by the name of the job.
+    fits_buffer : `bytearray`
+        The buffer FITS files are encoded into, reused for each scan.
+    fits_compression : `str`
+        How the FITS files are compressed, see `fits_writer.write_fits`.
+    fits_compression_level : `int`
+        The compression level of the FITS files.
+    upload_spool : `UploadSpool` | None
+        The FITS files waiting to be uploaded to the LFA; None until
+        configured.
+    obs_id_pool_size : `int`
+        The number of obs IDs fetched ahead of time.
+    obs_id_pool : `ObsIdPool` | None
+        The obs IDs fetched ahead of time for the FITS files; None until
+        connected.
     """
 
     def __init__(self, csc, log=None):
@@ -138,6 +242,45 @@ class ElectrometerController(abc.ABC):
         self.filter_active = False
         self.avg_filter_active = False
         self.group_id = None
+        self.buffer_readout = "stream"
+        self.buffer_drain_interval = 0
+        self.drain_store = None
+        self.drain_trace_elements = []
+        self.drained_readings = 0
+        self.drain_stopped = asyncio.Event()
+        self.drain_task = utils.make_done_future()
+        self.drain_in_background = False
+        self.readout_model = readout_model.ReadoutModel(log=self.log)
+        self.readout_stats = types.SimpleNamespace(
+            num_readings=0, timeout=None, duration=None, seconds_per_reading=None
+        )
+        self.read_timeout = None
+        self.ready_timeout = 10
+        self.ready_stats = {}
+        self.scan_plans = scan_plan.ScanPlanCache()
+        self.instrument_state = instrument_state.InstrumentState()
+        self.error_tracker = error_tracker.ErrorTracker()
+        self.state_connection = 0
+        self.intensity_publish_interval = 1
+        self.intensity_window = intensity_window.IntensityWindow()
+        self.intensity_stats = types.SimpleNamespace(
+            count=0, min=None, max=None, mean=None, last=None
+        )
+        self.intensity_publish_time = 0
+        self.live_readings = 0
+        self.sampling_stats = None
+        self.fits_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=FITS_WORKERS, thread_name_prefix="fits"
+        )
+        self.fits_jobs = asyncio.Semaphore(MAX_PENDING_FITS_JOBS)
+        self.fits_stats = {}
+        self.fits_buffer = bytearray()
+        self.fits_buffer_lock = asyncio.Lock()
+        self.fits_compression = "none"
+        self.fits_compression_level = 1
+        self.upload_spool = None
+        self.obs_id_pool_size = 0
+        self.obs_id_pool = None
 
     @property
     def connected(self):
@@ -150,33 +293,16 @@ class ElectrometerController(abc.ABC):
         ----------
         response : `str`
             The response from the read buffer command.
+        num_categories : `int`, optional
+            The number of values stored for each reading.
 
         Returns
         -------
-        intensity : `list`
-            The intensity values
-        time : `list`
-            The time values
-        temperature : `list`
-            The temperature values.
-        unit : `list`
-            The unit values.
-        voltage : `list`
-            The voltage values.
-        """
-        regex_numbers = r"[-+]?[.]?[\d]+(?:,\d\d\d)*[\.]?\d*(?:[eE][-+]?\d+)?"
-        # regex_strings = "(?!E+)[a-zA-Z]+"
-        raw_values = list(map(float, re.findall(regex_numbers, response)))
-
-        # Converting each value to a float
-        raw_str_values = [float(value) for value in raw_values]
-
-        # Creating separate lists for each category
-        categorized_lists = [[] for _ in range(num_categories)]
-        for i, value in enumerate(raw_str_values):
-            category_index = i % num_categories
-            categorized_lists[category_index].append(value)
-        return categorized_lists
+        columns : `numpy.ndarray`
+            One row per category, in the order of the trace elements;
+            ``columns[i]`` is a view of the values of category ``i``.
+        """
+        return buffer_parser.parse_buffer(response, num_categories=num_categories).T
 
     @abc.abstractmethod
     def configure(self, config):
@@ -206,26 +332,201 @@ class ElectrometerController(abc.ABC):
         self.location = config.location
         self.electrometer_type = config.electrometer_type
         self.model_id = config.electrometer_model
+        self.buffer_readout = config.buffer_readout
+        self.buffer_drain_interval = config.buffer_drain_interval
+        self.ready_timeout = config.ready_timeout
+        self.intensity_publish_interval = config.intensity_publish_interval
+        self.fits_compression = config.fits_compression
+        self.fits_compression_level = config.fits_compression_level
+        self.obs_id_pool_size = config.obs_id_pool_size
+        self.scan_plans.clear()
+        self.instrument_state.invalidate()
+        self.readout_model = readout_model.ReadoutModel(
+            path=pathlib.Path(self.fits_file_path) / READOUT_MODEL_FILENAME,
+            log=self.log,
+        )
+        self.upload_spool = upload_spool.UploadSpool(
+            path=pathlib.Path(self.fits_file_path) / UPLOAD_SPOOL_DIRECTORY,
+            upload=self.upload_fits_file,
+            log=self.log,
+        )
         self.image_service_client = None
 
     @classmethod
     @abc.abstractmethod
     def get_config_schema(cls):
+        """Return the configuration schema of the electrometer.
+
+        It is parsed once and cached, so it must not be modified.
+        """
         pass
 
     async def send_command(self, command, has_reply=False, timeout=None):
+        self.error_tracker.sent(command)
         return await self.commander.send_command(
             msg=command,
             has_reply=has_reply,
             timeout=timeout,
         )
 
+    async def send_commands(self, commands, timeout=None):
+        """Send several commands in as few round trips as possible.
+
+        Parameters
+        ----------
+        commands : `list` of `str`
+            The generated command strings.
+        timeout : `float`, optional
+            How long to wait for each reply.
+
+        Returns
+        -------
+        replies : `list` of `str`
+            The replies to the queries, in order.
+        """
+        self.error_tracker.sent(*commands)
+        return await self.commander.send_commands(commands=commands, timeout=timeout)
+
+    async def send_plan(self, key, build_commands):
+        """Send a batch of commands that only depends on the settings in
+        ``key``, compiling it only the first time.
+
+        Parameters
+        ----------
+        key : `tuple`
+            The name of the batch and the settings it depends on.
+        build_commands : `callable`
+            Function without arguments that returns the commands.
+
+        Returns
+        -------
+        replies : `list` of `str`
+            The replies to the queries, in order.
+        """
+        plan = self.scan_plans.get(
+            key, build_commands, self.commander.terminator, self.commander.encoding
+        )
+        self.log.debug(
+            f"Sending {key[0]} plan; {self.scan_plans.hits} hits, "
+            f"{self.scan_plans.misses} misses."
+        )
+        self.error_tracker.sent(f"{key[0]} plan")
+        return await self.commander.send_plan(plan)
+
+    def get_plan_key(self, name):
+        """Return the key of a scan plan for the current settings.
+
+        Parameters
+        ----------
+        name : `str`
+            The name of the batch of commands.
+
+        Returns
+        -------
+        key : `tuple`
+            The key.
+        """
+        return (
+            name,
+            self.electrometer_type,
+            self.mode,
+            self.auto_range,
+            self.range,
+            self.accessories.temperature,
+            self.accessories.vsource,
+        )
+
+    def sync_instrument_state(self):
+        """Forget the instrument state if the commander reconnected since it
+        was recorded, as the electrometer may have been reset.
+        """
+        if self.commander.num_connections != self.state_connection:
+            self.instrument_state.invalidate()
+            self.state_connection = self.commander.num_connections
+
+    def setting_in_effect(self, name, value):
+        """Check whether a setting already has a value, so that the command
+        that sets it can be skipped.
+
+        Parameters
+        ----------
+        name : `str`
+            The name of the setting.
+        value : `object`
+            The value it should have.
+
+        Returns
+        -------
+        in_effect : `bool`
+            True if the setting is known to have the value.
+        """
+        self.sync_instrument_state()
+        if not self.instrument_state.matches(name, value):
+            return False
+        self.log.debug(
+            f"{name} is already {value}; skipping it. "
+            f"{self.instrument_state.num_skipped} commands skipped so far."
+        )
+        return True
+
+    def record_settings(self, **settings):
+        """Record settings applied to the electrometer.
+
+        Parameters
+        ----------
+        **settings : `dict`
+            The values, by the name of the setting; a value of None
+            forgets the setting.
+        """
+        self.sync_instrument_state()
+        self.instrument_state.update(**settings)
+
+    def get_range_setting(self, auto, set_range):
+        """Return the range setting recorded in the instrument state.
+
+        Parameters
+        ----------
+        auto : `bool`
+            Whether auto range is active.
+        set_range : `float`
+            The range; ignored in auto range.
+
+        Returns
+        -------
+        setting : `tuple`
+            Whether auto range is active and the range, None in auto range.
+        """
+        return (auto, None if auto else float(set_range))
+
+    async def get_next_obs_id(self, num_images):
+        """Get the next obs IDs from the image name service.
+
+        Parameters
+        ----------
+        num_images : `int`
+            The number of obs IDs.
+
+        Returns
+        -------
+        image_sequence_array : `list` of `int`
+            The sequence numbers of the images.
+        obs_ids : `list` of `str`
+            The obs IDs.
+        """
+        return await self.image_service_client.get_next_obs_id(num_images=num_images)
+
     async def connect(self):
         self.image_service_client = utils.ImageNameServiceClient(
             url=self.image_name_service,
             csc_index=self.csc.salinfo.index,
             source="Electrometer",
         )
+        self.obs_id_pool = obs_id_pool.ObsIdPool(
+            get_next_obs_id=self.get_next_obs_id,
+            size=self.obs_id_pool_size,
+            log=self.log,
+        )
+        await self.upload_spool.start()
         await self.commander.connect()
         id = await self.send_command(
             command=self.commands.get_hardware_info(), has_reply=True
@@ -247,6 +548,7 @@ class ElectrometerController(abc.ABC):
         await self.csc.report_detailed_state(DetailedState.NOTREADINGSTATE)
         await self.send_command(command=self.commands.reset_device())
         await self.send_command(command=self.commands.clear())
+        self.instrument_state.invalidate()
         match expected_type:
             case "Keysight":
                 await self.send_command(command=self.commands.output_trigger_line())
@@ -264,6 +566,15 @@ class ElectrometerController(abc.ABC):
 
     async def disconnect(self):
         self.image_service_client = None
+        if self.obs_id_pool is not None:
+            self.obs_id_pool.clear()
+        self.drain_task.cancel()
+        self.drain_store = None
+        self.instrument_state.invalidate()
+        if self.upload_spool is not None:
+            await self.upload_spool.stop()
+        if self.readout_model.unsaved:
+            await asyncio.to_thread(self.readout_model.save)
         await self.commander.disconnect()
 
     async def perform_zero_calibration(
@@ -294,13 +605,25 @@ class ElectrometerController(abc.ABC):
             integration_time = self.integration_time
         # TO-DO : Remove integration time from perform_zero_calibration
 
-        await self.send_command(
-            self.commands.perform_zero_calibration(
-                mode, auto, set_range, integration_time
-            )
+        await self.send_plan(
+            ("perform_zero_calibration", mode, auto, set_range, integration_time),
+            lambda: [
+                self.commands.perform_zero_calibration(
+                    mode, auto, set_range, integration_time
+                )
+            ],
         )
-        await asyncio.sleep(2)
-        await self.check_error("perform_zero_calibration")
+        if not await self.wait_until_ready("perform_zero_calibration"):
+            # The commands may only have been partly applied.
+            self.instrument_state.invalidate()
+            raise RuntimeError(
+                f"The electrometer was not ready after {self.ready_timeout} s; "
+                "the zero calibration may not have completed."
+            )
+        if await self.check_error("perform_zero_calibration"):
+            self.record_settings(
+                mode=mode, range=self.get_range_setting(auto, set_range)
+            )
 
         self.log.debug("Zero calibration command sent")
         await self.get_mode()
@@ -320,6 +643,9 @@ class ElectrometerController(abc.ABC):
         activate_med_filter : `bool`
             Whether the median filter should be activated.
         """
+        filters = (self.mode, activate_filter, activate_avg_filter, activate_med_filter)
+        if self.setting_in_effect("filters", filters):
+            return
         filter_active = activate_avg_filter and activate_filter
         await self.send_command(
             f"{self.commands.activate_filter(self.mode, enums.Filter(2), filter_active)}"
@@ -333,7 +659,8 @@ class ElectrometerController(abc.ABC):
         await self.get_avg_filter_status()
         if self.electrometer_type == "Keithley" or self.mode == "CURR":
             await self.get_med_filter_status()
-        await self.check_error("set_digital_filter")
+        if await self.check_error("set_digital_filter"):
+            self.record_settings(filters=filters)
 
     async def get_avg_filter_status(self):
         """Get the average filter status."""
@@ -366,17 +693,33 @@ class ElectrometerController(abc.ABC):
             activateMedianFilter=self.median_filter_active
         )
 
+    def get_setup_scan_commands(self):
+        """Return the commands that set up the electrometer for a scan.
+
+        Returns
+        -------
+        commands : `list` of `str`
+            The generated command strings.
+        """
+        return [
+            self.commands.set_resolution(mode=self.mode, digit=7),
+            self.commands.enable_sync(False),
+            f"{self.commands.output_trigger_line(3)}",
+            f"{self.commands.clear_buffer()}",
+        ]
+
     async def setup_scan(self):
         """Sets up the electrometer to prepare for scan."""
-        await self.send_command(self.commands.set_resolution(mode=self.mode, digit=7))
-        await self.send_command(self.commands.enable_sync(False))
-        await self.send_command(f"{self.commands.output_trigger_line(3)}")
-        await self.send_command(f"{self.commands.clear_buffer()}")
+        await self.send_commands(self.get_setup_scan_commands())
 
-    async def prepare_scan(self):
-        """Prepare the keithley for scanning."""
-        await self.setup_scan()
+    def get_prepare_scan_commands(self):
+        """Return the commands that prepare the electrometer for a scan.
 
+        Returns
+        -------
+        commands : `list` of `str`
+            The generated command strings.
+        """
         format_trac_args = {}
         if self.accessories.temperature:
             format_trac_args["temperature"] = True
@@ -384,7 +727,99 @@ class ElectrometerController(abc.ABC):
             format_trac_args["voltage"] = True
         format_trac_args["set_mode"] = True
         format_trac_args["mode"] = self.mode
-        await self.send_command(self.commands.format_trac(**format_trac_args))
+        return self.get_setup_scan_commands() + [
+            self.commands.format_trac(**format_trac_args)
+        ]
+
+    async def prepare_scan(self):
+        """Prepare the keithley for scanning."""
+        await self.send_plan(
+            self.get_plan_key("prepare_scan"), self.get_prepare_scan_commands
+        )
+        trace_format = (
+            self.mode,
+            self.accessories.temperature,
+            self.accessories.vsource,
+        )
+        self.sync_instrument_state()
+        if self.instrument_state.get("trace_format") != trace_format:
+            self.record_settings(trace_format=trace_format, trace_elements=None)
+
+    def get_clear_buffer_commands(self):
+        """Return the commands that empty the buffer before a scan.
+
+        Returns
+        -------
+        commands : `list` of `str`
+            The generated command strings.
+        """
+        commands = [f"{self.commands.clear_buffer()}"]
+        if self.electrometer_type == "Keysight":
+            commands.append(f"{self.commands.clear_array()}")
+        if self.electrometer_type == "Keithley":
+            commands.append(f"{self.commands.set_buffer_size(BUFFER_SIZE)}")
+        return commands
+
+    def get_discharge_commands(self):
+        """Return the commands that discharge the capacitor before a charge
+        scan.
+
+        Returns
+        -------
+        commands : `list` of `str`
+            The generated command strings, empty unless measuring charge.
+        """
+        if self.mode != "CHAR":
+            return []
+        return [
+            f"{self.commands.set_autodischarge('OFF')}",
+            f"{self.commands.discharge_capacitor()}",
+        ]
+
+    def get_start_scan_commands(self):
+        """Return the commands that start a scan.
+
+        Returns
+        -------
+        commands : `list` of `str`
+            The generated command strings.
+        """
+        return (
+            self.get_clear_buffer_commands()
+            + [
+                f"{self.commands.select_source(source=enums.Source.TIM)}",
+                f"{self.commands.set_infinite_triggers()}",
+                f"{self.commands.enable_display(False)}",
+            ]
+            + self.get_discharge_commands()
+            + [
+                f"{self.commands.start_storing_buffer()}",
+                f"{self.commands.acquire_data()}",
+            ]
+        )
+
+    def get_start_scan_dt_commands(self):
+        """Return the commands that start a scan with a set duration.
+
+        Returns
+        -------
+        commands : `list` of `str`
+            The generated command strings.
+        """
+        commands = self.get_clear_buffer_commands()
+        if self.electrometer_type == "Keithley":
+            commands.append(f"{self.commands.select_source(source=enums.Source.IMM)}")
+        else:
+            commands += [
+                f"{self.commands.select_source(source=enums.Source.TIM)}",
+                f"{self.commands.set_infinite_triggers()}",
+            ]
+        commands.append(f"{self.commands.enable_display(False)}")
+        commands += self.get_discharge_commands()
+        commands.append(f"{self.commands.start_storing_buffer()}")
+        if self.electrometer_type == "Keithley":
+            commands.append(f"{self.commands.next_read()}")
+        return commands
 
     async def start_scan(self, group_id=None):
         """Start storing values in the Keithley electrometer's buffer.
@@ -397,29 +832,19 @@ class ElectrometerController(abc.ABC):
             in the CSC, but it is used in write_fits_file
         """
         assert self.image_service_client is not None
+        # Fetch the obs ID of the FITS file while scanning.
+        self.obs_id_pool.prefetch()
         self.group_id = group_id
+        self.sampling_stats = None
         await self.prepare_scan()
         await self.perform_zero_calibration()
-        await self.send_command(f"{self.commands.clear_buffer()}")
-        if self.electrometer_type == "Keysight":
-            await self.send_command(f"{self.commands.clear_array()}")
-
-        if self.electrometer_type == "Keithley":
-            await self.send_command(f"{self.commands.set_buffer_size(50000)}")
-
-        await self.send_command(
-            f"{self.commands.select_source(source=enums.Source.TIM)}"
+        await self.send_plan(
+            self.get_plan_key("start_scan"), self.get_start_scan_commands
         )
-
-        await self.send_command(f"{self.commands.set_infinite_triggers()}")
-
-        await self.send_command(f"{self.commands.enable_display(False)}")
-        if self.mode == "CHAR":
-            await self.send_command(f"{self.commands.set_autodischarge('OFF')}")
-            await self.send_command(f"{self.commands.discharge_capacitor()}")
-        await self.send_command(f"{self.commands.start_storing_buffer()}")
-        await self.send_command(f"{self.commands.acquire_data()}")
+        self.record_settings(trigger_source=enums.Source.TIM)
         self.manual_start_time = utils.current_tai()
+        if self.buffer_drain_interval > 0:
+            await self.start_drain()
 
     async def start_scan_dt(self, scan_duration, group_id=None):
         """Start storing values in the Keithley electrometer's buffer, for a
@@ -435,45 +860,171 @@ class ElectrometerController(abc.ABC):
             in the CSC, but it is used in write_fits_file
         """
         assert self.image_service_client is not None
+        # Fetch the obs ID of the FITS file while scanning.
+        self.obs_id_pool.prefetch()
         self.group_id = group_id
+        self.sampling_stats = None
         await self.prepare_scan()
         await self.perform_zero_calibration()
-        await self.send_command(f"{self.commands.clear_buffer()}")
-        if self.electrometer_type == "Keysight":
-            await self.send_command(f"{self.commands.clear_array()}")
-
-        if self.electrometer_type == "Keithley":
-            await self.send_command(f"{self.commands.set_buffer_size(50000)}")
-
-        if self.electrometer_type == "Keithley":
-            await self.send_command(
-                f"{self.commands.select_source(source=enums.Source.IMM)}"
-            )
-        else:
-            await self.send_command(
-                f"{self.commands.select_source(source=enums.Source.TIM)}"
+        await self.send_plan(
+            self.get_plan_key("start_scan_dt"), self.get_start_scan_dt_commands
+        )
+        self.record_settings(
+            trigger_source=(
+                enums.Source.IMM
+                if self.electrometer_type == "Keithley"
+                else enums.Source.TIM
             )
-            await self.send_command(f"{self.commands.set_infinite_triggers()}")
-
-        await self.send_command(f"{self.commands.enable_display(False)}")
-        if self.mode == "CHAR":
-            await self.send_command(f"{self.commands.set_autodischarge('OFF')}")
-            await self.send_command(f"{self.commands.discharge_capacitor()}")
-        await self.send_command(f"{self.commands.start_storing_buffer()}")
-        if self.electrometer_type == "Keithley":
-            await self.send_command(f"{self.commands.next_read()}")
+        )
         self.manual_start_time = utils.current_tai()
+        if self.buffer_drain_interval > 0:
+            await self.start_drain()
 
         await self.continuous_scan(scan_duration)
 
     async def continuous_scan(self, scan_duration):
-        """Part of start scan dt for Keithley"""
-        dt = 0
-        while dt < scan_duration:
+        """Part of start scan dt for Keithley.
+
+        Every `intensity_publish_interval` seconds, the readings added to
+        the buffer are read in one go and an intensity event is published.
+        """
+        if self.drain_store is not None:
+            trace_elements = self.drain_trace_elements
+        else:
+            trace_elements = await self.get_trace_elements()
+        signal_index = self.get_signal_index(trace_elements)
+        self.intensity_window.clear()
+        self.intensity_publish_time = time.monotonic()
+        self.live_readings = 0
+        scheduler = tick_scheduler.TickScheduler(
+            period=max(self.intensity_publish_interval, self.integration_time),
+            duration=scan_duration - (utils.current_tai() - self.manual_start_time),
+        )
+        while True:
+            await self.read_intensities(trace_elements, signal_index)
+            await self.publish_intensity()
+            if not await scheduler.wait_next():
+                break
+        await self.read_intensities(trace_elements, signal_index)
+        await self.publish_intensity(force=True)
+        self.finish_sampling(scheduler)
+
+    def finish_sampling(self, scheduler):
+        """Keep and log the statistics of the polls during a scan.
+
+        Parameters
+        ----------
+        scheduler : `TickScheduler`
+            The scheduler of the polls.
+        """
+        stats = scheduler.get_stats()
+        self.sampling_stats = stats
+        if stats.count == 0:
+            self.log.debug(f"Polled once; {stats.skipped} polls skipped.")
+            return
+        self.log.info(
+            f"Polled {stats.count} times every {stats.mean_period:.4f} s "
+            f"(target {scheduler.period:.4f} s); jitter {stats.jitter:.4f} s, "
+            f"max lateness {stats.max_lateness:.4f} s, "
+            f"{stats.skipped} polls skipped."
+        )
+
+    def get_signal_index(self, trace_elements):
+        """Return the index of the signal in the buffer readings.
+
+        Parameters
+        ----------
+        trace_elements : `list` of `str`
+            The elements stored for each reading.
+
+        Returns
+        -------
+        index : `int` | None
+            The index, or None if the readings do not hold the signal.
+        """
+        for i, element in enumerate(trace_elements):
+            if element.strip() in SIGNAL_ELEMENTS:
+                return i
+        return None
+
+    async def read_intensities(self, trace_elements, signal_index):
+        """Add the readings taken since the last call to
+        `intensity_window`.
+
+        The readings drained from the buffer are used if it is being
+        drained, draining it first unless that happens in the background.
+        Otherwise the new readings are read from the buffer in one query,
+        or the latest reading if the buffer does not hold the signal.
+
+        Parameters
+        ----------
+        trace_elements : `list` of `str`
+            The elements stored for each reading.
+        signal_index : `int` | None
+            The index of the signal in the readings.
+        """
+        if self.drain_store is not None and not self.drain_in_background:
+            await self.drain_buffer()
+        if signal_index is None:
             await self.get_intensity()
-            await self.csc.evt_intensity.set_write(intensity=self.last_value)
-            await asyncio.sleep(self.integration_time)
-            dt = utils.current_tai() - self.manual_start_time
+            self.intensity_window.add(self.last_value)
+            return
+        if self.drain_store is not None:
+            values = self.drain_store.data[self.live_readings :, signal_index]
+            self.live_readings += len(values)
+        else:
+            num_readings = await self.get_buffer_quantity()
+            if num_readings < self.live_readings:
+                self.live_readings = 0
+            count = num_readings - self.live_readings
+            if count <= 0:
+                return
+            res = await self.send_command(
+                f"{self.commands.read_buffer_range(self.live_readings, count)}",
+                has_reply=True,
+            )
+            values = self.parse_buffer(res, num_categories=len(trace_elements))[
+                signal_index
+            ]
+            self.live_readings = num_readings
+        if len(values) > 0:
+            self.intensity_window.add(values)
+            self.last_value = self.intensity_window.last
+
+    async def publish_intensity(self, force=False):
+        """Publish an intensity event for the readings in
+        `intensity_window`, at most every `intensity_publish_interval`
+        seconds.
+
+        The event reports the latest reading; the minimum, maximum and mean
+        are kept in `intensity_stats` and logged.
+
+        Parameters
+        ----------
+        force : `bool`, optional
+            Publish even if the interval has not passed yet.
+        """
+        window = self.intensity_window
+        now = time.monotonic()
+        if window.count == 0 or (
+            not force
+            and now - self.intensity_publish_time < self.intensity_publish_interval
+        ):
+            return
+        await self.csc.evt_intensity.set_write(intensity=window.last)
+        self.intensity_stats = types.SimpleNamespace(
+            count=window.count,
+            min=window.min,
+            max=window.max,
+            mean=window.mean,
+            last=window.last,
+        )
+        self.log.debug(
+            f"Intensity of {window.count} readings: min={window.min} "
+            f"max={window.max} mean={window.mean} last={window.last}."
+        )
+        window.clear()
+        self.intensity_publish_time = now
 
     async def stop_scan(self):
         """Stop storing values in the electrometer."""
@@ -486,37 +1037,198 @@ class ElectrometerController(abc.ABC):
         self.log.debug("Scanning stopped.")
 
         await self.send_command(f"{self.commands.enable_display(True)}")
-        await asyncio.sleep(SLEEP)
         if self.electrometer_type == "Keithley":
             await self.send_command(f"{self.commands.enable_zero_check(True)}")
-        # FIXME: DM-37459
-        # How long it takes to readout the buffer is dependent upon the
-        # integration time and number of samples.
-        # There is a bug in how the integration time is handled so
-        # assume 0.2 seconds per sample for now until the bug
-        # affecting the integration time is fixed.
-        # Rough tests showed 330 data   points takes ~4s
-        # Number of lines is approximately scan_duration over integration time
-        # PF: based on test
-        num_of_lines = self.scan_duration / ((self.integration_time * 3.07) + 0.00254)
-        self.log.debug(f"approximate number of lines: {num_of_lines}")
-        # Add extra time to read_timeout using num_of_lines times time per
-        # sample time (assumption with 330 samples take ~4 seconds) with
-        # approximately 30% overhead. Multiply by 2 for data and time
-        read_timeout = (
-            self.commander.timeout
-            + 3
-            + ((num_of_lines * TIME_PER_LINE) * OVERHEAD_FACTOR * 2)
-        )
-        read_timeout = max(read_timeout, 10)
-        self.read_timeout = read_timeout
-        self.log.debug(f"{self.scan_duration=} so read timeout will be {read_timeout=}")
-        self.log.debug("Starting to read buffer")
-        res = await self.send_command(
-            f"{self.commands.read_buffer()}", has_reply=True, timeout=read_timeout
+        if not await self.wait_until_ready("stop_scan"):
+            raise RuntimeError(
+                f"The electrometer was not ready after {self.ready_timeout} s; "
+                "not reading the buffer."
+            )
+        if self.drain_store is not None:
+            trace_elements = self.drain_trace_elements
+            data = await self.finish_drain()
+        else:
+            trace_elements = await self.get_trace_elements()
+            data = await self.read_buffer(num_categories=len(trace_elements))
+
+        await self.write_fits_file(data, trace_elements)
+
+    async def read_buffer(self, num_categories):
+        """Read the whole buffer, the way set by `buffer_readout`.
+
+        Parameters
+        ----------
+        num_categories : `int`
+            The number of values stored for each reading.
+
+        Returns
+        -------
+        columns : `numpy.ndarray`
+            One row per category; ``columns[i]`` is a view of the values
+            of category ``i``.
+        """
+        num_readings = await self.get_buffer_quantity()
+        timeout = self.start_readout(num_readings, self.buffer_readout)
+        start_time = time.monotonic()
+        if self.buffer_readout == "stream":
+            data = await self.read_buffer_streaming(
+                num_categories=num_categories, timeout=timeout
+            )
+        elif self.buffer_readout == "binary":
+            data = await self.read_buffer_binary(
+                num_categories=num_categories,
+                num_readings=num_readings,
+                timeout=timeout,
+            )
+        else:
+            res = await self.send_command(
+                f"{self.commands.read_buffer()}", has_reply=True, timeout=timeout
+            )
+            data = self.parse_buffer(res, num_categories=num_categories)
+        self.finish_readout(time.monotonic() - start_time, self.buffer_readout)
+        return data
+
+    async def get_buffer_quantity(self):
+        """Get the number of readings stored in the buffer.
+
+        Returns
+        -------
+        num_readings : `int`
+            The number of readings.
+        """
+        quantity = await self.send_command(
+            f"{self.commands.get_buffer_quantity()}", has_reply=True
         )
-        # get the format of the data
-        await asyncio.sleep(SLEEP)
+        return int(float(quantity))
+
+    def get_readout_key(self, readout):
+        """Return the key of the readout model for this electrometer.
+
+        Parameters
+        ----------
+        readout : `str`
+            How the buffer is read, see `buffer_readout`.
+
+        Returns
+        -------
+        key : `str`
+            The key.
+        """
+        return f"{self.electrometer_type} {self.model_id} {readout}"
+
+    def start_readout(self, num_readings, readout):
+        """Choose the timeout to read readings from the buffer.
+
+        Parameters
+        ----------
+        num_readings : `int`
+            The number of readings to read.
+        readout : `str`
+            How the buffer is read, see `buffer_readout`.
+
+        Returns
+        -------
+        timeout : `float`
+            How long to wait for the readings (s).
+        """
+        key = self.get_readout_key(readout)
+        seconds_per_reading = self.readout_model.get_seconds_per_reading(key)
+        timeout = self.readout_model.get_timeout(
+            key, num_readings, latency=self.commander.timeout
+        )
+        self.read_timeout = timeout
+        self.readout_stats = types.SimpleNamespace(
+            num_readings=num_readings,
+            timeout=timeout,
+            duration=None,
+            seconds_per_reading=seconds_per_reading,
+        )
+        self.log.debug(
+            f"Reading {num_readings} readings with {timeout=:.1f} s; "
+            f"{key} takes {seconds_per_reading:.2e} s per reading."
+        )
+        return timeout
+
+    def finish_readout(self, duration, readout):
+        """Add the duration of a readout to the readout model.
+
+        Parameters
+        ----------
+        duration : `float`
+            How long the readout took (s).
+        readout : `str`
+            How the buffer was read, see `buffer_readout`.
+        """
+        self.readout_stats.duration = duration
+        self.readout_model.update(
+            self.get_readout_key(readout), self.readout_stats.num_readings, duration
+        )
+        self.log.debug(
+            f"Read {self.readout_stats.num_readings} readings in {duration:.2f} s."
+        )
+
+    async def wait_until_ready(self, name, timeout=None):
+        """Wait until the electrometer finished all pending commands.
+
+        Ask the electrometer to set the operation complete bit of the
+        standard event status register when it is done, then poll the
+        register.
+
+        Parameters
+        ----------
+        name : `str`
+            The name of the operation waiting, for the statistics.
+        timeout : `float`, optional
+            The longest time to wait (s); `ready_timeout` if None.
+
+        Returns
+        -------
+        ready : `bool`
+            True if the electrometer is ready, False if the wait timed out.
+        """
+        if timeout is None:
+            timeout = self.ready_timeout
+        start_time = time.monotonic()
+        ready = False
+        await self.send_command(f"{self.commands.operation_complete()}")
+        while True:
+            event_status = await self.send_command(
+                f"{self.commands.get_event_status()}", has_reply=True
+            )
+            event_status = int(float(event_status))
+            self.error_tracker.read_event_status(event_status)
+            if event_status & 1:
+                ready = True
+                break
+            if time.monotonic() - start_time >= timeout:
+                self.log.warning(f"{name}: electrometer not ready after {timeout} s.")
+                break
+            await asyncio.sleep(READY_POLL_INTERVAL)
+        elapsed = time.monotonic() - start_time
+        stats = self.ready_stats.setdefault(
+            name, types.SimpleNamespace(count=0, total=0.0, max=0.0)
+        )
+        stats.count += 1
+        stats.total += elapsed
+        stats.max = max(stats.max, elapsed)
+        self.log.debug(
+            f"{name}: waited {elapsed:.3f} s for the electrometer; "
+            f"mean {stats.total / stats.count:.3f} s over {stats.count} waits."
+        )
+        return ready
+
+    async def get_trace_elements(self):
+        """Get the elements stored for each reading in the buffer.
+
+        Returns
+        -------
+        trace_elements : `list` of `str`
+            The numeric elements, in the order they are read back.
+        """
+        self.sync_instrument_state()
+        trace_elements = self.instrument_state.lookup("trace_elements")
+        if trace_elements is not None:
+            return list(trace_elements)
         trace_format = await self.send_command(
             f"{self.commands.get_trace_format()}", has_reply=True
         )
@@ -527,9 +1239,195 @@ class ElectrometerController(abc.ABC):
         self.log.debug(
             f"data format is {trace_elements}, number of categories is {len(trace_elements)}"
         )
-        data = self.parse_buffer(res, num_categories=len(trace_elements))
+        if "trace_format" in self.instrument_state:
+            self.record_settings(trace_elements=tuple(trace_elements))
+        return trace_elements
 
-        await self.write_fits_file(data, trace_elements)
+    async def read_buffer_streaming(self, num_categories, timeout):
+        """Read the buffer, parsing the reply while it is being received.
+
+        Parameters
+        ----------
+        num_categories : `int`
+            The number of values stored for each reading.
+        timeout : `float`
+            How long to wait for the reply.
+
+        Returns
+        -------
+        columns : `numpy.ndarray`
+            One row per category; ``columns[i]`` is a view of the values
+            of category ``i``.
+        """
+        store = column_store.ColumnStore(
+            num_columns=num_categories, capacity=self.buffer_size
+        )
+        parser = buffer_parser.StreamingBufferParser(store)
+        await self.commander.send_command_streaming(
+            f"{self.commands.read_buffer()}", consumer=parser.feed, timeout=timeout
+        )
+        parser.close()
+        self.log.debug(f"Read {len(store)} readings from the buffer.")
+        return store.columns
+
+    async def start_drain(self, background=True):
+        """Start reading the buffer during a scan.
+
+        Parameters
+        ----------
+        background : `bool`, optional
+            Read the buffer every `buffer_drain_interval` seconds in the
+            background. If False, the buffer is read when the intensity is
+            polled, see `read_intensities`.
+        """
+        self.drain_task.cancel()
+        self.drain_in_background = background
+        self.drain_trace_elements = await self.get_trace_elements()
+        self.drain_store = column_store.ColumnStore(
+            num_columns=len(self.drain_trace_elements), capacity=self.buffer_size
+        )
+        self.drained_readings = 0
+        self.drain_stopped.clear()
+        if background:
+            self.drain_task = asyncio.create_task(self.drain_loop())
+        else:
+            self.drain_task = utils.make_done_future()
+
+    async def drain_loop(self):
+        """Read the new readings from the buffer every
+        `buffer_drain_interval` seconds, until `drain_stopped` is set.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self.drain_stopped.wait(), timeout=self.buffer_drain_interval
+                )
+                return
+            except TimeoutError:
+                pass
+            try:
+                await self.drain_buffer()
+            except Exception:
+                self.log.exception("Draining the buffer failed; trying again later.")
+
+    async def finish_drain(self):
+        """Stop draining the buffer in the background and read the
+        remaining readings.
+
+        Returns
+        -------
+        columns : `numpy.ndarray`
+            One row per category; ``columns[i]`` is a view of the values
+            of category ``i``.
+        """
+        # Let a read in progress finish, so no reply is left on the stream.
+        self.drain_stopped.set()
+        await self.drain_task
+        await self.drain_buffer()
+        store = self.drain_store
+        self.drain_store = None
+        self.log.debug(f"Drained {len(store)} readings from the buffer.")
+        return store.columns
+
+    async def drain_buffer(self):
+        """Read the readings added to the buffer since the last time.
+
+        The readings are appended to `drain_store`. If the buffer is full
+        it is cleared, so that the scan can continue.
+
+        Returns
+        -------
+        count : `int`
+            The number of readings read.
+        """
+        num_readings = await self.get_buffer_quantity()
+        if num_readings < self.drained_readings:
+            self.log.warning(
+                f"The buffer holds {num_readings} readings, fewer than the "
+                f"{self.drained_readings} read already; it was cleared."
+            )
+            self.drained_readings = 0
+        count = num_readings - self.drained_readings
+        if count > 0:
+            num_values = self.drain_store.num_values
+            parser = buffer_parser.StreamingBufferParser(self.drain_store)
+            timeout = self.start_readout(count, "stream")
+            start_time = time.monotonic()
+            await self.commander.send_command_streaming(
+                f"{self.commands.read_buffer_range(self.drained_readings, count)}",
+                consumer=parser.feed,
+                timeout=timeout,
+            )
+            parser.close()
+            self.finish_readout(time.monotonic() - start_time, "stream")
+            received = self.drain_store.num_values - num_values
+            if received != count * self.drain_store.num_columns:
+                self.log.warning(
+                    f"Expected {count} readings of {self.drain_store.num_columns} "
+                    f"values from the buffer, got {received} values."
+                )
+            self.drained_readings = num_readings
+        if num_readings >= self.buffer_size:
+            await self.recycle_buffer()
+        return count
+
+    async def recycle_buffer(self):
+        """Clear the full buffer and start storing readings again."""
+        self.log.warning(
+            f"The buffer is full after {self.drained_readings} readings; "
+            "clearing it. Readings taken while it is cleared are lost."
+        )
+        await self.send_command(
+            f"{self.commands.clear_buffer()}{self.commands.start_storing_buffer()}"
+        )
+        self.drained_readings = 0
+
+    async def read_buffer_binary(self, num_categories, num_readings, timeout):
+        """Read the buffer as a binary block.
+
+        The electrometer is switched back to text data afterwards,
+        as the other queries expect text replies.
+
+        Parameters
+        ----------
+        num_categories : `int`
+            The number of values stored for each reading.
+        num_readings : `int`
+            The number of readings in the buffer.
+        timeout : `float`
+            How long to wait for the reply.
+
+        Returns
+        -------
+        columns : `numpy.ndarray`
+            One row per category; ``columns[i]`` is a view of the values
+            of category ``i``, backed by the received block.
+        """
+        num_bytes = None
+        if self.electrometer_type == "Keithley":
+            # The Keithley sends an indefinite length block,
+            # so its size has to be known in advance.
+            num_bytes = (
+                num_readings
+                * num_categories
+                * buffer_parser.BINARY_DTYPES[BINARY_DATA_FORMAT].itemsize
+            )
+        await self.send_command(
+            f"{self.commands.set_data_format(BINARY_DATA_FORMAT)}"
+            f"{self.commands.set_byte_order(swapped=False)}"
+        )
+        try:
+            block = await self.commander.send_command_block(
+                f"{self.commands.read_buffer()}", num_bytes=num_bytes, timeout=timeout
+            )
+        finally:
+            await self.send_command(
+                f"{self.commands.set_data_format(enums.DataFormat.ASCII)}"
+            )
+        self.log.debug(f"Read {len(block)} bytes from the buffer.")
+        return buffer_parser.parse_binary_buffer(
+            block, num_categories=num_categories, data_format=BINARY_DATA_FORMAT
+        ).T
 
     async def get_mode(self):
         """Get the mode/unit."""
@@ -552,11 +1450,21 @@ class ElectrometerController(abc.ABC):
         self.log.debug(f"Mode is {mode}")
 
         self.mode = enums.UnitMode(mode).name
+        await self.publish_mode()
+
+    async def publish_mode(self, force_output=False):
+        """Publish the mode/unit in measureType.
+
+        Parameters
+        ----------
+        force_output : `bool`, optional
+            Whether to publish the event even if the mode did not change.
+        """
         await self.csc.evt_measureType.set_write(
             mode=int(
                 [num for num, mode in self.modes.items() if self.mode == mode.name][0]
             ),
-            force_output=False,
+            force_output=force_output,
         )
         # TO-DO: Change XML so that evt_measureType write mode as a str
         # DM-45177
@@ -591,6 +1499,8 @@ class ElectrometerController(abc.ABC):
         int_time : `float`
             The integration time.
         """
+        if self.setting_in_effect("aperture", (self.mode, int_time)):
+            return
         self.integration_time = int_time
 
         await self.send_command(self.commands.auto_nplc_on(mode=self.mode))
@@ -598,6 +1508,7 @@ class ElectrometerController(abc.ABC):
         await self.send_command(self.commands.integration_time(self.mode, value=int_time))
 
         await self.get_integration_time()
+        self.record_settings(aperture=(self.mode, int_time), nplc=None)
 
     async def get_timer(self):
         self.nplc = float(
@@ -605,10 +1516,13 @@ class ElectrometerController(abc.ABC):
         )
 
     async def set_timer(self, nplc):
+        if self.setting_in_effect("nplc", (self.mode, nplc)):
+            return
         await self.send_command(self.commands.auto_integration_time_on(mode=self.mode))
         await self.send_command(self.commands.set_timer(self.mode, nplc))
         await self.get_timer()
         await self.get_integration_time()
+        self.record_settings(nplc=(self.mode, nplc), aperture=None)
 
     async def set_mode(self, mode):
         """Set the mode/unit.
@@ -620,10 +1534,14 @@ class ElectrometerController(abc.ABC):
         """
         # TO-DO: Change XML so that evt_measureType write mode as a str
         # DM-45177
-        if mode in ["CURR", "CHAR", "VOLT", "RES"]:
-            self.mode = mode
-        else:
-            self.mode = self.modes[mode].name
+        if mode not in ["CURR", "CHAR", "VOLT", "RES"]:
+            mode = self.modes[mode].name
+        if self.setting_in_effect("mode", mode):
+            # Commands wait for the event, even if nothing changed.
+            await self.publish_mode(force_output=True)
+            return
+        self.mode = mode
+        self.scan_plans.clear()
 
         await self.perform_zero_calibration()
         await self.check_error("set_mode")
@@ -638,8 +1556,13 @@ class ElectrometerController(abc.ABC):
         set_range : `float`
             The new range value.
         """
+        auto = int(set_range) == -1
+        if self.setting_in_effect("range", self.get_range_setting(auto, set_range)):
+            await self.publish_range()
+            return
         self.range = set_range
-        if int(set_range) == -1:
+        self.scan_plans.clear()
+        if auto:
             self.log.debug("Auto Range set")
             self.auto_range = True
         else:
@@ -652,6 +1575,10 @@ class ElectrometerController(abc.ABC):
 
     def make_primary_header(self):
         """Make primary header for fits file that follows Rubin Obs. format."""
+        # Imported here, as astropy.io.fits takes long to import and is only
+        # needed to write files.
+        import astropy.io.fits as fits
+
         primary_hdu = fits.PrimaryHDU()
         primary_hdu.header["FORMAT_V"] = ("1", "Header format version")
         primary_hdu.header["ORIGIN"] = "Vera C. Rubin Observatory"
@@ -679,6 +1606,23 @@ class ElectrometerController(abc.ABC):
             self.integration_time,
             "Duration of each sample [s]",
         )
+        if self.sampling_stats is not None and self.sampling_stats.count > 0:
+            primary_hdu.header["SMPCOUNT"] = (
+                self.sampling_stats.count,
+                "Number of polls during the scan",
+            )
+            primary_hdu.header["SMPSKIP"] = (
+                self.sampling_stats.skipped,
+                "Number of polls skipped",
+            )
+            primary_hdu.header["SMPPER"] = (
+                self.sampling_stats.mean_period,
+                "Mean time between polls [s]",
+            )
+            primary_hdu.header["SMPJIT"] = (
+                self.sampling_stats.jitter,
+                "Standard deviation of poll lateness [s]",
+            )
         primary_hdu.header["FILTMED"] = (
             self.median_filter_active,
             "Median Filter Active",
@@ -702,6 +1646,22 @@ class ElectrometerController(abc.ABC):
             self.vsource,
             "Voltage input if active and attached",
         )
+        primary_hdu.header["RDPOINTS"] = (
+            self.readout_stats.num_readings,
+            "Readings in last buffer read",
+        )
+        primary_hdu.header["RDTIMOUT"] = (
+            self.readout_stats.timeout,
+            "Timeout of last buffer read [s]",
+        )
+        primary_hdu.header["RDDURATN"] = (
+            self.readout_stats.duration,
+            "Duration of last buffer read [s]",
+        )
+        primary_hdu.header["RDSECPT"] = (
+            self.readout_stats.seconds_per_reading,
+            "Modelled read time per reading [s]",
+        )
         return primary_hdu
 
     async def write_fits_file(self, raw_data, data_format):
@@ -749,71 +1709,211 @@ class ElectrometerController(abc.ABC):
                 self.log.debug(f"Changed data format for Keithley: {data_format}")
 
         data = {header: raw_data[i] for i, header in enumerate(data_format)}
-        self.log.debug("Making data table")
-        data_table = table.QTable(data=data, meta=data_metadata)
-        table_hdu = fits.table_to_hdu(data_table)
-        self.log.debug("Making fits file")
-        hdul = fits.HDUList([primary_hdu, table_hdu])
-        image_sequence_array, obs_ids = await self.image_service_client.get_next_obs_id(
-            num_images=1
-        )
-        hdul[0].header["CALIBCLS"] = "lsst.ip.isr.PhotodiodeCalib"
-        hdul[0].header["OBSID"] = obs_ids[0]
-        hdul[0].header["GROUPID"] = self.group_id
-        filename = f"{obs_ids[0]}.fits"
+        obs_id = await self.obs_id_pool.get()
+        self.log.debug(
+            f"Got obs ID {obs_id}; obs ID pool hit rate "
+            f"{self.obs_id_pool.hit_rate:.2f}, {len(self.obs_id_pool)} left."
+        )
+        primary_hdu.header["CALIBCLS"] = "lsst.ip.isr.PhotodiodeCalib"
+        primary_hdu.header["OBSID"] = obs_id
+        primary_hdu.header["GROUPID"] = self.group_id
+        filename = (
+            f"{obs_id}.fits"
+            f"{fits_writer.COMPRESSION_SUFFIXES[self.fits_compression]}"
+        )
+        key_name = self.csc.bucket.make_key(
+            salname="Electrometer",
+            salindexname=self.csc.salinfo.index,
+            generator="fits",
+            date=utils.astropy_time_from_tai_unix(self.manual_end_time),
+            other=obs_id,
+            suffix=".fits",
+        )
+        key_prefix = key_name[: key_name.rfind("/") + 1]
+        key_name = key_prefix + filename
+        async with self.fits_buffer_lock:
+            self.log.debug("Making fits file")
+            # The file is encoded once into the reused buffer and written to
+            # the upload spool from there, compressed on the way if needed.
+            file = await self.run_fits_job(
+                "encode",
+                fits_writer.encode_fits,
+                primary_hdu.header,
+                list(data.values()),
+                list(data),
+                data_metadata,
+                self.fits_buffer,
+            )
+            with file:
+                try:
+                    await self.run_fits_job(
+                        "write",
+                        self.upload_spool.write,
+                        filename,
+                        file,
+                        dict(key=key_name, group_id=self.group_id),
+                        functools.partial(
+                            fits_writer.write_fits,
+                            compression=self.fits_compression,
+                            level=self.fits_compression_level,
+                        ),
+                    )
+                except Exception:
+                    self.log.exception(
+                        f"Writing {filename} to the upload spool failed; "
+                        "uploading it directly."
+                    )
+                    # The buffer holds the file uncompressed.
+                    await self.upload_fits_buffer(file, f"{key_prefix}{obs_id}.fits")
+                    return
+        self.upload_spool.add(filename)
+
+    async def upload_fits_buffer(self, file, key):
+        """Upload an encoded FITS file to the LFA and announce it, when it
+        cannot be spooled.
 
+        Parameters
+        ----------
+        file : `memoryview`
+            The file.
+        key : `str`
+            The key to upload it to.
+
+        Raises
+        ------
+        RuntimeError
+            If the upload fails.
+        """
+        try:
+            # Read the file from the buffer, without copying it.
+            with fits_writer.BufferReader(file) as fileobj:
+                url = await self.csc.bucket.upload(fileobj=fileobj, key=key)
+        except Exception as e:
+            msg = "Uploading file to s3 bucket failed."
+            self.log.exception(msg)
+            raise RuntimeError(e)
+        await self.announce_fits_file(url, self.group_id)
+
+    async def upload_fits_file(self, path, metadata):
+        """Upload a spooled FITS file to the LFA and announce it.
+
+        Parameters
+        ----------
+        path : `pathlib.Path`
+            The path of the file.
+        metadata : `dict`
+            The key to upload the file to and the group id of the scan.
+        """
+        file = await asyncio.to_thread(open, path, "rb")
+        with file:
+            url = await self.csc.bucket.upload(fileobj=file, key=metadata["key"])
+        # The file is uploaded now, so it must not be uploaded again if the
+        # event fails.
+        await self.announce_fits_file(url, metadata["group_id"])
+
+    async def announce_fits_file(self, url, group_id):
+        """Publish that a FITS file was uploaded to the LFA.
+
+        Failures are logged, not raised.
+
+        Parameters
+        ----------
+        url : `str`
+            The URL of the file.
+        group_id : `str`
+            The group id of the scan.
+        """
         try:
-            file_upload = io.BytesIO()
-            hdul.writeto(file_upload)
-            file_upload.seek(0)
-            key_name = self.csc.bucket.make_key(
-                salname="Electrometer",
-                salindexname=self.csc.salinfo.index,
-                generator="fits",
-                date=astropy.time.Time(self.manual_end_time, format="unix_tai"),
-                other=obs_ids[0],
-                suffix=".fits",
-            )
-            key_name = key_name[: key_name.rfind("/") + 1] + filename
-            url = await self.csc.bucket.upload(fileobj=file_upload, key=key_name)
             await self.csc.evt_largeFileObjectAvailable.set_write(
                 url=url,
-                id=self.group_id,
+                id=group_id,
                 generator=f"{self.csc.salinfo.name}:{self.csc.salinfo.index}",
             )
         except Exception:
-            self.log.exception("Uploading file to s3 bucket failed.")
+            self.log.exception(f"Publishing largeFileObjectAvailable for {url} failed.")
 
-            try:
-                pathlib.Path(self.fits_file_path).mkdir(parents=True, exist_ok=True)
-                hdul.writeto(f"{self.fits_file_path}/{filename}")
-            except Exception as e:
-                msg = "Writing file to local disk failed."
-                self.log.exception(msg)
-                raise RuntimeError(e)
+    async def run_fits_job(self, name, func, *args):
+        """Run a FITS job in `fits_executor` and wait for its result.
+
+        At most `MAX_PENDING_FITS_JOBS` jobs are queued or running at once,
+        so that slow jobs hold up the scans instead of piling up.
+
+        Parameters
+        ----------
+        name : `str`
+            The name of the job, for the statistics.
+        func : `callable`
+            The job.
+        *args : `list`
+            The arguments of the job.
+
+        Returns
+        -------
+        result : `object`
+            The result of the job.
+        """
+        async with self.fits_jobs:
+            start_time = time.monotonic()
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.fits_executor, func, *args
+            )
+        elapsed = time.monotonic() - start_time
+        stats = self.fits_stats.setdefault(
+            name, types.SimpleNamespace(count=0, total=0.0, max=0.0)
+        )
+        stats.count += 1
+        stats.total += elapsed
+        stats.max = max(stats.max, elapsed)
+        self.log.debug(
+            f"FITS {name} took {elapsed:.3f} s; "
+            f"mean {stats.total / stats.count:.3f} s over {stats.count} jobs."
+        )
+        return result
 
     async def check_error(self, from_command: str | None):
-        """Check the error.
-        Parameter
-        ---------
+        """Check whether the commands sent since the last check caused
+        errors.
+
+        The error queue is only drained if the status registers report an
+        error, and the status byte is only queried if commands were sent
+        since the registers were last read, e.g. by `wait_until_ready`.
+
+        Parameters
+        ----------
         from_command : `str` | None
             Tells us where the check error is being called from
-        """
 
-        async def get_error():
-            res = await self.send_command(
-                self.commands.get_last_error(), has_reply=True
-            )
-            error_code, message = res.split(",")
-            error_code = int(error_code)
-            return error_code, message
-
-        error_code, message = await get_error()
-        while error_code != 0:
-            self.log.info(
-                f"Non zero error code from {from_command}: {error_code=} {message=}"
+        Returns
+        -------
+        ok : `bool`
+            True if there were no errors. Otherwise the state of the
+            electrometer is uncertain, so the instrument state is forgotten.
+        """
+        if self.error_tracker.needs_status:
+            status_byte = await self.send_command(
+                self.commands.get_status_byte(), has_reply=True
             )
-            error_code, message = await get_error()
+            self.error_tracker.read_status_byte(int(float(status_byte)))
+        ok = True
+        if self.error_tracker.has_error:
+            while True:
+                res = await self.send_command(
+                    self.commands.get_last_error(), has_reply=True
+                )
+                error_code, message = res.split(",", 1)
+                error_code = int(error_code)
+                if error_code == 0:
+                    break
+                ok = False
+                self.error_tracker.add_error(from_command, error_code, message)
+                self.log.info(
+                    f"Non zero error code from {from_command}: {error_code=} "
+                    f"{message=}; commands sent: {self.error_tracker.unchecked}"
+                )
+        if not ok:
+            self.instrument_state.invalidate()
+        self.error_tracker.checked()
+        return ok
 
     async def get_range(self):
         """Get the range value."""
@@ -821,6 +1921,10 @@ class ElectrometerController(abc.ABC):
             f"{self.commands.get_range(self.mode)}", has_reply=True
         )
         self.range = float(res)
+        await self.publish_range()
+
+    async def publish_range(self):
+        """Publish the range in measureRange."""
         await self.csc.evt_measureRange.set_write(
             rangeValue=self.range, force_output=True
         )
@@ -887,8 +1991,10 @@ class KeithleyElectrometerController(ElectrometerController):
         self.commands = commands_factory.KeithleyElectrometerCommandFactory()
         # Intensity value when saturated in the positive direction.
         self.positive_saturation = 9.9e37
+        self.buffer_size = BUFFER_SIZE
 
     @classmethod
+    @functools.cache
     def get_config_schema(cls):
         return yaml.safe_load(
             """
@@ -917,8 +2023,10 @@ class KeysightElectrometerController(ElectrometerController):
         self.commands = commands_factory.KeysightElectrometerCommandFactory()
         # Intensity value when saturated in the positive direction.
         self.positive_saturation = 9.91e37
+        self.buffer_size = KEYSIGHT_BUFFER_SIZE
 
     @classmethod
+    @functools.cache
     def get_config_schema(cls):
         return yaml.safe_load(
             """
@@ -931,15 +2039,39 @@ properties: {}
 """
         )
 
-    async def setup_scan(self):
-        """Sets up the electrometer to prepare for scan."""
-        await self.send_command(f"{self.commands.output_trigger_line()}")
-        await self.send_command(f"{self.commands.clear_buffer()}")
+    def get_setup_scan_commands(self):
+        """Return the commands that set up the electrometer for a scan.
+
+        Returns
+        -------
+        commands : `list` of `str`
+            The generated command strings.
+        """
+        return [
+            f"{self.commands.output_trigger_line()}",
+            f"{self.commands.clear_buffer()}",
+        ]
+
+    async def recycle_buffer(self):
+        """Clear the full buffer and start storing readings again."""
+        self.log.warning(
+            f"The buffer is full after {self.drained_readings} readings; "
+            "clearing it. Readings taken while it is cleared are lost."
+        )
+        await self.send_command(f"{self.commands.clear_array()}")
+        self.drained_readings = 0
 
     async def continuous_scan(self, scan_duration):
-        """Part of start scan dt for Keysight."""
+        """Part of start scan dt for Keysight.
+
+        The new readings are read from the buffer into the drained readings
+        while the scan runs, so that only the last ones are left to read
+        when it stops.
+        """
         await self.send_command(f"{self.commands.acquire_data()}")
-        await asyncio.sleep(scan_duration)
+        if self.drain_store is None:
+            await self.start_drain(background=False)
+        await super().continuous_scan(scan_duration)
         await self.send_command(f"{self.commands.stop_taking_data()}")
 
     def configure(self, config):
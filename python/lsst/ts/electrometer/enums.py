@@ -19,7 +19,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-__all__ = ["UnitMode", "Filter", "Source", "AverFilterType", "ReadingOption", "Error"]
+__all__ = [
+    "UnitMode",
+    "Filter",
+    "Source",
+    "AverFilterType",
+    "ReadingOption",
+    "DataFormat",
+    "Error",
+]
 
 import enum
 
@@ -82,6 +90,19 @@ class ReadingOption(enum.IntEnum):
     """Get a new reading"""
 
 
+class DataFormat(enum.StrEnum):
+    """The format of the data sent by the electrometer."""
+
+    ASCII = "ASC"
+    """Text"""
+
+    REAL32 = "REAL,32"
+    """IEEE-754 single precision binary block"""
+
+    REAL64 = "REAL,64"
+    """IEEE-754 double precision binary block"""
+
+
 class Error(enum.IntEnum):
     FILE_ERROR = 1
     """File failed to write properly."""
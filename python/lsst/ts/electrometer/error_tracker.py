@@ -0,0 +1,152 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+__all__ = ["ErrorTracker"]
+
+import collections
+import types
+
+ERROR_EVENT_BITS = 0b0011_1100
+"""The bits of the standard event status register set by errors: query,
+device-dependent, execution and command error."""
+ERROR_AVAILABLE_BIT = 0b0000_0100
+"""The bit of the status byte set while the error queue is not empty."""
+MAX_RECENT_ERRORS = 20
+"""The number of errors kept in `ErrorTracker.recent`."""
+
+
+class ErrorTracker:
+    """Track which commands were sent since the electrometer was last
+    checked for errors, and the errors it reported.
+
+    The error queue only has to be drained if the status registers report
+    an error, and the registers only have to be read if commands were sent
+    since they were last read, e.g. while waiting for the electrometer to
+    be ready. That way a sequence of configuration steps usually costs one
+    status query, or none, instead of one error query per step.
+
+    Attributes
+    ----------
+    unchecked : `list` of `str`
+        The commands sent since the last check.
+    counts : `dict` [`str`, `int`]
+        The number of errors, by the operation that caused them.
+    recent : `collections.deque` [`types.SimpleNamespace`]
+        The latest errors: the operation, error code, message and the
+        commands that could have caused them.
+    num_checks : `int`
+        The number of checks.
+    num_status_queries : `int`
+        The number of checks that had to query the status byte.
+    """
+
+    def __init__(self):
+        self.unchecked = []
+        self.num_covered = 0
+        self.error_event = False
+        self.counts = {}
+        self.recent = collections.deque(maxlen=MAX_RECENT_ERRORS)
+        self.num_checks = 0
+        self.num_status_queries = 0
+
+    def sent(self, *commands):
+        """Record commands sent to the electrometer.
+
+        Parameters
+        ----------
+        *commands : `str`
+            The commands.
+        """
+        self.unchecked.extend(commands)
+
+    def read_event_status(self, event_status):
+        """Record a read of the standard event status register, which
+        covers the commands sent so far.
+
+        Parameters
+        ----------
+        event_status : `int`
+            The value of the register.
+        """
+        if event_status & ERROR_EVENT_BITS:
+            self.error_event = True
+        self.num_covered = len(self.unchecked)
+
+    def read_status_byte(self, status_byte):
+        """Record a read of the status byte, which covers the commands sent
+        so far.
+
+        Parameters
+        ----------
+        status_byte : `int`
+            The status byte.
+        """
+        self.num_status_queries += 1
+        if status_byte & ERROR_AVAILABLE_BIT:
+            self.error_event = True
+        self.num_covered = len(self.unchecked)
+
+    @property
+    def needs_status(self):
+        """Whether commands were sent since the status registers were last
+        read (`bool`)."""
+        return self.num_covered < len(self.unchecked)
+
+    @property
+    def has_error(self):
+        """Whether the status registers reported an error since the last
+        check (`bool`)."""
+        return self.error_event
+
+    def add_error(self, operation, error_code, message):
+        """Record an error drained from the error queue.
+
+        Parameters
+        ----------
+        operation : `str` | None
+            The operation being checked.
+        error_code : `int`
+            The error code.
+        message : `str`
+            The error message.
+        """
+        self.counts[operation] = self.counts.get(operation, 0) + 1
+        self.recent.append(
+            types.SimpleNamespace(
+                operation=operation,
+                error_code=error_code,
+                message=message,
+                commands=list(self.unchecked),
+            )
+        )
+
+    def checked(self):
+        """Record that the electrometer was checked for errors."""
+        self.num_checks += 1
+        self.unchecked.clear()
+        self.num_covered = 0
+        self.error_event = False
+
+    @property
+    def num_errors(self):
+        """The total number of errors (`int`)."""
+        return sum(self.counts.values())
@@ -0,0 +1,230 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["make_bintable_header", "encode_fits", "write_fits", "BufferReader"]
+
+import gzip
+import io
+
+import numpy as np
+
+BLOCK_SIZE = 2880
+"""The size of a FITS block; headers and data are padded to it."""
+FITS_DTYPE = ">f8"
+"""The type of the columns, big-endian doubles."""
+FITS_FORMAT = "D"
+"""The FITS format of the columns."""
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz"}
+"""The suffix added to the name of a file for each compression."""
+
+
+def make_bintable_header(names, num_rows, meta=None):
+    """Make the header of a binary table of double columns.
+
+    Parameters
+    ----------
+    names : `list` of `str`
+        The name of each column.
+    num_rows : `int`
+        The number of rows.
+    meta : `dict`, optional
+        Cards added to the header, like the table metadata of
+        `astropy.io.fits.table_to_hdu`.
+
+    Returns
+    -------
+    header : `astropy.io.fits.Header`
+        The header.
+    """
+    # Imported here, as astropy.io.fits takes long to import and is only
+    # needed to write files.
+    import astropy.io.fits as fits
+
+    header = fits.Header()
+    header["XTENSION"] = ("BINTABLE", "binary table extension")
+    header["BITPIX"] = (8, "array data type")
+    header["NAXIS"] = (2, "number of array dimensions")
+    header["NAXIS1"] = (
+        np.dtype(FITS_DTYPE).itemsize * len(names),
+        "length of dimension 1",
+    )
+    header["NAXIS2"] = (num_rows, "length of dimension 2")
+    header["PCOUNT"] = (0, "number of group parameters")
+    header["GCOUNT"] = (1, "number of groups")
+    header["TFIELDS"] = (len(names), "number of table fields")
+    for i, name in enumerate(names, start=1):
+        header[f"TTYPE{i}"] = name
+        header[f"TFORM{i}"] = FITS_FORMAT
+    for key, value in (meta or {}).items():
+        header[key] = value
+    return header
+
+
+def encode_fits(primary_header, columns, names, meta=None, buffer=None):
+    """Encode a FITS file with a binary table of the columns.
+
+    The columns are copied straight into the file, so that making it takes
+    about one copy of the data, instead of the several made by
+    `astropy.table.QTable` and `astropy.io.fits.HDUList.writeto`.
+
+    Parameters
+    ----------
+    primary_header : `astropy.io.fits.Header`
+        The header of the primary HDU, which has no data.
+    columns : `numpy.ndarray` or `list` of `numpy.ndarray`
+        The values of each column; ``columns[i]`` is column ``i``.
+    names : `list` of `str`
+        The name of each column.
+    meta : `dict`, optional
+        Cards added to the header of the table.
+    buffer : `bytearray`, optional
+        The buffer the file is encoded into, grown if it is too small, so
+        that it can be reused for the next file. It must not have other
+        views exported. A new one is made if None.
+
+    Returns
+    -------
+    file : `memoryview`
+        The file, a view of the start of ``buffer``; release it before
+        reusing the buffer.
+
+    Raises
+    ------
+    ValueError
+        If the number of names and columns differ, or the columns have
+        different lengths.
+    """
+    if len(names) != len(columns):
+        raise ValueError(f"Got {len(names)} names for {len(columns)} columns.")
+    num_rows = len(columns[0]) if len(columns) > 0 else 0
+    for name, column in zip(names, columns):
+        if len(column) != num_rows:
+            raise ValueError(
+                f"Column {name} has {len(column)} rows, expected {num_rows}."
+            )
+    dtype = np.dtype([(name, FITS_DTYPE) for name in names])
+    headers = (
+        primary_header.tostring()
+        + make_bintable_header(names, num_rows, meta).tostring()
+    ).encode("ascii")
+    data_end = len(headers) + dtype.itemsize * num_rows
+    size = len(headers) + -(-(data_end - len(headers)) // BLOCK_SIZE) * BLOCK_SIZE
+
+    if buffer is None:
+        buffer = bytearray(size)
+    elif len(buffer) < size:
+        buffer.extend(bytes(size - len(buffer)))
+    file = memoryview(buffer)[:size]
+    file[: len(headers)] = headers
+    data = np.frombuffer(file, dtype=dtype, count=num_rows, offset=len(headers))
+    for name, column in zip(names, columns):
+        data[name] = column
+    del data
+    # The padding is zeros; a reused buffer still holds the previous file.
+    file[data_end:] = bytes(size - data_end)
+    return file
+
+
+def write_fits(path, file, compression="none", level=1):
+    """Write an encoded FITS file to disk, compressing it on the way.
+
+    Parameters
+    ----------
+    path : `pathlib.Path`
+        The path of the file.
+    file : `bytes`-like
+        The encoded file.
+    compression : `str`, optional
+        The compression, one of `COMPRESSION_SUFFIXES`; "gzip" wraps the
+        whole file in gzip, which FITS readers open transparently.
+    level : `int`, optional
+        The compression level, from 1 (fastest) to 9 (smallest).
+
+    Raises
+    ------
+    ValueError
+        If the compression is not known.
+    """
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown {compression=}.")
+    if compression == "none":
+        path.write_bytes(file)
+        return
+    # Stream the compressed file to disk, so that it is not held in memory
+    # next to the encoded one.
+    with gzip.GzipFile(path, "wb", compresslevel=level, mtime=0) as gzip_file:
+        gzip_file.write(file)
+
+
+class BufferReader(io.RawIOBase):
+    """Read-only binary file of a bytes-like object, e.g. a file made by
+    `encode_fits`, which unlike `io.BytesIO` does not copy it.
+
+    Close it before releasing or resizing the object.
+
+    Parameters
+    ----------
+    data : `bytes`-like
+        The contents of the file.
+    """
+
+    def __init__(self, data):
+        super().__init__()
+        self.data = memoryview(data).cast("B")
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        size = max(0, min(len(buffer), len(self.data) - self.position))
+        buffer[:size] = self.data[self.position : self.position + size]
+        self.position += size
+        return size
+
+    def readall(self):
+        return self.read(max(0, len(self.data) - self.position))
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if self.closed:
+            raise ValueError("I/O operation on closed file.")
+        start = {
+            io.SEEK_SET: 0,
+            io.SEEK_CUR: self.position,
+            io.SEEK_END: len(self.data),
+        }[whence]
+        if start + offset < 0:
+            raise ValueError(f"Negative seek position {start + offset}.")
+        self.position = start + offset
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def close(self):
+        if not self.closed:
+            self.data.release()
+        super().close()
@@ -0,0 +1,131 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["InstrumentState"]
+
+
+class InstrumentState:
+    """Shadow copy of the settings last applied to the electrometer.
+
+    A setting is only known after it was set without an error; it is
+    forgotten when the electrometer is reset, reconnected or reports an
+    error, as its state is then uncertain.
+
+    Attributes
+    ----------
+    skipped : `dict` [`str`, `int`]
+        The number of commands and queries skipped because the setting was
+        already known, by the name of the setting.
+    """
+
+    def __init__(self):
+        self._settings = {}
+        self.skipped = {}
+
+    def __contains__(self, name):
+        return name in self._settings
+
+    def __len__(self):
+        return len(self._settings)
+
+    def get(self, name, default=None):
+        """Return the value of a setting.
+
+        Parameters
+        ----------
+        name : `str`
+            The name of the setting.
+        default : `object`, optional
+            The value returned if the setting is unknown.
+
+        Returns
+        -------
+        value : `object`
+            The value.
+        """
+        return self._settings.get(name, default)
+
+    def lookup(self, name):
+        """Return the value of a setting, and count the query skipped if it
+        is known.
+
+        Parameters
+        ----------
+        name : `str`
+            The name of the setting.
+
+        Returns
+        -------
+        value : `object` | None
+            The value, or None if it is unknown.
+        """
+        if name not in self._settings:
+            return None
+        self._count_skipped(name)
+        return self._settings[name]
+
+    def matches(self, name, value):
+        """Check whether a setting is known to have a value, and count the
+        command skipped if it does.
+
+        Parameters
+        ----------
+        name : `str`
+            The name of the setting.
+        value : `object`
+            The value it should have.
+
+        Returns
+        -------
+        matches : `bool`
+            True if the command that sets it can be skipped.
+        """
+        if name not in self._settings or self._settings[name] != value:
+            return False
+        self._count_skipped(name)
+        return True
+
+    def update(self, **settings):
+        """Record settings applied to the electrometer.
+
+        Parameters
+        ----------
+        **settings : `dict`
+            The values, by the name of the setting; a value of None
+            forgets the setting.
+        """
+        for name, value in settings.items():
+            if value is None:
+                self._settings.pop(name, None)
+            else:
+                self._settings[name] = value
+
+    def _count_skipped(self, name):
+        self.skipped[name] = self.skipped.get(name, 0) + 1
+
+    def invalidate(self):
+        """Forget all settings."""
+        self._settings.clear()
+
+    @property
+    def num_skipped(self):
+        """The total number of skipped commands (`int`)."""
+        return sum(self.skipped.values())
@@ -0,0 +1,76 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["IntensityWindow"]
+
+import numpy as np
+
+
+class IntensityWindow:
+    """Aggregate of the intensity readings taken between two intensity
+    events.
+
+    Attributes
+    ----------
+    count : `int`
+        The number of readings.
+    min : `float`
+        The smallest reading.
+    max : `float`
+        The largest reading.
+    total : `float`
+        The sum of the readings.
+    last : `float`
+        The latest reading.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def add(self, values):
+        """Add readings.
+
+        Parameters
+        ----------
+        values : `float` or `numpy.ndarray`
+            The readings, oldest first.
+        """
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        if values.size == 0:
+            return
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.total += float(values.sum())
+        self.last = float(values[-1])
+
+    @property
+    def mean(self):
+        """The mean of the readings (`float`), NaN if there are none."""
+        return self.total / self.count if self.count > 0 else float("nan")
+
+    def clear(self):
+        """Remove all readings."""
+        self.count = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.total = 0.0
+        self.last = float("nan")
@@ -0,0 +1,374 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["MockFarm", "run_mock_farm"]
+
+import argparse
+import asyncio
+import copy
+import logging
+import pathlib
+import time
+import types
+
+import yaml
+from lsst.ts import tcpip
+from lsst.ts.electrometer.mock_network import NETWORK_PROFILES
+from lsst.ts.electrometer.mock_server import MockServer
+from lsst.ts.electrometer.mock_signal import SignalGenerator
+
+LAG_INTERVAL = 0.05
+"""How often the lag of the event loop is measured (s)."""
+STATS_INTERVAL = 10
+"""The default time between the statistics logged by `run_mock_farm` (s)."""
+
+
+def run_mock_farm() -> None:
+    asyncio.run(MockFarm.amain())
+
+
+class MockFarm:
+    """Mock electrometers for several CSC indices, served from one process.
+
+    Parameters
+    ----------
+    instances : `list` [`dict`]
+        The electrometers, as in ``instances`` of the CSC configuration.
+        Only ``sal_index``, ``electrometer_type`` and ``tcpip.port`` are
+        used.
+    host : `str`, optional
+        The IP address the mock electrometers listen on.
+    base_port : `int` | None, optional
+        The port of the first instance, the next ones listening on the
+        following ports; 0 to pick free ports; None to use the port of
+        each instance.
+    profile : `NetworkProfile` | None, optional
+        How the replies are sent by all the mock electrometers; None to
+        send them at once.
+    signal : `bool`, optional
+        Whether the buffers fill with a synthetic signal, seeded with the
+        SAL index, instead of holding fixed readings.
+    debug : `bool`, optional
+        Whether the mock electrometers log each command.
+    log : `logging.Logger` | None, optional
+        The log; None to make one.
+
+    Raises
+    ------
+    ValueError
+        If an instance is missing a setting, or two instances have the
+        same SAL index or port.
+
+    Attributes
+    ----------
+    instances : `dict` [`int`, `dict`]
+        The instances, by SAL index.
+    ports : `dict` [`int`, `int`]
+        The port of each instance, by SAL index; 0 until started if free
+        ports are picked.
+    servers : `dict` [`int`, `MockServer`]
+        The mock electrometers, by SAL index, once started.
+    """
+
+    def __init__(
+        self,
+        instances,
+        host=tcpip.LOCAL_HOST,
+        base_port=None,
+        profile=None,
+        signal=False,
+        debug=False,
+        log=None,
+    ):
+        self.log = log or logging.getLogger(type(self).__name__)
+        self.host = host
+        self.profile = profile
+        self.signal = signal
+        self.debug = debug
+        self.instances = {}
+        self.ports = {}
+        self.servers = {}
+        self.lag_task = None
+        for i, instance in enumerate(instances):
+            missing = {"sal_index", "electrometer_type", "tcpip"} - set(instance)
+            if missing:
+                raise ValueError(f"Instance {i} has no {sorted(missing)} settings.")
+            sal_index = instance["sal_index"]
+            port = instance["tcpip"]["port"]
+            if sal_index in self.instances:
+                raise ValueError(f"Instance {i} has duplicate {sal_index=}.")
+            if base_port is not None:
+                port = base_port + i if base_port else 0
+            if port and port in self.ports.values():
+                raise ValueError(
+                    f"Instance {sal_index} has the same {port=} as another; "
+                    "use base_port to pick different ports."
+                )
+            self.instances[sal_index] = instance
+            self.ports[sal_index] = port
+        self.reset_stats()
+
+    @classmethod
+    def from_config(cls, path, indices=None, **kwargs):
+        """Make mock electrometers for the instances of a CSC
+        configuration file.
+
+        Parameters
+        ----------
+        path : `str` | `pathlib.Path`
+            The configuration file.
+        indices : `list` [`int`] | None, optional
+            The SAL indices to simulate; None for all instances.
+        **kwargs : `dict`
+            The other parameters of `MockFarm`.
+
+        Returns
+        -------
+        farm : `MockFarm`
+            The mock electrometers, not started.
+
+        Raises
+        ------
+        ValueError
+            If the file has no instances, or not the ones asked for.
+        """
+        with open(path) as f:
+            instances = yaml.safe_load(f).get("instances")
+        if not instances:
+            raise ValueError(f"{path} has no instances.")
+        if indices is not None:
+            instances = [
+                instance
+                for instance in instances
+                if instance.get("sal_index") in indices
+            ]
+            missing = set(indices) - {instance["sal_index"] for instance in instances}
+            if missing:
+                raise ValueError(f"{path} has no instances {sorted(missing)}.")
+        return cls(instances, **kwargs)
+
+    async def start(self):
+        """Start the mock electrometers, and measure the lag of the event
+        loop.
+        """
+        try:
+            for sal_index, instance in self.instances.items():
+                generator = None
+                if self.signal:
+                    generator = SignalGenerator(seed=sal_index)
+                self.servers[sal_index] = MockServer(
+                    instance["electrometer_type"],
+                    debug=self.debug,
+                    generator=generator,
+                    profile=self.profile,
+                    host=self.host,
+                    port=self.ports[sal_index],
+                    name=f"Electrometer Mock Server {sal_index}",
+                )
+            await asyncio.gather(
+                *[server.start_task for server in self.servers.values()]
+            )
+        except Exception:
+            await self.close()
+            raise
+        for sal_index, server in self.servers.items():
+            self.ports[sal_index] = server.port
+        self.reset_stats()
+        self.lag_task = asyncio.create_task(self.measure_lag())
+
+    async def close(self):
+        """Stop the mock electrometers."""
+        if self.lag_task is not None:
+            self.lag_task.cancel()
+            self.lag_task = None
+        servers = list(self.servers.values())
+        self.servers.clear()
+        await asyncio.gather(
+            *[server.close() for server in servers], return_exceptions=True
+        )
+
+    async def measure_lag(self):
+        """Measure how late the event loop wakes up a task, which grows as
+        it saturates.
+        """
+        while True:
+            t0 = time.monotonic()
+            await asyncio.sleep(LAG_INTERVAL)
+            lag = max(time.monotonic() - t0 - LAG_INTERVAL, 0)
+            self.lag.total += lag
+            self.lag.max = max(self.lag.max, lag)
+            self.lag.num_samples += 1
+
+    def reset_stats(self):
+        """Start measuring the statistics returned by `get_stats` anew."""
+        self.stats_start = time.monotonic()
+        self.cpu_start = time.process_time()
+        self.replies_start = self.get_num_replies()
+        self.lag = types.SimpleNamespace(total=0.0, max=0.0, num_samples=0)
+
+    def get_num_replies(self):
+        return sum(server.network_stats.replies for server in self.servers.values())
+
+    def get_stats(self):
+        """Return the load on the process since the statistics were reset.
+
+        Returns
+        -------
+        stats : `types.SimpleNamespace`
+            The statistics:
+
+            - ``duration``: the time they were measured over (s).
+            - ``cpu_load``: the CPU time used, as a fraction of
+              ``duration``; near 1 when the event loop is saturated.
+            - ``reply_rate``: the replies sent per second, by all the mock
+              electrometers.
+            - ``mean_lag``, ``max_lag``: how late the event loop woke up
+              a task (s).
+            - ``num_connected``: the number of mock electrometers with a
+              client connected.
+        """
+        duration = time.monotonic() - self.stats_start
+        num_samples = self.lag.num_samples
+        return types.SimpleNamespace(
+            duration=duration,
+            cpu_load=(time.process_time() - self.cpu_start) / duration,
+            reply_rate=(self.get_num_replies() - self.replies_start) / duration,
+            mean_lag=self.lag.total / num_samples if num_samples else 0.0,
+            max_lag=self.lag.max,
+            num_connected=sum(server.connected for server in self.servers.values()),
+        )
+
+    def get_instances(self):
+        """Return the instances, with the host and port of their mock
+        electrometer.
+
+        Returns
+        -------
+        instances : `list` [`dict`]
+            The instances, to use in the configuration of the CSCs.
+        """
+        instances = []
+        for sal_index, instance in self.instances.items():
+            instance = copy.deepcopy(instance)
+            instance["tcpip"]["hostname"] = self.host
+            instance["tcpip"]["port"] = self.ports[sal_index]
+            instances.append(instance)
+        return instances
+
+    def write_instances(self, path):
+        """Write the instances, with the host and port of their mock
+        electrometer, to a configuration file.
+
+        Parameters
+        ----------
+        path : `str` | `pathlib.Path`
+            Path of the configuration file.
+        """
+        with open(path, "w") as f:
+            yaml.safe_dump({"instances": self.get_instances()}, f, sort_keys=False)
+
+    @classmethod
+    async def amain(cls, args=None):
+        """Run mock electrometers until interrupted, logging statistics.
+
+        Parameters
+        ----------
+        args : `list` [`str`] | None, optional
+            The command line arguments; None for `sys.argv`.
+        """
+        parser = argparse.ArgumentParser(
+            description="Run mock electrometers for the instances of a CSC "
+            "configuration file, to test many CSCs on one host."
+        )
+        parser.add_argument("config", type=pathlib.Path, help="CSC configuration file.")
+        parser.add_argument(
+            "--index",
+            type=int,
+            nargs="+",
+            help="SAL indices to simulate; all instances by default.",
+        )
+        parser.add_argument(
+            "--host", default=tcpip.LOCAL_HOST, help="IP address to listen on."
+        )
+        parser.add_argument(
+            "--base-port",
+            type=int,
+            help="Port of the first instance, the next ones using the "
+            "following ports; 0 for free ports. By default, the port of each "
+            "instance.",
+        )
+        parser.add_argument(
+            "--profile",
+            choices=sorted(NETWORK_PROFILES),
+            help="Network profile of the replies.",
+        )
+        parser.add_argument(
+            "--signal",
+            action="store_true",
+            help="Fill the buffers with a synthetic signal.",
+        )
+        parser.add_argument(
+            "--output",
+            type=pathlib.Path,
+            help="Write the instances, with the ports of the mock "
+            "electrometers, to this configuration file.",
+        )
+        parser.add_argument(
+            "--stats-interval",
+            type=float,
+            default=STATS_INTERVAL,
+            help="Time between the statistics logged (s).",
+        )
+        parser.add_argument("--debug", action="store_true", help="Log each command.")
+        namespace = parser.parse_args(args)
+        logging.basicConfig(level=logging.DEBUG if namespace.debug else logging.INFO)
+
+        farm = cls.from_config(
+            namespace.config,
+            indices=namespace.index,
+            host=namespace.host,
+            base_port=namespace.base_port,
+            profile=NETWORK_PROFILES.get(namespace.profile),
+            signal=namespace.signal,
+            debug=namespace.debug,
+        )
+        await farm.start()
+        try:
+            for sal_index, server in farm.servers.items():
+                farm.log.info(
+                    f"Electrometer {sal_index}: {server.brand} on "
+                    f"{farm.host}:{server.port}"
+                )
+            if namespace.output is not None:
+                await asyncio.to_thread(farm.write_instances, namespace.output)
+            while True:
+                await asyncio.sleep(namespace.stats_interval)
+                stats = farm.get_stats()
+                farm.log.info(
+                    f"{stats.num_connected}/{len(farm.servers)} connected; "
+                    f"{stats.reply_rate:.0f} replies/s; "
+                    f"CPU {stats.cpu_load:.0%}; event loop lag "
+                    f"{stats.mean_lag * 1e3:.1f} ms mean, "
+                    f"{stats.max_lag * 1e3:.1f} ms max"
+                )
+                farm.reset_stats()
+        finally:
+            await farm.close()
@@ -0,0 +1,151 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+__all__ = ["NetworkProfile", "NETWORK_PROFILES"]
+
+import random
+import types
+
+BANDWIDTH_TICK = 0.01
+"""How often bytes are written when the bandwidth is limited (s)."""
+MAX_PARTIAL_WRITES = 4
+"""The most pieces a reply is split into by a partial write."""
+
+
+class NetworkProfile:
+    """How a degraded link between the CSC and the electrometer behaves,
+    for `MockServer`.
+
+    Parameters
+    ----------
+    latency : `float`, optional
+        The delay before each reply (s).
+    jitter : `float`, optional
+        The largest random delay added to ``latency`` (s).
+    bandwidth : `float` | None, optional
+        The largest number of bytes sent per second; no limit if None.
+    drop_probability : `float`, optional
+        The probability that the connection is closed partway through a
+        reply.
+    partial_write_probability : `float`, optional
+        The probability that a reply is sent in several pieces, with
+        ``partial_write_delay`` between them.
+    partial_write_delay : `float`, optional
+        The time between the pieces of a partial write (s).
+    stall_probability : `float`, optional
+        The probability that a reply is held back for ``stall_duration``.
+    stall_duration : `float`, optional
+        How long a stalled reply is held back (s).
+    seed : `int` | None, optional
+        The seed of the random choices.
+    """
+
+    def __init__(
+        self,
+        latency=0.0,
+        jitter=0.0,
+        bandwidth=None,
+        drop_probability=0.0,
+        partial_write_probability=0.0,
+        partial_write_delay=0.01,
+        stall_probability=0.0,
+        stall_duration=60.0,
+        seed=None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.drop_probability = drop_probability
+        self.partial_write_probability = partial_write_probability
+        self.partial_write_delay = partial_write_delay
+        self.stall_probability = stall_probability
+        self.stall_duration = stall_duration
+        self.random = random.Random(seed)
+
+    def plan_reply(self, num_bytes):
+        """Choose how a reply is sent.
+
+        Parameters
+        ----------
+        num_bytes : `int`
+            The length of the reply, including the terminator.
+
+        Returns
+        -------
+        plan : `types.SimpleNamespace`
+            How the reply is sent:
+
+            - ``delay``: the time before it is sent (s).
+            - ``stalled``: whether it is stalled.
+            - ``pieces``: the length of each piece written, followed by a
+              pause of ``partial_write_delay``.
+            - ``drop_at``: the number of bytes sent before the connection is
+              closed, or None if it is not.
+        """
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        stalled = self.random.random() < self.stall_probability
+        if stalled:
+            delay += self.stall_duration
+        pieces = [num_bytes]
+        if num_bytes > 1 and self.random.random() < self.partial_write_probability:
+            num_pieces = self.random.randint(2, min(MAX_PARTIAL_WRITES, num_bytes))
+            cuts = sorted(self.random.sample(range(1, num_bytes), num_pieces - 1))
+            pieces = [end - start for start, end in zip([0] + cuts, cuts + [num_bytes])]
+        drop_at = None
+        if self.random.random() < self.drop_probability:
+            drop_at = self.random.randrange(num_bytes)
+        return types.SimpleNamespace(
+            delay=delay, stalled=stalled, pieces=pieces, drop_at=drop_at
+        )
+
+    def get_chunk_size(self):
+        """Return how many bytes to write at a time.
+
+        Returns
+        -------
+        chunk_size : `int` | None
+            The number of bytes sent per `BANDWIDTH_TICK`, or None if the
+            bandwidth is not limited.
+        """
+        if self.bandwidth is None:
+            return None
+        return max(1, int(self.bandwidth * BANDWIDTH_TICK))
+
+
+NETWORK_PROFILES = {
+    "ideal": NetworkProfile(),
+    "unstable": NetworkProfile(jitter=2),
+    # The electrometers are connected through a Moxa NPort serial to
+    # Ethernet converter at 57.6 kbaud, 8N1: 5760 bytes/s.
+    "moxa": NetworkProfile(latency=0.005, jitter=0.005, bandwidth=5760),
+    "lossy": NetworkProfile(
+        latency=0.005,
+        jitter=0.02,
+        drop_probability=0.05,
+        partial_write_probability=0.3,
+    ),
+    "stalling": NetworkProfile(
+        latency=0.005, stall_probability=0.05, stall_duration=30
+    ),
+}
+"""Network profiles by name; each has its own random state, so use a new
+`NetworkProfile` with a seed for reproducible tests."""
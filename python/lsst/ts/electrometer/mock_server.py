@@ -23,16 +23,121 @@ __all__ = ["MockServer", "MockKeysight", "MockKeithley"]
 
 import asyncio
 import logging
-import random
 import re
+import types
 
+import numpy as np
 from lsst.ts import tcpip
-from lsst.ts.electrometer.enums import UnitMode
+from lsst.ts.electrometer.buffer_parser import BINARY_DTYPES
+from lsst.ts.electrometer.enums import DataFormat, UnitMode
+from lsst.ts.electrometer.mock_network import NETWORK_PROFILES
+from lsst.ts.electrometer.mock_signal import MockBuffer
+
+
+def get_header(msg):
+    """Return the header of a SCPI command: the command path, with the
+    query marker, without the parameters.
+
+    Parameters
+    ----------
+    msg : `str`
+        The command, ending with ";".
+
+    Returns
+    -------
+    header : `str`
+        The header.
+    """
+    return msg.split(" ", 1)[0].rstrip(";")
+
+
+class CommandIndex:
+    """Index of the commands of a mock device by their header.
+
+    Looking a command up only tries the patterns that can match its header,
+    in the order of ``commands``, instead of all of them. The patterns for
+    a header are found the first time it is seen.
+
+    Parameters
+    ----------
+    commands : `dict` [`re.Pattern`, `callable`]
+        The pattern of each command, which matches the whole command
+        including the final ";", and the function that handles it. The
+        header of a pattern is the part before the first space or the
+        final ";".
+    """
+
+    def __init__(self, commands):
+        self.commands = commands
+        self.header_patterns = []
+        for command, func in commands.items():
+            header = re.split(r" |;\$", command.pattern, maxsplit=1)[0]
+            self.header_patterns.append((re.compile(header), command, func))
+        self.candidates = {}
+
+    def get_candidates(self, header):
+        """Return the commands that can match a header.
+
+        Parameters
+        ----------
+        header : `str`
+            The header.
+
+        Returns
+        -------
+        candidates : `list` [`tuple`]
+            The pattern and function of each command.
+        """
+        candidates = self.candidates.get(header)
+        if candidates is None:
+            candidates = [
+                (command, func)
+                for header_pattern, command, func in self.header_patterns
+                if header_pattern.fullmatch(header)
+            ]
+            self.candidates[header] = candidates
+        return candidates
+
+    def lookup(self, msg, log=None):
+        """Find the command that matches a message.
+
+        Parameters
+        ----------
+        msg : `str`
+            The message, ending with ";".
+        log : `logging.Logger`, optional
+            Log each pattern tried, if specified.
+
+        Returns
+        -------
+        matched_command : `re.Match` | None
+            The match of the command, None if no command matches.
+        func : `callable` | None
+            The function that handles the command.
+        """
+        for command, func in self.get_candidates(get_header(msg)):
+            matched_command = command.match(msg)
+            if log is not None:
+                log.debug(f"{command.pattern}: {matched_command}")
+            if matched_command:
+                return matched_command, func
+        return None, None
 
 
 class MockServer(tcpip.OneClientReadLoopServer):
     """Implements a mock server for the electrometer.
 
+    Parameters
+    ----------
+    brand : `str`
+        The brand of the electrometer: "Keithley" or "Keysight".
+    host : `str`, optional
+        The IP address to listen on.
+    port : `int`, optional
+        The port to listen on; 0 to pick a free port.
+    name : `str`, optional
+        The name of the server, used in its log messages.
+
     Attributes
     ----------
     log : `logging.Logger`
@@ -41,25 +146,55 @@ class MockServer(tcpip.OneClientReadLoopServer):
         The mock device that handles commands that are parsed.
     read_loop_task : `asyncio.Future`
         The task that tracks the read loop.
+    debug : `bool`
+        Whether to log each command, its reply and the patterns tried.
+    generator : `SignalGenerator` | None
+        The signal in the buffer of the device, which then fills in real
+        time; None for a fixed buffer.
+    profile : `NetworkProfile` | None
+        How the replies to queries are delayed, throttled, split, stalled
+        or cut off; None to send them at once. ``unstable`` uses the
+        "unstable" profile, which delays them by up to 2 s.
+    network_stats : `types.SimpleNamespace`
+        The number of replies sent, and how many of them were stalled,
+        written in pieces or cut off by dropping the connection.
     """
 
-    def __init__(self, brand, unstable=False) -> None:
+    def __init__(
+        self,
+        brand,
+        unstable=False,
+        debug=False,
+        generator=None,
+        profile=None,
+        host=tcpip.LOCAL_HOST,
+        port=0,
+        name="Electrometer Mock Server",
+    ) -> None:
         log = logging.getLogger(type(self).__name__)
         self.brand = brand
         if self.brand == "Keithley":
-            self.device = MockKeithley()
+            self.device = MockKeithley(generator=generator)
             terminator = b"\r"
             encoding = tcpip.DEFAULT_ENCODING
         elif self.brand == "Keysight":
-            self.device = MockKeysight()
+            self.device = MockKeysight(generator=generator)
             terminator = tcpip.DEFAULT_TERMINATOR
             encoding = "latin_1"
         self.lock = asyncio.Lock()
         self.unstable = unstable
+        if profile is None and unstable:
+            profile = NETWORK_PROFILES["unstable"]
+        self.profile = profile
+        self.network_stats = types.SimpleNamespace(
+            replies=0, stalled=0, partial=0, dropped=0
+        )
+        self.debug = debug
+        self.device.debug = debug
         super().__init__(
-            name="Electrometer Mock Server",
-            host=tcpip.LOCAL_HOST,
-            port=0,
+            name=name,
+            host=host,
+            port=port,
             log=log,
             terminator=terminator,
             encoding=encoding,
@@ -69,24 +204,69 @@ class MockServer(tcpip.OneClientReadLoopServer):
 
     async def read_and_dispatch(self) -> None:
         commands = await self.read_str()
-        self.log.info(f"{commands=}")
+        if self.debug:
+            self.log.debug(f"{commands=}")
         if self.brand == "Keysight":
-            self.log.info(f"Writing echo: {commands.strip()}")
             await self.write_str(commands.strip())
         commands = commands.split(";")[:-1]
-        self.log.info(commands)
+        # The replies to all queries of a line are sent together,
+        # separated by ";", except binary blocks.
+        replies = []
         for command in commands:
             async with self.lock:
-                self.log.info(f"{command=}")
                 reply = self.device.parse_message(command.strip())
-                self.log.info(reply)
                 if reply is not None:
-                    if self.unstable:
-                        write = random.uniform(0, 2)
-                    else:
-                        write = 0
-                    await asyncio.sleep(write)
-                    await self.write_str(reply)
+                    replies.append(reply)
+        if not replies:
+            return
+        text_replies = [reply for reply in replies if not isinstance(reply, bytes)]
+        data = []
+        if text_replies:
+            data.append(";".join(text_replies).encode(self.encoding) + self.terminator)
+        for reply in replies:
+            if isinstance(reply, bytes):
+                data.append(reply + self.terminator)
+        await self.write_reply(b"".join(data))
+
+    async def write_reply(self, data):
+        """Write the replies to the queries of a line, the way `profile`
+        sends them.
+
+        Parameters
+        ----------
+        data : `bytes`
+            The replies, with their terminators.
+        """
+        self.network_stats.replies += 1
+        if self.profile is None:
+            await self.write(data)
+            return
+        plan = self.profile.plan_reply(len(data))
+        self.network_stats.stalled += plan.stalled
+        self.network_stats.partial += len(plan.pieces) > 1
+        await asyncio.sleep(plan.delay)
+        end = len(data) if plan.drop_at is None else plan.drop_at
+        chunk_size = self.profile.get_chunk_size()
+        start = 0
+        piece_end = 0
+        for piece in plan.pieces:
+            if start > 0:
+                await asyncio.sleep(self.profile.partial_write_delay)
+            piece_end = min(piece_end + piece, end)
+            while start < piece_end:
+                chunk_end = piece_end
+                if chunk_size is not None:
+                    chunk_end = min(start + chunk_size, piece_end)
+                await self.write(data[start:chunk_end])
+                if chunk_size is not None:
+                    await asyncio.sleep((chunk_end - start) / self.profile.bandwidth)
+                start = chunk_end
+            if start >= end:
+                break
+        if plan.drop_at is not None:
+            self.network_stats.dropped += 1
+            self.log.info(f"Dropping the connection after {end} of {len(data)} bytes.")
+            await self.close_client()
 
     async def connect_callback(self, server):
         """Start the command loop when client is connected.
@@ -100,23 +280,98 @@ class MockServer(tcpip.OneClientReadLoopServer):
             await server.write_str("something")
 
 
+def make_binary_block(values, data_format, byte_order="NORM", definite=True):
+    """Return values as an IEEE-488.2 binary block.
+
+    Parameters
+    ----------
+    values : `numpy.ndarray`
+        The values to send.
+    data_format : `DataFormat`
+        The binary format of the values.
+    byte_order : `str`, optional
+        NORM to send the most significant byte first, SWAP to send the least
+        significant byte first.
+    definite : `bool`, optional
+        Whether to send the length in the header; if False, send an
+        indefinite length block.
+
+    Returns
+    -------
+    block : `bytes`
+        The block, including the header.
+    """
+    dtype = BINARY_DTYPES[DataFormat(data_format)]
+    if byte_order == "SWAP":
+        dtype = dtype.newbyteorder()
+    data = np.asarray(values, dtype=dtype).tobytes()
+    if definite:
+        length = str(len(data))
+        header = f"#{len(length)}{length}"
+    else:
+        header = "#0"
+    return header.encode() + data
+
+
+def format_readings(readings, data_format, byte_order="NORM", definite=True):
+    """Return readings the way the electrometer sends them.
+
+    Parameters
+    ----------
+    readings : `numpy.ndarray`
+        The values of each reading.
+    data_format : `DataFormat`
+        The format of the data.
+    byte_order : `str`, optional
+        The byte order of binary data, see `make_binary_block`.
+    definite : `bool`, optional
+        Whether a binary block has a definite length,
+        see `make_binary_block`.
+
+    Returns
+    -------
+    reply : `str` or `bytes`
+        Comma separated values, or a binary block.
+    """
+    if data_format != DataFormat.ASCII:
+        return make_binary_block(readings.ravel(), data_format, byte_order, definite)
+    return ",".join(f"{value:+E}" for value in readings.flat)
+
+
 class MockKeysight:
-    def __init__(self):
+    def __init__(self, generator=None):
         """Mock a keithley electrometer.
 
+        Parameters
+        ----------
+        generator : `SignalGenerator` | None, optional
+            The signal in the buffer, which then fills in real time; None
+            for a fixed buffer.
+
         Attributes
         ----------
         log : `logging.Logger`
             The log.
         commands : `dict`
             Regular expressions that correspond to a given command.
+        command_index : `CommandIndex`
+            The commands, indexed by their header.
+        debug : `bool`
+            Whether to log each command and the patterns tried.
+        buffer : `MockBuffer` | None
+            The buffer filled with the generated signal; None for a fixed
+            buffer.
         """
         self.log = logging.getLogger(__name__)
+        self.debug = False
         self.mode = UnitMode.CURR
+        self.data_format = DataFormat.ASCII
+        self.byte_order = "NORM"
+        self.event_status = 0
         self.commands = {
             re.compile(r"^\*idn\?;$"): self.do_get_hardware_info,
             re.compile(
-                r"^:sens:(CURR|CHAR|VOlT|RES):aper \d\.\d+;$"
+                r"^:sens:(CURR|CHAR|VOlT|RES):aper (?P<parameter>\d\.\d+);$"
             ): self.do_integration_time,
             re.compile(
                 r"^:sens:(CURR|CHAR|VOLT|RES):aper\?;$"
@@ -157,7 +412,9 @@ class MockKeysight:
             ): self.do_format_trac,
             re.compile(r"^:trac:points 50000;$"): self.do_set_buffer_size,
             re.compile(r"^:trig:count 50000;$"): self.do_set_buffer_size,
-            re.compile(r"^:trig:sour IMM;$"): self.do_select_device_timer,
+            re.compile(
+                r"^:trig:sour (?P<parameter>IMM|TIM);$"
+            ): self.do_select_device_timer,
             re.compile(
                 r"^:trig:tim (?P<parameter>\d\.\d\d\d);$"
             ): self.do_select_device_timer,
@@ -166,6 +423,11 @@ class MockKeysight:
             re.compile(r"^:init:acq;$"): self.do_init_buffer,
             re.compile(r"^:trac:feed:cont NEV;$"): self.do_stop_storing_buffer,
             re.compile(r"^:sens:data\?;$"): self.do_read_buffer,
+            re.compile(
+                r"^:sens:data\? (?P<parameter>\d+,\d+);$"
+            ): self.do_read_buffer_range,
+            re.compile(r"^:sens:data:poin\?;$"): self.do_get_buffer_quantity,
+            re.compile(r"^:trac:poin:act\?;$"): self.do_get_buffer_quantity,
             # re.compile(r"^:sens:data\?;$"): self.do_read_sensor,
             re.compile(r"^TST:TYPE RTC;$"): self.do_rtc_time,
             re.compile(r"^:sens:curr:nplc (?P<parameter>.*);$"): self.do_change_nplc,
@@ -186,6 +448,9 @@ class MockKeysight:
             re.compile(r"^:sour:volt:lev:imm:ampl\?;$"): self.get_voltage_level,
             re.compile(r"^:sens:CURR:dig 7;$"): self.set_resolution,
             re.compile(r"\*RST;$"): self.do_reset_device,
+            re.compile(r"^\*OPC;$"): self.do_operation_complete,
+            re.compile(r"^\*ESR\?;$"): self.do_get_event_status,
+            re.compile(r"^\*STB\?;$"): self.do_get_status_byte,
             re.compile(r"^:SENS:TOUT:SIGN 3;$"): self.do_output_trigger_line,
             re.compile(r"^:TRIG:ACQ:TOUT ON;$"): self.do_output_trigger_line,
             re.compile(r"^ABOR:ACQ;$"): self.do_stop_storing_buffer,
@@ -203,7 +468,19 @@ class MockKeysight:
             ): self.do_nothing,
             re.compile(r"^:(inp|INP) .*;$"): self.do_nothing,
             re.compile(r"^:(FORM|form):(ELEM|elem):sens .*;$"): self.do_nothing,
+            re.compile(
+                r"^:form:data (?P<parameter>ASC|REAL,32|REAL,64);$"
+            ): self.do_set_data_format,
+            re.compile(
+                r"^:form:bord (?P<parameter>NORM|SWAP);$"
+            ): self.do_set_byte_order,
         }
+        self.command_index = CommandIndex(self.commands)
+        self.buffer = None
+        if generator is not None:
+            self.buffer = MockBuffer(
+                generator, elements=self.do_get_trace_format().split(",")
+            )
 
     def parse_message(self, msg):
         """Parse and return the result of the message.
@@ -225,23 +502,18 @@ class MockKeysight:
         """
         try:
             msg = msg + ";"
-            self.log.info(repr(msg))
-            for command, func in self.commands.items():
-                self.log.info(command)
-                matched_command = command.match(msg)
-                self.log.info(matched_command)
-                if matched_command:
-                    try:
-                        reply = func(matched_command.group("parameter"))
-                        self.log.info(reply)
-                        if reply != "":
-                            return reply
-                        return None
-                    except IndexError:
-                        reply = func()
-                        self.log.info(reply)
-                        return reply if reply != "" else None
-            raise NotImplementedError(msg)
+            matched_command, func = self.command_index.lookup(
+                msg, self.log if self.debug else None
+            )
+            if matched_command is None:
+                raise NotImplementedError(msg)
+            try:
+                reply = func(matched_command.group("parameter"))
+            except IndexError:
+                reply = func()
+            if self.debug:
+                self.log.debug(f"{msg!r}: {reply!r}")
+            return reply if reply != "" else None
         except Exception:
             self.log.exception("Parsing message failed.")
 
@@ -249,6 +521,8 @@ class MockKeysight:
         return "TST, ETEM, VSO, CURR"
 
     def get_intensity(self):
+        if self.buffer is not None:
+            return f"{self.buffer.get_latest():+E}"
         return "0.001"
 
     def do_nothing(self):
@@ -289,6 +563,8 @@ class MockKeysight:
 
     def do_clear_buffer(self):
         """Clear the buffer."""
+        if self.buffer is not None:
+            self.buffer.clear()
         return ""
 
     def do_format_trac(self, *args):
@@ -300,7 +576,12 @@ class MockKeysight:
         return ""
 
     def do_select_device_timer(self, *args):
-        """Select the device timer."""
+        """Select the trigger source or set the period of the timer."""
+        if self.buffer is not None and args:
+            if args[0] in ("IMM", "TIM"):
+                self.buffer.trigger_source = args[0]
+            else:
+                self.buffer.timer = float(args[0])
         return ""
 
     def do_next_read(self):
@@ -309,20 +590,66 @@ class MockKeysight:
 
     def do_init_buffer(self):
         """Initialize the buffer."""
+        if self.buffer is not None:
+            self.buffer.start()
         return ""
 
     def do_stop_storing_buffer(self):
         """Stop storing to the buffer."""
+        if self.buffer is not None:
+            self.buffer.stop()
         return ""
 
     def do_read_buffer(self):
         """Read the values in the buffer."""
+        if self.buffer is not None:
+            return format_readings(
+                self.buffer.get_readings(), self.data_format, self.byte_order
+            )
+        if self.data_format != DataFormat.ASCII:
+            return make_binary_block(
+                self.buffer_values(), self.data_format, self.byte_order
+            )
         return (
             "-1.200000E-11,+1.102000E-02,-1.000000E-11,+2.111700E-02, \
             -1.400000E-11,+3.125200E-02,-1.300000E-11,+4.136600E-02\n"
             * 1000
         )
 
+    def buffer_values(self):
+        """Return the values in the buffer, in the order they are sent."""
+        if self.buffer is not None:
+            return self.buffer.get_readings().ravel()
+        values = [-1.2e-11, 1.102e-2, -1.0e-11, 2.1117e-2]
+        values += [-1.4e-11, 3.1252e-2, -1.3e-11, 4.1366e-2]
+        return np.tile(values, 1000)
+
+    def buffer_readings(self):
+        """Return the readings in the buffer, one per row."""
+        if self.buffer is not None:
+            return self.buffer.get_readings()
+        return self.buffer_values().reshape(-1, 4)
+
+    def do_read_buffer_range(self, parameter):
+        """Read some of the readings in the buffer."""
+        start, count = (int(item) for item in parameter.split(","))
+        readings = self.buffer_readings()[start : start + count]
+        return format_readings(readings, self.data_format, self.byte_order)
+
+    def do_get_buffer_quantity(self):
+        """Get the number of readings in the buffer."""
+        return str(len(self.buffer_readings()))
+
+    def do_set_data_format(self, data_format):
+        """Set the format of the data sent."""
+        self.data_format = DataFormat(data_format)
+        return ""
+
+    def do_set_byte_order(self, byte_order):
+        """Set the byte order of binary data."""
+        self.byte_order = byte_order
+        return ""
+
     def do_read_sensor(self):
         """Read the sensor."""
         return "0"
@@ -339,8 +666,10 @@ class MockKeysight:
         """Get the state of the filter in median mode."""
         return "1"
 
-    def do_integration_time(self):
+    def do_integration_time(self, aperture=None):
         """Set the integration time setting."""
+        if self.buffer is not None and aperture is not None:
+            self.buffer.aperture = float(aperture)
         return ""
 
     def do_get_integration_time(self):
@@ -363,7 +692,9 @@ class MockKeysight:
         nplc : `int`
             The number of cycles.
         ."""
-        pass
+        if self.buffer is not None and nplc not in ("ON", "OFF"):
+            self.buffer.nplc = float(nplc)
+            self.buffer.aperture = None
 
     def do_get_nplc(self):
         return "5"
@@ -408,6 +739,20 @@ class MockKeysight:
     def do_reset_device(self):
         pass
 
+    def do_operation_complete(self):
+        """Set the operation complete bit when all commands are done."""
+        self.event_status |= 1
+        return ""
+
+    def do_get_event_status(self):
+        """Get and clear the standard event status register."""
+        event_status, self.event_status = self.event_status, 0
+        return str(event_status)
+
+    def do_get_status_byte(self):
+        """Get the status byte; the error queue is always empty."""
+        return "0"
+
     def do_output_trigger_line(self):
         pass
 
@@ -420,22 +765,39 @@ class MockKeysight:
 
 
 class MockKeithley:
-    def __init__(self):
+    def __init__(self, generator=None):
         """Mock a keithley electrometer.
 
+        Parameters
+        ----------
+        generator : `SignalGenerator` | None, optional
+            The signal in the buffer, which then fills in real time; None
+            for a fixed buffer.
+
         Attributes
         ----------
         log : `logging.Logger`
             The log.
         commands : `dict`
             Regular expressions that correspond to a given command.
+        command_index : `CommandIndex`
+            The commands, indexed by their header.
+        debug : `bool`
+            Whether to log each command and the patterns tried.
+        buffer : `MockBuffer` | None
+            The buffer filled with the generated signal; None for a fixed
+            buffer.
         """
         self.log = logging.getLogger(__name__)
+        self.debug = False
         self.mode = UnitMode.CURR
+        self.data_format = DataFormat.ASCII
+        self.byte_order = "NORM"
+        self.event_status = 0
         self.commands = {
             re.compile(r"^\*idn\?;$"): self.do_get_hardware_info,
             re.compile(
-                r"^:sens:(CURR|CHAR|VOlT|RES):aper \d\.\d+;$"
+                r"^:sens:(CURR|CHAR|VOlT|RES):aper (?P<parameter>\d\.\d+);$"
             ): self.do_integration_time,
             re.compile(
                 r"^:sens:(CURR|CHAR|VOLT|RES):aper\?;$"
@@ -473,7 +835,9 @@ class MockKeithley:
             re.compile(r"^:trac:elem\?;$"): self.do_get_format_trac,
             re.compile(r"^:trac:points 50000;$"): self.do_set_buffer_size,
             re.compile(r"^:trig:count 50000;$"): self.do_set_buffer_size,
-            re.compile(r"^:trig:sour IMM;$"): self.do_select_device_timer,
+            re.compile(
+                r"^:trig:sour (?P<parameter>IMM|TIM);$"
+            ): self.do_select_device_timer,
             re.compile(
                 r"^:trig:tim (?P<parameter>\d\.\d\d\d);$"
             ): self.do_select_device_timer,
@@ -481,6 +845,9 @@ class MockKeithley:
             re.compile(r"^:init;$"): self.do_init_buffer,
             re.compile(r"^:trac:feed:cont NEV;$"): self.do_stop_storing_buffer,
             re.compile(r"^:trac:data\?;$"): self.do_read_buffer,
+            re.compile(
+                r"^:trac:data:sel\? (?P<parameter>\d+,\d+);$"
+            ): self.do_read_buffer_range,
             # re.compile(r"^:sens:data\?;$"): self.do_read_sensor,
             re.compile(r"^TST:TYPE RTC;$"): self.do_rtc_time,
             re.compile(r"^:sens:curr:nplc (?P<parameter>.*);$"): self.do_change_nplc,
@@ -501,6 +868,9 @@ class MockKeithley:
             re.compile(r"^:sour:volt:lev:imm:ampl\?;$"): self.get_voltage_level,
             re.compile(r"^:sens:CURR:dig 7;$"): self.set_resolution,
             re.compile(r"\*RST;$"): self.do_reset_device,
+            re.compile(r"^\*OPC;$"): self.do_operation_complete,
+            re.compile(r"^\*ESR\?;$"): self.do_get_event_status,
+            re.compile(r"^\*STB\?;$"): self.do_get_status_byte,
             re.compile(r"^:SENS:TOUT:SIGN 3;$"): self.do_output_trigger_line,
             re.compile(r"^:TRIG:ACQ:TOUT ON;$"): self.do_output_trigger_line,
             re.compile(
@@ -513,7 +883,20 @@ class MockKeithley:
             re.compile(
                 r"^:(sens|SENS):(CURR|CHAR|VOLT|RES):rang .*;$"
             ): self.do_nothing,
+            re.compile(r"^:trac:poin:act\?;$"): self.do_get_buffer_quantity,
+            re.compile(
+                r"^:form:data (?P<parameter>ASC|REAL,32|REAL,64);$"
+            ): self.do_set_data_format,
+            re.compile(
+                r"^:form:bord (?P<parameter>NORM|SWAP);$"
+            ): self.do_set_byte_order,
         }
+        self.command_index = CommandIndex(self.commands)
+        self.buffer = None
+        if generator is not None:
+            self.buffer = MockBuffer(
+                generator, elements=self.do_get_format_trac().split(",")
+            )
 
     def parse_message(self, msg):
         """Parse and return the result of the message.
@@ -535,21 +918,18 @@ class MockKeithley:
         """
         try:
             msg = msg + ";"
-            self.log.info(repr(msg))
-            for command, func in self.commands.items():
-                self.log.info(command)
-                matched_command = command.match(msg)
-                self.log.info(matched_command)
-                if matched_command:
-                    try:
-                        reply = func(matched_command.group("parameter"))
-                        self.log.info(reply)
-                        return reply if reply != "" else None
-                    except IndexError:
-                        reply = func()
-                        self.log.info(reply)
-                        return reply if reply != "" else None
-            raise NotImplementedError(msg)
+            matched_command, func = self.command_index.lookup(
+                msg, self.log if self.debug else None
+            )
+            if matched_command is None:
+                raise NotImplementedError(msg)
+            try:
+                reply = func(matched_command.group("parameter"))
+            except IndexError:
+                reply = func()
+            if self.debug:
+                self.log.debug(f"{msg!r}: {reply!r}")
+            return reply if reply != "" else None
         except Exception as e:
             self.log.exception(e)
             raise e
@@ -571,6 +951,8 @@ class MockKeithley:
         return ""
 
     def get_intensity(self):
+        if self.buffer is not None:
+            return f"{self.buffer.get_latest():+E}"
         return "0.001"
 
     def do_set_range(self, *args):
@@ -598,6 +980,8 @@ class MockKeithley:
 
     def do_clear_buffer(self):
         """Clear the buffer."""
+        if self.buffer is not None:
+            self.buffer.clear()
         return ""
 
     def do_format_trac(self, *args):
@@ -613,7 +997,12 @@ class MockKeithley:
         return ""
 
     def do_select_device_timer(self, *args):
-        """Select the device timer."""
+        """Select the trigger source or set the period of the timer."""
+        if self.buffer is not None and args:
+            if args[0] in ("IMM", "TIM"):
+                self.buffer.trigger_source = args[0]
+            else:
+                self.buffer.timer = float(args[0])
         return ""
 
     def do_next_read(self):
@@ -622,16 +1011,66 @@ class MockKeithley:
 
     def do_init_buffer(self):
         """Initialize the buffer."""
+        if self.buffer is not None:
+            self.buffer.start()
         return ""
 
     def do_stop_storing_buffer(self):
         """Stop storing to the buffer."""
+        if self.buffer is not None:
+            self.buffer.stop()
         return ""
 
     def do_read_buffer(self):
         """Read the values in the buffer."""
+        if self.buffer is not None:
+            return format_readings(
+                self.buffer.get_readings(),
+                self.data_format,
+                self.byte_order,
+                definite=False,
+            )
+        if self.data_format != DataFormat.ASCII:
+            # The Keithley sends an indefinite length block.
+            return make_binary_block(
+                self.buffer_values(), self.data_format, self.byte_order, definite=False
+            )
         return "+0.01DC 0.33\n+0.01DC 0.33\n+0.01DC 0.33\n+0.01DC 0.33\n" * 1000
 
+    def buffer_values(self):
+        """Return the values in the buffer, in the order they are sent."""
+        if self.buffer is not None:
+            return self.buffer.get_readings().ravel()
+        return np.tile([0.01, 0.33], 4000)
+
+    def buffer_readings(self):
+        """Return the readings in the buffer, one per row."""
+        if self.buffer is not None:
+            return self.buffer.get_readings()
+        return self.buffer_values().reshape(-1, 2)
+
+    def do_read_buffer_range(self, parameter):
+        """Read some of the readings in the buffer."""
+        start, count = (int(item) for item in parameter.split(","))
+        readings = self.buffer_readings()[start : start + count]
+        return format_readings(
+            readings, self.data_format, self.byte_order, definite=False
+        )
+
+    def do_get_buffer_quantity(self):
+        """Get the number of readings in the buffer."""
+        return str(len(self.buffer_readings()))
+
+    def do_set_data_format(self, data_format):
+        """Set the format of the data sent."""
+        self.data_format = DataFormat(data_format)
+        return ""
+
+    def do_set_byte_order(self, byte_order):
+        """Set the byte order of binary data."""
+        self.byte_order = byte_order
+        return ""
+
     def do_read_sensor(self):
         """Read the sensor."""
         return "0"
@@ -648,8 +1087,10 @@ class MockKeithley:
         """Get the state of the filter in median mode."""
         return "1"
 
-    def do_integration_time(self):
+    def do_integration_time(self, aperture=None):
         """Set the integration time setting."""
+        if self.buffer is not None and aperture is not None:
+            self.buffer.aperture = float(aperture)
         return ""
 
     def do_get_integration_time(self):
@@ -672,7 +1113,9 @@ class MockKeithley:
         nplc : `int`
             The number of cycles.
         ."""
-        pass
+        if self.buffer is not None and nplc not in ("ON", "OFF"):
+            self.buffer.nplc = float(nplc)
+            self.buffer.aperture = None
 
     def do_get_nplc(self):
         return "5"
@@ -717,5 +1160,19 @@ class MockKeithley:
     def do_reset_device(self):
         pass
 
+    def do_operation_complete(self):
+        """Set the operation complete bit when all commands are done."""
+        self.event_status |= 1
+        return ""
+
+    def do_get_event_status(self):
+        """Get and clear the standard event status register."""
+        event_status, self.event_status = self.event_status, 0
+        return str(event_status)
+
+    def do_get_status_byte(self):
+        """Get the status byte; the error queue is always empty."""
+        return "0"
+
     def do_output_trigger_line(self):
         pass
@@ -0,0 +1,267 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+__all__ = ["SignalGenerator", "MockBuffer"]
+
+import time
+
+import numpy as np
+
+from .column_store import ColumnStore
+
+LINE_FREQUENCY = 60
+"""The power line frequency the integration time is counted in (Hz)."""
+BUFFER_CAPACITY = 50000
+"""The default number of readings the buffer holds, like the Keithley."""
+SATURATION_VALUE = 9.9e37
+"""The value the electrometer reports for a reading over range."""
+TIME_ELEMENTS = {"TST", "TIME"}
+"""The elements that hold the time of a reading."""
+TEMPERATURE_ELEMENTS = {"ETEM", "TEMP"}
+"""The elements that hold the temperature."""
+SOURCE_ELEMENTS = {"VSO", "SOUR"}
+"""The elements that hold the voltage source level."""
+
+
+class SignalGenerator:
+    """Synthetic signal for the mock electrometers.
+
+    The signal is a constant level that changes in steps, plus Gaussian
+    noise; readings whose magnitude is over the saturation level are
+    reported as saturated.
+
+    Parameters
+    ----------
+    level : `float`, optional
+        The level of the signal until the first step.
+    noise : `float`, optional
+        The standard deviation of the noise.
+    steps : `list` [`tuple`], optional
+        The time since the start of the acquisition (s) and the new level
+        of each step.
+    saturation_level : `float` | None, optional
+        The largest magnitude that can be measured; no limit if None.
+    saturation_value : `float`, optional
+        The value of a saturated reading, with the sign of the signal.
+    temperature : `float`, optional
+        The temperature reported with the readings (C).
+    seed : `int` | None, optional
+        The seed of the noise.
+    """
+
+    def __init__(
+        self,
+        level=1e-9,
+        noise=1e-12,
+        steps=(),
+        saturation_level=None,
+        saturation_value=SATURATION_VALUE,
+        temperature=23.0,
+        seed=None,
+    ):
+        self.level = level
+        self.noise = noise
+        steps = sorted(steps)
+        self.step_times = np.array([step[0] for step in steps], dtype=float)
+        self.step_levels = np.array([step[1] for step in steps], dtype=float)
+        self.saturation_level = saturation_level
+        self.saturation_value = saturation_value
+        self.temperature = temperature
+        self.rng = np.random.default_rng(seed)
+
+    def get_signal(self, times):
+        """Return the signal at some times.
+
+        Parameters
+        ----------
+        times : `numpy.ndarray`
+            The times since the start of the acquisition (s).
+
+        Returns
+        -------
+        signal : `numpy.ndarray`
+            The signal at each time.
+        """
+        times = np.asarray(times, dtype=float)
+        signal = np.full(times.shape, float(self.level))
+        if self.step_times.size > 0:
+            index = np.searchsorted(self.step_times, times, side="right")
+            stepped = index > 0
+            signal[stepped] = self.step_levels[index[stepped] - 1]
+        if self.noise > 0:
+            signal += self.rng.normal(scale=self.noise, size=times.shape)
+        if self.saturation_level is not None:
+            saturated = np.abs(signal) > self.saturation_level
+            signal[saturated] = np.copysign(self.saturation_value, signal[saturated])
+        return signal
+
+    def get_readings(self, elements, times):
+        """Return readings at some times.
+
+        Parameters
+        ----------
+        elements : `list` of `str`
+            The elements of each reading, e.g. ``["TST", "CURR"]``; the
+            elements that are not a time, temperature or source level hold
+            the signal.
+        times : `numpy.ndarray`
+            The times since the start of the acquisition (s).
+
+        Returns
+        -------
+        readings : `numpy.ndarray`
+            One row per reading, one column per element.
+        """
+        times = np.asarray(times, dtype=float)
+        readings = np.empty((times.size, len(elements)))
+        for i, element in enumerate(element.strip() for element in elements):
+            if element in TIME_ELEMENTS:
+                readings[:, i] = times
+            elif element in TEMPERATURE_ELEMENTS:
+                readings[:, i] = self.temperature
+            elif element in SOURCE_ELEMENTS:
+                readings[:, i] = 0
+            else:
+                readings[:, i] = self.get_signal(times)
+        return readings
+
+
+class MockBuffer:
+    """Buffer of a mock electrometer, which fills with readings in real
+    time while the acquisition runs.
+
+    A reading is taken every `interval` seconds, from the start of the
+    acquisition until it is stopped or the buffer is full. The readings
+    are generated when the buffer is looked at.
+
+    Parameters
+    ----------
+    generator : `SignalGenerator`
+        The signal.
+    elements : `list` of `str`
+        The elements of each reading, see `SignalGenerator.get_readings`.
+    capacity : `int`, optional
+        The number of readings the buffer holds.
+    clock : `callable`, optional
+        Function that returns the time (s).
+
+    Attributes
+    ----------
+    nplc : `float`
+        The integration time, in power line cycles.
+    aperture : `float` | None
+        The integration time (s), which overrides ``nplc`` if not None.
+    trigger_source : `str`
+        IMM to take readings back to back, TIM to take them at the period
+        of the trigger timer.
+    timer : `float`
+        The period of the trigger timer (s).
+    """
+
+    def __init__(
+        self, generator, elements, capacity=BUFFER_CAPACITY, clock=time.monotonic
+    ):
+        self.generator = generator
+        self.elements = list(elements)
+        self.capacity = capacity
+        self.clock = clock
+        self.nplc = 1.0
+        self.aperture = None
+        self.trigger_source = "IMM"
+        self.timer = 0.1
+        self.store = ColumnStore(num_columns=len(self.elements))
+        self.start_time = None
+        self.stop_time = None
+
+    def __len__(self):
+        self.update()
+        return len(self.store)
+
+    @property
+    def interval(self):
+        """The time between readings (s)."""
+        integration_time = (
+            self.aperture if self.aperture is not None else self.nplc / LINE_FREQUENCY
+        )
+        if self.trigger_source == "TIM":
+            return max(self.timer, integration_time)
+        return integration_time
+
+    @property
+    def running(self):
+        """Whether readings are being taken (`bool`)."""
+        return self.start_time is not None and self.stop_time is None
+
+    def start(self):
+        """Clear the buffer and start taking readings."""
+        self.clear()
+        self.start_time = self.clock()
+
+    def stop(self):
+        """Stop taking readings."""
+        if self.running:
+            self.update()
+            self.stop_time = self.clock()
+
+    def clear(self):
+        """Remove the readings and stop taking them."""
+        self.store.clear()
+        self.start_time = None
+        self.stop_time = None
+
+    def update(self):
+        """Add the readings taken since the last update."""
+        if self.start_time is None:
+            return
+        end_time = self.clock() if self.stop_time is None else self.stop_time
+        num_readings = min(
+            self.capacity, int((end_time - self.start_time) / self.interval) + 1
+        )
+        if num_readings > len(self.store):
+            times = np.arange(len(self.store), num_readings) * self.interval
+            self.store.extend(self.generator.get_readings(self.elements, times))
+
+    def get_readings(self):
+        """Return the readings in the buffer.
+
+        Returns
+        -------
+        readings : `numpy.ndarray`
+            One row per reading, one column per element; a view that is
+            only valid until the buffer changes.
+        """
+        self.update()
+        return self.store.data
+
+    def get_latest(self):
+        """Return the signal now, as ``:sens:data:latest?`` does.
+
+        Returns
+        -------
+        signal : `float`
+            The signal.
+        """
+        if self.running:
+            time_since_start = self.clock() - self.start_time
+        else:
+            time_since_start = 0
+        return float(self.generator.get_signal([time_since_start])[0])
@@ -0,0 +1,154 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+__all__ = ["ObsIdPool"]
+
+import asyncio
+import collections
+import logging
+import time
+
+from lsst.ts import utils
+
+MAX_AGE = 600
+"""How long an obs ID stays in the pool (s); it includes the observing
+day, so it should not be kept for long."""
+
+
+class ObsIdPool:
+    """Pool of obs IDs fetched ahead of time from the image name service.
+
+    The pool is refilled in the background with one request for all the
+    missing obs IDs, so that taking one does not wait for the image name
+    service. If the pool is empty, e.g. because refilling it failed, an obs
+    ID is requested directly.
+
+    Parameters
+    ----------
+    get_next_obs_id : `callable`
+        Coroutine function called with the number of images, which returns
+        their sequence numbers and obs IDs, like
+        `lsst.ts.utils.ImageNameServiceClient.get_next_obs_id`.
+    size : `int`
+        The number of obs IDs kept in the pool; 0 disables it, so that each
+        obs ID is requested when it is needed.
+    log : `logging.Logger`, optional
+        The log.
+
+    Attributes
+    ----------
+    hits : `int`
+        The number of obs IDs taken from the pool.
+    misses : `int`
+        The number of obs IDs requested because the pool was empty.
+    failed_refills : `int`
+        The number of times refilling the pool failed.
+    """
+
+    def __init__(self, get_next_obs_id, size, log=None):
+        self.log = logging.getLogger(type(self).__name__) if log is None else log
+        self.get_next_obs_id = get_next_obs_id
+        self.size = size
+        # (time fetched, obs ID) of the pooled obs IDs, oldest first.
+        self.obs_ids = collections.deque()
+        self.refill_task = utils.make_done_future()
+        self.hits = 0
+        self.misses = 0
+        self.failed_refills = 0
+
+    def __len__(self):
+        return len(self.obs_ids)
+
+    @property
+    def hit_rate(self):
+        """The fraction of obs IDs taken from the pool (`float`), 0 if none
+        was taken yet."""
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0
+
+    def prefetch(self):
+        """Start refilling the pool in the background, unless it is full or
+        already being refilled.
+        """
+        self.drop_expired()
+        if len(self.obs_ids) < self.size and self.refill_task.done():
+            self.refill_task = asyncio.create_task(self.refill())
+
+    async def get(self):
+        """Return the next obs ID, and start refilling the pool.
+
+        Returns
+        -------
+        obs_id : `str`
+            The obs ID.
+
+        Raises
+        ------
+        Exception
+            If the pool is empty and requesting an obs ID fails.
+        """
+        self.drop_expired()
+        if not self.obs_ids and not self.refill_task.done():
+            # Waiting for the refill under way is faster than a new request.
+            await asyncio.wait([self.refill_task])
+            self.drop_expired()
+        if self.obs_ids:
+            self.hits += 1
+            _, obs_id = self.obs_ids.popleft()
+        else:
+            self.misses += 1
+            _, obs_ids = await self.get_next_obs_id(num_images=1)
+            obs_id = obs_ids[0]
+        self.prefetch()
+        return obs_id
+
+    async def refill(self):
+        """Request the obs IDs missing from the pool.
+
+        A failure is logged, and the pool is refilled the next time an obs
+        ID is taken.
+        """
+        num_images = self.size - len(self.obs_ids)
+        try:
+            _, obs_ids = await self.get_next_obs_id(num_images=num_images)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.failed_refills += 1
+            self.log.exception(
+                f"Could not get {num_images} obs IDs from the image name service."
+            )
+            return
+        fetch_time = time.monotonic()
+        self.obs_ids.extend((fetch_time, obs_id) for obs_id in obs_ids)
+
+    def drop_expired(self):
+        """Drop the obs IDs older than `MAX_AGE`."""
+        min_time = time.monotonic() - MAX_AGE
+        while self.obs_ids and self.obs_ids[0][0] < min_time:
+            _, obs_id = self.obs_ids.popleft()
+            self.log.debug(f"Dropping expired obs ID {obs_id}.")
+
+    def clear(self):
+        """Stop refilling the pool and empty it."""
+        self.refill_task.cancel()
+        self.obs_ids.clear()
@@ -0,0 +1,187 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["ReadoutModel"]
+
+import logging
+import os
+import pathlib
+import time
+
+import yaml
+
+DEFAULT_SECONDS_PER_READING = 0.0047 * 2 * 1.3
+"""The readout time per reading used until one has been measured; 200
+readings took about 4 seconds, read as two values each with a 30%
+overhead."""
+SMOOTHING = 0.3
+"""The weight of a new measurement in the running average."""
+MIN_READINGS = 100
+"""The least number of readings for which the readout time is measured;
+the latency dominates for fewer readings."""
+SAFETY_FACTOR = 3
+"""How much longer than predicted to wait for a readout."""
+MIN_TIMEOUT = 10
+"""The shortest read timeout (s)."""
+SAVE_INTERVAL = 60
+"""The shortest time between saves of the model by `ReadoutModel.update`
+(s)."""
+
+
+class ReadoutModel:
+    """Running model of the time it takes to read the buffer.
+
+    The time per reading is kept as an exponentially weighted average for
+    each key, e.g. the electrometer type, model and readout mode, and is
+    saved to a yaml file, so that it survives restarts of the CSC. As the
+    buffer is read often during a scan, an update only saves the model if
+    it was not saved in the last `SAVE_INTERVAL` seconds; call `save` to
+    save the remaining updates, e.g. when disconnecting.
+
+    Parameters
+    ----------
+    path : `str` or `pathlib.Path` or None
+        The file where the model is saved. If None it is not saved.
+    log : `logging.Logger`, optional
+        The log.
+
+    Attributes
+    ----------
+    seconds_per_reading : `dict` [`str`, `float`]
+        The average readout time of a reading (s), by key.
+    num_measurements : `dict` [`str`, `int`]
+        The number of measurements averaged, by key.
+    unsaved : `bool`
+        Whether the model was updated since it was last saved.
+    """
+
+    def __init__(self, path=None, log=None):
+        self.log = logging.getLogger(type(self).__name__) if log is None else log
+        self.path = None if path is None else pathlib.Path(path)
+        self.seconds_per_reading = {}
+        self.num_measurements = {}
+        self.unsaved = False
+        self.save_time = None
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def load(self):
+        """Load the model from `path`.
+
+        A file that cannot be read is ignored, so the model starts over.
+        """
+        try:
+            with open(self.path) as file:
+                saved = yaml.safe_load(file) or {}
+            for key, item in saved.items():
+                self.seconds_per_reading[key] = float(item["seconds_per_reading"])
+                self.num_measurements[key] = int(item["num_measurements"])
+        except Exception:
+            self.log.exception(f"Could not load the readout model from {self.path}.")
+            self.seconds_per_reading = {}
+            self.num_measurements = {}
+
+    def save(self):
+        """Save the model to `path`, if set.
+
+        This blocks, so it should be run in a worker thread if the model
+        is not updated at the same time.
+        """
+        self.unsaved = False
+        self.save_time = time.monotonic()
+        if self.path is None:
+            return
+        saved = {
+            key: dict(
+                seconds_per_reading=self.seconds_per_reading[key],
+                num_measurements=self.num_measurements[key],
+            )
+            for key in self.seconds_per_reading
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary_path = self.path.with_name(f"{self.path.name}.tmp")
+            with open(temporary_path, "w") as file:
+                yaml.safe_dump(saved, file)
+            os.replace(temporary_path, self.path)
+        except Exception:
+            self.log.exception(f"Could not save the readout model to {self.path}.")
+
+    def get_seconds_per_reading(self, key):
+        """Return the expected readout time of a reading.
+
+        Parameters
+        ----------
+        key : `str`
+            The key of the model.
+
+        Returns
+        -------
+        seconds_per_reading : `float`
+            The expected readout time (s).
+        """
+        return self.seconds_per_reading.get(key, DEFAULT_SECONDS_PER_READING)
+
+    def get_timeout(self, key, num_readings, latency=0):
+        """Return how long to wait for a readout.
+
+        Parameters
+        ----------
+        key : `str`
+            The key of the model.
+        num_readings : `int`
+            The number of readings to read.
+        latency : `float`, optional
+            The time to wait in addition to the readout time (s).
+
+        Returns
+        -------
+        timeout : `float`
+            The timeout (s).
+        """
+        predicted = num_readings * self.get_seconds_per_reading(key)
+        return max(latency + SAFETY_FACTOR * predicted, MIN_TIMEOUT)
+
+    def update(self, key, num_readings, duration):
+        """Add a measured readout time to the model, saving it if it was
+        not saved in the last `SAVE_INTERVAL` seconds.
+
+        Parameters
+        ----------
+        key : `str`
+            The key of the model.
+        num_readings : `int`
+            The number of readings read.
+        duration : `float`
+            How long the readout took (s).
+        """
+        if num_readings < MIN_READINGS:
+            return
+        measured = duration / num_readings
+        if key in self.seconds_per_reading:
+            measured = (
+                SMOOTHING * measured + (1 - SMOOTHING) * self.seconds_per_reading[key]
+            )
+        self.seconds_per_reading[key] = measured
+        self.num_measurements[key] = self.num_measurements.get(key, 0) + 1
+        self.unsaved = True
+        if self.save_time is None or time.monotonic() - self.save_time >= SAVE_INTERVAL:
+            self.save()
@@ -0,0 +1,122 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["ScanPlan", "ScanPlanCache", "compile_plan"]
+
+import typing
+
+from .commander import batch_commands
+
+
+class ScanPlan(typing.NamedTuple):
+    """A batch of commands, encoded and ready to be written.
+
+    Attributes
+    ----------
+    data : `bytes`
+        The encoded lines of commands, each with its terminator.
+    num_queries : `tuple` [`int`]
+        The number of queries in each line.
+    """
+
+    data: bytes
+    num_queries: tuple[int, ...]
+
+
+def compile_plan(commands, terminator, encoding):
+    """Compile commands into a `ScanPlan`.
+
+    Parameters
+    ----------
+    commands : `list` of `str`
+        The generated command strings.
+    terminator : `bytes`
+        The line terminator of the electrometer.
+    encoding : `str`
+        The text encoding of the electrometer.
+
+    Returns
+    -------
+    plan : `ScanPlan`
+        The compiled commands.
+    """
+    lines = batch_commands(commands)
+    return ScanPlan(
+        data=b"".join(line.encode(encoding) + terminator for line, _ in lines),
+        num_queries=tuple(num_queries for _, num_queries in lines),
+    )
+
+
+class ScanPlanCache:
+    """Cache of compiled scan plans.
+
+    The commands that set up a scan only depend on a few settings, such as
+    the electrometer type, mode and accessories; the cache keeps the plan
+    compiled for each combination of them, so that repeated scans skip
+    building and encoding the commands.
+
+    Attributes
+    ----------
+    hits : `int`
+        The number of plans found in the cache.
+    misses : `int`
+        The number of plans that had to be compiled.
+    """
+
+    def __init__(self):
+        self._plans = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._plans)
+
+    def get(self, key, build_commands, terminator, encoding):
+        """Return the plan for a key, compiling it if needed.
+
+        Parameters
+        ----------
+        key : `tuple`
+            The settings the commands depend on.
+        build_commands : `callable`
+            Function without arguments that returns the commands.
+        terminator : `bytes`
+            The line terminator of the electrometer.
+        encoding : `str`
+            The text encoding of the electrometer.
+
+        Returns
+        -------
+        plan : `ScanPlan`
+            The compiled commands.
+        """
+        plan = self._plans.get(key)
+        if plan is not None:
+            self.hits += 1
+            return plan
+        self.misses += 1
+        plan = compile_plan(build_commands(), terminator, encoding)
+        self._plans[key] = plan
+        return plan
+
+    def clear(self):
+        """Remove all plans, e.g. after the settings changed."""
+        self._plans.clear()
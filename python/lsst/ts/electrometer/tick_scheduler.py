@@ -0,0 +1,129 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["TickScheduler"]
+
+import asyncio
+import math
+import time
+import types
+
+
+class TickScheduler:
+    """Wait for ticks at fixed times after a start, so that the time taken
+    between ticks does not add up.
+
+    Tick ``i`` is due ``i * period`` seconds after the start. A tick that
+    is already late when it is waited for is skipped, so that a loop that
+    falls behind catches up instead of running ticks back to back.
+
+    Parameters
+    ----------
+    period : `float`
+        The time between ticks (s).
+    duration : `float`
+        How long to tick (s); the last wait ends at the end.
+
+    Attributes
+    ----------
+    start : `float`
+        When the scheduler was made (monotonic s).
+    end : `float`
+        When the ticks end (monotonic s).
+    tick : `int`
+        The index of the last tick.
+    skipped : `int`
+        The number of ticks skipped.
+    """
+
+    def __init__(self, period, duration):
+        if period <= 0:
+            raise ValueError(f"{period=} must be positive.")
+        self.period = period
+        self.start = time.monotonic()
+        self.end = self.start + max(duration, 0)
+        self.tick = 0
+        self.skipped = 0
+        self._count = 0
+        self._last_wake_time = self.start
+        self._lateness_sum = 0.0
+        self._lateness_sum_sq = 0.0
+        self._max_lateness = 0.0
+
+    async def wait_next(self):
+        """Wait for the next tick.
+
+        Returns
+        -------
+        ticking : `bool`
+            True at a tick, False at the end.
+        """
+        now = time.monotonic()
+        tick = self.tick + 1
+        due_tick = math.floor((now - self.start) / self.period) + 1
+        if due_tick > tick:
+            self.skipped += due_tick - tick
+            tick = due_tick
+        target = self.start + tick * self.period
+        if target >= self.end:
+            await asyncio.sleep(max(self.end - now, 0))
+            return False
+        await asyncio.sleep(target - now)
+        wake_time = time.monotonic()
+        lateness = wake_time - target
+        self.tick = tick
+        self._count += 1
+        self._last_wake_time = wake_time
+        self._lateness_sum += lateness
+        self._lateness_sum_sq += lateness**2
+        self._max_lateness = max(self._max_lateness, lateness)
+        return True
+
+    def get_stats(self):
+        """Return the statistics of the ticks so far.
+
+        Returns
+        -------
+        stats : `types.SimpleNamespace`
+            ``count``, the number of ticks; ``skipped``, the number of
+            ticks skipped; ``mean_period``, the mean time between ticks
+            (s); ``jitter``, the standard deviation of the lateness of the
+            ticks (s) and ``max_lateness`` (s). The times are None without
+            ticks.
+        """
+        count = self._count
+        if count == 0:
+            return types.SimpleNamespace(
+                count=0,
+                skipped=self.skipped,
+                mean_period=None,
+                jitter=None,
+                max_lateness=None,
+            )
+        mean_lateness = self._lateness_sum / count
+        variance = self._lateness_sum_sq / count - mean_lateness**2
+        return types.SimpleNamespace(
+            count=count,
+            skipped=self.skipped,
+            mean_period=(self._last_wake_time - self.start) / count,
+            jitter=math.sqrt(max(variance, 0)),
+            max_lateness=self._max_lateness,
+        )
@@ -0,0 +1,246 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+__all__ = ["UploadSpool"]
+
+import asyncio
+import logging
+import os
+import pathlib
+import threading
+
+import yaml
+from lsst.ts import utils
+
+METADATA_SUFFIX = ".yaml"
+"""The suffix of the file that holds the metadata of a spooled file."""
+MIN_RETRY_DELAY = 1
+"""The delay before retrying a failed upload the first time (s)."""
+MAX_RETRY_DELAY = 60
+"""The longest delay between retries of a failed upload (s)."""
+MAX_ATTEMPTS = 10
+"""How often a file is uploaded before it is left in the spool until the
+next start."""
+
+
+class UploadSpool:
+    """Directory of files waiting to be uploaded, with a background task
+    that uploads them.
+
+    Each file is written to the spool with its metadata, e.g. the key to
+    upload it to, in a yaml file next to it. The files are uploaded in
+    order; a failed upload is retried with an exponentially growing
+    delay, and a file is only removed once it was uploaded. Files left in
+    the spool, e.g. by a restart, are uploaded when the spool is started;
+    files that were not written completely, which cannot be uploaded
+    without their metadata, are removed then.
+
+    Parameters
+    ----------
+    path : `str` or `pathlib.Path`
+        The directory of the spool.
+    upload : `callable`
+        Coroutine function called with the path of a file and its
+        metadata, which uploads it and raises if that fails.
+    log : `logging.Logger`, optional
+        The log.
+
+    Attributes
+    ----------
+    uploaded : `int`
+        The number of files uploaded since the spool was made.
+    failed_attempts : `int`
+        The number of failed uploads since the spool was made.
+    """
+
+    def __init__(self, path, upload, log=None):
+        self.log = logging.getLogger(type(self).__name__) if log is None else log
+        self.path = pathlib.Path(path)
+        self.upload = upload
+        self.queue = asyncio.Queue()
+        self.task = utils.make_done_future()
+        # Held while writing a file, so that it is not taken for one that
+        # was not written completely.
+        self.write_lock = threading.Lock()
+        self.uploaded = 0
+        self.failed_attempts = 0
+
+    def write(self, name, data, metadata, write_file=None):
+        """Write a file and its metadata to the spool.
+
+        This blocks, so it should be run in a worker thread for large
+        files. Call `add` afterwards to queue the file.
+
+        Parameters
+        ----------
+        name : `str`
+            The name of the file.
+        data : `bytes`-like
+            The contents of the file.
+        metadata : `dict`
+            The metadata passed to ``upload``.
+        write_file : `callable`, optional
+            Function called with the path of the file and ``data``, which
+            writes the file, e.g. compressing it; by default the data is
+            written as is.
+        """
+        with self.write_lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            path = self.path / name
+            if write_file is None:
+                path.write_bytes(data)
+            else:
+                write_file(path, data)
+            # The metadata is written last, so a file is only picked up after
+            # a restart if it was written completely.
+            metadata_path = self.get_metadata_path(path)
+            temporary_path = metadata_path.with_name(f"{metadata_path.name}.tmp")
+            with open(temporary_path, "w") as file:
+                yaml.safe_dump(metadata, file)
+            os.replace(temporary_path, metadata_path)
+
+    def add(self, name):
+        """Queue a file written with `write` for upload.
+
+        Parameters
+        ----------
+        name : `str`
+            The name of the file.
+        """
+        self.queue.put_nowait(self.path / name)
+
+    def get_metadata_path(self, path):
+        """Return the path of the metadata of a spooled file.
+
+        Parameters
+        ----------
+        path : `pathlib.Path`
+            The path of the file.
+
+        Returns
+        -------
+        metadata_path : `pathlib.Path`
+            The path of its metadata.
+        """
+        return path.with_name(f"{path.name}{METADATA_SUFFIX}")
+
+    def get_spooled(self):
+        """Return the files in the spool, oldest first, removing the ones
+        that were not written or removed completely.
+
+        This blocks, so it should be run in a worker thread.
+
+        Returns
+        -------
+        paths : `list` of `pathlib.Path`
+            The paths of the files that have metadata.
+        """
+        if not self.path.is_dir():
+            return []
+        paths = []
+        with self.write_lock:
+            for path in self.path.iterdir():
+                if path.name.endswith(".tmp"):
+                    complete = False
+                elif path.name.endswith(METADATA_SUFFIX):
+                    data_path = path.with_name(path.name.removesuffix(METADATA_SUFFIX))
+                    complete = data_path.exists()
+                else:
+                    complete = self.get_metadata_path(path).exists()
+                    if complete:
+                        paths.append(path)
+                if not complete:
+                    self.log.warning(f"Removing {path}, which is incomplete.")
+                    path.unlink(missing_ok=True)
+        return sorted(paths, key=lambda path: (path.stat().st_mtime, path.name))
+
+    async def start(self):
+        """Start uploading, beginning with the files already in the
+        spool.
+        """
+        await self.stop()
+        self.queue = asyncio.Queue()
+        spooled = await asyncio.to_thread(self.get_spooled)
+        if spooled:
+            self.log.info(f"Uploading {len(spooled)} files left in {self.path}.")
+        for path in spooled:
+            self.queue.put_nowait(path)
+        self.task = asyncio.create_task(self.upload_loop())
+
+    async def stop(self):
+        """Stop uploading; files not uploaded yet stay in the spool."""
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+
+    async def join(self):
+        """Wait until all queued files were uploaded or given up on."""
+        await self.queue.join()
+
+    async def upload_loop(self):
+        """Upload the queued files, one at a time."""
+        while True:
+            path = await self.queue.get()
+            try:
+                await self.upload_file(path)
+            finally:
+                self.queue.task_done()
+
+    async def upload_file(self, path):
+        """Upload a spooled file, retrying if that fails, and remove it
+        once it was uploaded.
+
+        Parameters
+        ----------
+        path : `pathlib.Path`
+            The path of the file.
+        """
+        metadata_path = self.get_metadata_path(path)
+        try:
+            metadata = yaml.safe_load(await asyncio.to_thread(metadata_path.read_text))
+        except Exception:
+            self.log.exception(f"Could not read the metadata of {path}; skipping it.")
+            return
+        delay = MIN_RETRY_DELAY
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                await self.upload(path, metadata)
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failed_attempts += 1
+                if attempt == MAX_ATTEMPTS:
+                    self.log.exception(
+                        f"Uploading {path} failed {attempt} times; "
+                        "leaving it in the spool until the next start."
+                    )
+                    return
+                self.log.exception(
+                    f"Uploading {path} failed; trying again in {delay} s."
+                )
+                await asyncio.sleep(delay)
+                delay = min(2 * delay, MAX_RETRY_DELAY)
+        self.uploaded += 1
+        path.unlink(missing_ok=True)
+        metadata_path.unlink(missing_ok=True)
@@ -0,0 +1,453 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Benchmarks of the readout path.
+
+They take a while, so they only run if the ``ELECTROMETER_BENCHMARKS``
+environment variable is set. The results are logged; run with
+``ELECTROMETER_BENCHMARKS=1 pytest -s --log-cli-level=INFO`` to see them.
+"""
+
+import asyncio
+import io
+import logging
+import os
+import pathlib
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import unittest
+
+import astropy.io.fits as fits
+import numpy as np
+import parameterized
+from astropy import table
+from lsst.ts import electrometer
+from lsst.ts.electrometer.commander import Commander
+
+BRANDS = ["Keithley", "Keysight"]
+NUM_READS = 20
+NUM_POINTS = [1_000, 10_000, 50_000, 500_000]
+KEYSIGHT_READING = b"-1.200000E-11,+1.102000E-02,"
+NUM_ROWS = [50_000, 5_000_000]
+NUM_SCAN_ROWS = [5_000, 50_000, 500_000]
+UPLOAD_RATE = 10e6
+"""The assumed upload rate to the LFA (bytes/s)."""
+FITS_COLUMNS = ["Signal", "RNUM", "Elapsed Time"]
+LAZY_MODULES = ["astropy.io.fits", "astropy.table"]
+"""Modules only imported when they are needed, not with the package."""
+IMPORT_TIME_BUDGET = 0.5
+"""The longest time importing the package may take, as a fraction of the
+time importing salobj; relative, so that it holds on slow CI runners."""
+NUM_DISPATCH_LINES = 200
+NUM_GENERATED_READINGS = [50_000, 500_000]
+NETWORK_PROFILES = ["ideal", "moxa"]
+NUM_NETWORK_QUERIES = 20
+NUM_FARM_INSTRUMENTS = [1, 8, 32]
+NUM_FARM_QUERIES = 50
+
+benchmark = unittest.skipUnless(
+    os.environ.get("ELECTROMETER_BENCHMARKS"),
+    "Set ELECTROMETER_BENCHMARKS to run the benchmarks.",
+)
+
+
+@benchmark
+class CommanderBenchmark(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.log = logging.getLogger(type(self).__name__)
+
+    @parameterized.parameterized.expand(BRANDS)
+    async def test_read_buffer_throughput(self, brand):
+        server = electrometer.MockServer(brand)
+        await server.start_task
+        commander = Commander(brand=brand)
+        commander.port = server.port
+        commands = getattr(electrometer, f"{brand}ElectrometerCommandFactory")()
+        try:
+            await commander.connect()
+            num_bytes = 0
+            t0 = time.monotonic()
+            for _ in range(NUM_READS):
+                reply = await commander.send_command(
+                    commands.read_buffer(), has_reply=True
+                )
+                num_bytes += len(reply)
+            duration = time.monotonic() - t0
+        finally:
+            await commander.disconnect()
+            await server.close()
+        self.log.info(
+            f"{brand} buffer readout: {num_bytes / duration / 1e6:.2f} MB/s "
+            f"({NUM_READS} replies of {num_bytes // NUM_READS} bytes "
+            f"in {duration:.3f} s)"
+        )
+
+
+@benchmark
+class GeneratedReadoutBenchmark(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.log = logging.getLogger(type(self).__name__)
+
+    @parameterized.parameterized.expand(
+        [(brand, num) for brand in BRANDS for num in NUM_GENERATED_READINGS]
+    )
+    async def test_read_generated_buffer(self, brand, num_readings):
+        generator = electrometer.SignalGenerator(
+            level=1e-9, noise=1e-12, steps=[(0.5, 2e-9)], seed=1
+        )
+        server = electrometer.MockServer(brand, generator=generator)
+        await server.start_task
+        # Fill the buffer at a high rate and stop once it is full.
+        server.device.buffer.capacity = num_readings
+        server.device.buffer.aperture = 1e-6
+        server.device.buffer.start()
+        await asyncio.sleep(num_readings * 1e-6)
+        server.device.buffer.stop()
+        commander = Commander(brand=brand)
+        commander.port = server.port
+        commands = getattr(electrometer, f"{brand}ElectrometerCommandFactory")()
+        num_categories = len(server.device.buffer.elements)
+        try:
+            await commander.connect()
+            t0 = time.perf_counter()
+            reply = await commander.send_command(commands.read_buffer(), has_reply=True)
+            values = electrometer.parse_buffer(
+                reply.encode(), num_categories=num_categories
+            )
+            duration = time.perf_counter() - t0
+        finally:
+            await commander.disconnect()
+            await server.close()
+        self.assertEqual(values.shape, (num_readings, num_categories))
+        self.log.info(
+            f"{brand} generated buffer of {num_readings} readings: "
+            f"{len(reply) / 1e6:.1f} MB read and parsed in {duration:.2f} s"
+        )
+
+
+@benchmark
+class MockServerBenchmark(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.log = logging.getLogger(type(self).__name__)
+
+    def get_commands(self, brand):
+        commands = getattr(electrometer, f"{brand}ElectrometerCommandFactory")()
+        return [
+            commands.operation_complete(),
+            commands.get_event_status(),
+            commands.get_mode(),
+            commands.get_range(mode=electrometer.UnitMode.CURR),
+            commands.get_last_error(),
+            commands.get_status_byte(),
+        ]
+
+    @parameterized.parameterized.expand(BRANDS)
+    async def test_dispatch_rate(self, brand):
+        server = electrometer.MockServer(brand)
+        await server.start_task
+        commander = Commander(brand=brand)
+        commander.port = server.port
+        commands = self.get_commands(brand)
+        try:
+            await commander.connect()
+            t0 = time.perf_counter()
+            for _ in range(NUM_DISPATCH_LINES):
+                replies = await commander.send_commands(commands)
+            duration = time.perf_counter() - t0
+        finally:
+            await commander.disconnect()
+            await server.close()
+        self.assertEqual(len(replies), 5)
+
+        # Matching the commands against every pattern in order, as before
+        # they were indexed.
+        messages = [command.rstrip(";").strip() + ";" for command in commands]
+        t0 = time.perf_counter()
+        for _ in range(NUM_DISPATCH_LINES):
+            for message in messages:
+                for pattern in server.device.commands:
+                    if pattern.match(message):
+                        break
+        reference_duration = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for _ in range(NUM_DISPATCH_LINES):
+            for message in messages:
+                server.device.command_index.lookup(message)
+        lookup_duration = time.perf_counter() - t0
+
+        num_commands = NUM_DISPATCH_LINES * len(commands)
+        self.log.info(
+            f"{brand} mock server: {num_commands / duration:.0f} commands/s "
+            f"through read_and_dispatch; lookup "
+            f"{lookup_duration / num_commands * 1e6:.2f} us, linear scan "
+            f"{reference_duration / num_commands * 1e6:.2f} us per command"
+        )
+
+
+@benchmark
+class NetworkProfileBenchmark(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.log = logging.getLogger(type(self).__name__)
+
+    @parameterized.parameterized.expand(NETWORK_PROFILES)
+    async def test_degraded_link(self, profile_name):
+        profile = electrometer.NETWORK_PROFILES[profile_name]
+        server = electrometer.MockServer("Keithley", profile=profile)
+        await server.start_task
+        commander = Commander(brand="Keithley")
+        commander.port = server.port
+        commands = electrometer.KeithleyElectrometerCommandFactory()
+        try:
+            await commander.connect()
+            t0 = time.perf_counter()
+            for _ in range(NUM_NETWORK_QUERIES):
+                await commander.send_command(commands.get_mode(), has_reply=True)
+            query_duration = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            reply = await commander.send_command(
+                commands.read_buffer(), has_reply=True, timeout=60
+            )
+            read_duration = time.perf_counter() - t0
+        finally:
+            await commander.disconnect()
+            await server.close()
+        self.log.info(
+            f"{profile_name} link: {query_duration / NUM_NETWORK_QUERIES * 1e3:.1f} "
+            f"ms per query; read {len(reply)} bytes of buffer in "
+            f"{read_duration:.2f} s ({len(reply) / read_duration:.0f} bytes/s)"
+        )
+
+
+@benchmark
+class MockFarmBenchmark(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.log = logging.getLogger(type(self).__name__)
+
+    async def poll(self, commander):
+        commands = getattr(
+            electrometer, f"{commander.brand}ElectrometerCommandFactory"
+        )()
+        for _ in range(NUM_FARM_QUERIES):
+            await commander.send_command(commands.get_mode(), has_reply=True)
+
+    @parameterized.parameterized.expand(NUM_FARM_INSTRUMENTS)
+    async def test_farm_load(self, num_instruments):
+        instances = [
+            dict(
+                sal_index=101 + i,
+                electrometer_type=BRANDS[i % len(BRANDS)],
+                tcpip=dict(port=0),
+            )
+            for i in range(num_instruments)
+        ]
+        farm = electrometer.MockFarm(instances, base_port=0)
+        await farm.start()
+        commanders = []
+        try:
+            for sal_index, server in farm.servers.items():
+                commander = Commander(brand=server.brand)
+                commander.port = server.port
+                await commander.connect()
+                commanders.append(commander)
+            farm.reset_stats()
+            await asyncio.gather(*[self.poll(commander) for commander in commanders])
+            stats = farm.get_stats()
+        finally:
+            for commander in commanders:
+                await commander.disconnect()
+            await farm.close()
+        # The clients share the event loop of the farm, so this is the
+        # load of both.
+        self.log.info(
+            f"{num_instruments} instruments: {stats.reply_rate:.0f} replies/s, "
+            f"CPU {stats.cpu_load:.0%}, event loop lag "
+            f"{stats.mean_lag * 1e3:.1f} ms mean, {stats.max_lag * 1e3:.1f} ms max"
+        )
+
+
+@benchmark
+class ParseBufferBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.log = logging.getLogger(type(self).__name__)
+
+    @parameterized.parameterized.expand(NUM_POINTS)
+    def test_parse_buffer(self, num_points):
+        reply = KEYSIGHT_READING * num_points
+        text = reply.decode()
+
+        t0 = time.perf_counter()
+        reference = electrometer.parse_buffer_reference(text, num_categories=2)
+        reference_duration = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        values = electrometer.parse_buffer(reply, num_categories=2)
+        duration = time.perf_counter() - t0
+
+        store = electrometer.ColumnStore(num_columns=2)
+        parser = electrometer.StreamingBufferParser(store)
+        t0 = time.perf_counter()
+        for start in range(0, len(reply), 2**16):
+            parser.feed(reply[start : start + 2**16])
+        parser.close()
+        streaming_duration = time.perf_counter() - t0
+
+        self.assertEqual(values.shape, (num_points, 2))
+        self.assertEqual(len(reference[1]), num_points)
+        self.assertEqual(len(store), num_points)
+        self.log.info(
+            f"parse {num_points} points: reference {reference_duration * 1e3:.1f} ms, "
+            f"vectorized {duration * 1e3:.1f} ms "
+            f"({reference_duration / duration:.1f}x), "
+            f"streaming {streaming_duration * 1e3:.1f} ms"
+        )
+
+
+@benchmark
+class FitsWriterBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.log = logging.getLogger(type(self).__name__)
+
+    def measure(self, encode):
+        """Return the time and peak memory of encoding a file, and the
+        file.
+        """
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        file = encode()
+        duration = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return duration, peak, bytes(file)
+
+    @parameterized.parameterized.expand(NUM_ROWS)
+    def test_write_fits(self, num_rows):
+        columns = np.random.default_rng(seed=1).normal(
+            size=(len(FITS_COLUMNS), num_rows)
+        )
+        meta = {"name": "Single Electrometer scan readout"}
+        primary_hdu = fits.PrimaryHDU()
+
+        def encode_qtable():
+            file = io.BytesIO()
+            table_hdu = fits.table_to_hdu(
+                table.QTable(data=dict(zip(FITS_COLUMNS, columns)), meta=meta)
+            )
+            fits.HDUList([primary_hdu, table_hdu]).writeto(file)
+            return file.getbuffer()
+
+        qtable_duration, qtable_peak, qtable_file = self.measure(encode_qtable)
+        duration, peak, file = self.measure(
+            lambda: electrometer.encode_fits(
+                primary_hdu.header, columns, FITS_COLUMNS, meta
+            )
+        )
+
+        self.assertEqual(file, qtable_file)
+        self.log.info(
+            f"write {num_rows} rows ({columns.nbytes / 1e6:.0f} MB): "
+            f"QTable {qtable_duration * 1e3:.1f} ms, "
+            f"peak {qtable_peak / 1e6:.0f} MB; "
+            f"direct {duration * 1e3:.1f} ms, peak {peak / 1e6:.0f} MB"
+        )
+
+
+@benchmark
+class FitsCompressionBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.log = logging.getLogger(type(self).__name__)
+
+    @parameterized.parameterized.expand(NUM_SCAN_ROWS)
+    def test_compress_fits(self, num_rows):
+        # A typical scan: a noisy signal, the reading number and a nearly
+        # linear elapsed time.
+        rng = np.random.default_rng(seed=1)
+        columns = np.stack(
+            [
+                1e-9 + 1e-12 * rng.normal(size=num_rows),
+                np.arange(num_rows, dtype=float),
+                0.0167 * np.arange(num_rows) + 1e-5 * rng.normal(size=num_rows),
+            ]
+        )
+        file = electrometer.encode_fits(fits.PrimaryHDU().header, columns, FITS_COLUMNS)
+        size = len(file)
+        for level in [1, 6]:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                path = pathlib.Path(tmpdir) / "file.fits.gz"
+                t0 = time.perf_counter()
+                electrometer.write_fits(path, file, "gzip", level=level)
+                duration = time.perf_counter() - t0
+                compressed_size = path.stat().st_size
+            self.assertLess(compressed_size, size)
+            saved = (size - compressed_size) / UPLOAD_RATE
+            self.log.info(
+                f"gzip level {level} of {num_rows} rows: "
+                f"{size / 1e6:.2f} MB -> {compressed_size / 1e6:.2f} MB "
+                f"in {duration * 1e3:.1f} ms; saves {saved * 1e3:.1f} ms of "
+                f"upload at {UPLOAD_RATE / 1e6:.0f} MB/s"
+            )
+
+
+@benchmark
+class ImportTimeBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.log = logging.getLogger(type(self).__name__)
+
+    def test_import_time(self):
+        # The packages the CSC runs on are imported first, so that only the
+        # time spent on this package and what it adds is measured.
+        code = (
+            "import sys\n"
+            "import numpy, yaml\n"
+            "from lsst.ts import salobj, tcpip, utils\n"
+            "modules = set(sys.modules)\n"
+            "import lsst.ts.electrometer\n"
+            "print('\\n'.join(sorted(set(sys.modules) - modules)))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        added_modules = result.stdout.split()
+        for name in LAZY_MODULES:
+            self.assertNotIn(name, added_modules)
+        cumulative_times = {}
+        for line in result.stderr.splitlines():
+            match = re.match(r"import time:\s*(\d+) \|\s*(\d+) \| (.*)", line)
+            if match is not None:
+                cumulative_times[match[3].strip()] = int(match[2]) * 1e-6
+        import_time = cumulative_times["lsst.ts.electrometer"]
+        salobj_import_time = cumulative_times["lsst.ts.salobj"]
+        self.log.info(
+            f"import lsst.ts.electrometer: {import_time * 1e3:.1f} ms, "
+            f"{len(added_modules)} modules added; import lsst.ts.salobj: "
+            f"{salobj_import_time * 1e3:.1f} ms"
+        )
+        self.assertLess(import_time, IMPORT_TIME_BUDGET * salobj_import_time)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import unittest
+
+import numpy as np
+from lsst.ts.electrometer import (
+    ColumnStore,
+    DataFormat,
+    MockKeithley,
+    StreamingBufferParser,
+    parse_binary_buffer,
+    parse_buffer,
+    parse_buffer_reference,
+)
+
+KEYSIGHT_REPLY = (
+    b"-1.200000E-11,+1.102000E-02,-1.000000E-11,+2.111700E-02,"
+    b"-1.400000E-11,+3.125200E-02,-1.300000E-11,+4.136600E-02\n"
+)
+
+KEITHLEY_REPLY = (
+    b"-1.396232E-12NADC,+0000.000secs,+00000RDNG#,"
+    b"-1.401020E-12NADC,+0000.130secs,+00001RDNG#\r"
+)
+IRREGULAR_REPLY = b"1.2.3, E5 5e, 12-3 +.5 -4. 0.33,123 \n 7 ,"
+
+
+class ParseBufferTestCase(unittest.TestCase):
+    def assert_matches_reference(self, reply, num_categories):
+        values = parse_buffer(reply, num_categories=num_categories)
+        reference = parse_buffer_reference(reply.decode(), num_categories)
+        self.assertEqual(values.shape, (len(reference[0]), num_categories))
+        for i, expected in enumerate(reference):
+            np.testing.assert_array_equal(values[: len(expected), i], expected)
+            self.assertTrue(np.all(np.isnan(values[len(expected) :, i])))
+
+    def test_matches_reference(self):
+        for reply, num_categories in (
+            (KEYSIGHT_REPLY * 10, 2),
+            (KEYSIGHT_REPLY * 10, 4),
+            (KEITHLEY_REPLY * 10, 3),
+            (MockKeithley().do_read_buffer().encode(), 2),
+            (IRREGULAR_REPLY, 2),
+            (IRREGULAR_REPLY, 3),
+            (b"", 2),
+        ):
+            with self.subTest(reply=reply[:20], num_categories=num_categories):
+                self.assert_matches_reference(reply, num_categories)
+
+    def test_columns_are_views(self):
+        values = parse_buffer(KEYSIGHT_REPLY, num_categories=2)
+        self.assertTrue(np.shares_memory(values[:, 0], values))
+        self.assertEqual(values[:, 1].strides, (16,))
+
+    def test_thousands_separator(self):
+        # The reference cannot convert numbers with thousands separators,
+        # the commas are treated as value separators instead.
+        with self.assertRaises(ValueError):
+            parse_buffer_reference("1,234", 1)
+        np.testing.assert_array_equal(parse_buffer(b"1,234", 1)[:, 0], [1, 234])
+
+
+class ParseBinaryBufferTestCase(unittest.TestCase):
+    def test_no_copy(self):
+        expected = np.arange(12, dtype=">f8")
+        block = bytearray(expected.tobytes())
+        values = parse_binary_buffer(block, num_categories=3)
+        self.assertEqual(values.shape, (4, 3))
+        np.testing.assert_array_equal(values.ravel(), expected)
+        block[:8] = np.array([42], dtype=">f8").tobytes()
+        self.assertEqual(values[0, 0], 42)
+
+    def test_real32(self):
+        expected = np.array([0.5, -1.25, 3.0, 7.5], dtype=">f4")
+        values = parse_binary_buffer(
+            expected.tobytes(), num_categories=2, data_format=DataFormat.REAL32
+        )
+        np.testing.assert_array_equal(values, expected.reshape(2, 2))
+
+    def test_partial_row(self):
+        block = np.arange(5, dtype=">f8").tobytes()
+        values = parse_binary_buffer(block, num_categories=2)
+        np.testing.assert_array_equal(values[:, 0], [0, 2, 4])
+        np.testing.assert_array_equal(values[:, 1], [1, 3, np.nan])
+
+    def test_truncated_block(self):
+        with self.assertRaises(ValueError):
+            parse_binary_buffer(b"\x00" * 12)
+
+
+class StreamingBufferParserTestCase(unittest.TestCase):
+    def parse(self, reply, num_columns, piece_size):
+        store = ColumnStore(num_columns=num_columns, capacity=2)
+        parser = StreamingBufferParser(store)
+        for start in range(0, len(reply), piece_size):
+            parser.feed(reply[start : start + piece_size])
+        parser.close()
+        return store
+
+    def test_keysight_reply(self):
+        reply = KEYSIGHT_REPLY * 100
+        for piece_size in (1, 3, 7, 64, len(reply)):
+            store = self.parse(reply, num_columns=2, piece_size=piece_size)
+            self.assertEqual(len(store), 400)
+            np.testing.assert_array_equal(
+                store.columns[0][:4], [-1.2e-11, -1.0e-11, -1.4e-11, -1.3e-11]
+            )
+            np.testing.assert_array_equal(
+                store.columns[1][:4], [1.102e-02, 2.1117e-02, 3.1252e-02, 4.1366e-02]
+            )
+
+    def test_keithley_reply(self):
+        reply = MockKeithley().do_read_buffer().encode()
+        for piece_size in (1, 5, 4096):
+            store = self.parse(reply, num_columns=2, piece_size=piece_size)
+            self.assertEqual(len(store), 4000)
+            np.testing.assert_array_equal(store.columns[0], 0.01)
+            np.testing.assert_array_equal(store.columns[1], 0.33)
+
+    def test_partial_row(self):
+        store = self.parse(b"1,2,3,4,5", num_columns=2, piece_size=2)
+        self.assertEqual(len(store), 3)
+        np.testing.assert_array_equal(store.columns[0], [1, 3, 5])
+        np.testing.assert_array_equal(store.columns[1][:2], [2, 4])
+        self.assertTrue(np.isnan(store.columns[1][2]))
+
+
+class ColumnStoreTestCase(unittest.TestCase):
+    def test_extend(self):
+        store = ColumnStore(num_columns=3, capacity=1)
+        store.extend(np.arange(5))
+        store.extend(np.arange(5, 12))
+        self.assertEqual(len(store), 4)
+        self.assertGreaterEqual(store.capacity, 4)
+        np.testing.assert_array_equal(store.data, np.arange(12).reshape(4, 3))
+        self.assertTrue(np.shares_memory(store.columns[1], store.data))
+
+    def test_clear(self):
+        store = ColumnStore(num_columns=2)
+        store.extend([1, 2])
+        store.clear()
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store.data.shape, (0, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
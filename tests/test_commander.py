@@ -0,0 +1,215 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import unittest
+
+import numpy as np
+import parameterized
+from lsst.ts import electrometer
+from lsst.ts.electrometer.commander import Commander, batch_commands
+
+BRANDS = ["Keithley", "Keysight"]
+
+
+class CommanderTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = None
+        self.commander = None
+
+    async def asyncTearDown(self):
+        if self.commander is not None:
+            await self.commander.disconnect()
+        if self.server is not None:
+            await self.server.close()
+
+    async def make_commander(self, brand):
+        self.server = electrometer.MockServer(brand)
+        await self.server.start_task
+        self.commander = Commander(brand=brand)
+        self.commander.port = self.server.port
+        await self.commander.connect()
+        return self.commander
+
+    @parameterized.parameterized.expand(BRANDS)
+    async def test_send_command(self, brand):
+        commander = await self.make_commander(brand)
+        reply = await commander.send_command("*idn?;", has_reply=True)
+        self.assertIn(brand.upper(), reply.upper())
+        self.assertEqual(commander.read_buffer, b"")
+
+    @parameterized.parameterized.expand(BRANDS)
+    async def test_read_buffer(self, brand):
+        commander = await self.make_commander(brand)
+        commands = getattr(electrometer, f"{brand}ElectrometerCommandFactory")()
+        reply = await commander.send_command(commands.read_buffer(), has_reply=True)
+        self.assertEqual(reply.rstrip(), self.server.device.do_read_buffer().rstrip())
+        reply = await commander.send_command(":sens:func?;", has_reply=True)
+        self.assertEqual(reply, "CURR:1")
+
+    @parameterized.parameterized.expand(BRANDS)
+    async def test_read_buffer_range(self, brand):
+        commander = await self.make_commander(brand)
+        commands = getattr(electrometer, f"{brand}ElectrometerCommandFactory")()
+        expected = self.server.device.buffer_values()
+        quantity = await commander.send_command(
+            commands.get_buffer_quantity(), has_reply=True
+        )
+        values_per_reading = expected.size // int(quantity)
+        reply = await commander.send_command(
+            commands.read_buffer_range(start=10, count=5), has_reply=True
+        )
+        values = electrometer.parse_buffer(reply, num_categories=values_per_reading)
+        np.testing.assert_array_equal(
+            values, expected.reshape(-1, values_per_reading)[10:15]
+        )
+
+    @parameterized.parameterized.expand(BRANDS)
+    async def test_read_block(self, brand):
+        commander = await self.make_commander(brand)
+        commands = getattr(electrometer, f"{brand}ElectrometerCommandFactory")()
+        expected = self.server.device.buffer_values()
+        await commander.send_command(
+            commands.set_data_format(electrometer.DataFormat.REAL64), has_reply=False
+        )
+        block = await commander.send_command_block(
+            commands.read_buffer(), num_bytes=expected.size * 8
+        )
+        np.testing.assert_array_equal(np.frombuffer(block, dtype=">f8"), expected)
+        self.assertEqual(commander.read_buffer, b"")
+
+        await commander.send_command(
+            commands.set_data_format(electrometer.DataFormat.ASCII), has_reply=False
+        )
+        reply = await commander.send_command(":sens:func?;", has_reply=True)
+        self.assertEqual(reply, "CURR:1")
+
+    async def test_read_block_without_size(self):
+        commander = await self.make_commander("Keithley")
+        await commander.send_command(":form:data REAL,32;", has_reply=False)
+        with self.assertRaises(ValueError):
+            await commander.send_command_block(":trac:data?;")
+
+    @parameterized.parameterized.expand(BRANDS)
+    async def test_send_commands(self, brand):
+        commander = await self.make_commander(brand)
+        commands = getattr(electrometer, f"{brand}ElectrometerCommandFactory")()
+        replies = await commander.send_commands(
+            [
+                commands.get_hardware_info(),
+                commands.clear_buffer(),
+                commands.get_mode(),
+                commands.get_range(mode=electrometer.UnitMode.CURR),
+            ]
+            + [commands.get_mode()] * 40
+        )
+        self.assertEqual(len(replies), 43)
+        self.assertIn(brand.upper(), replies[0].upper())
+        self.assertEqual(replies[1], "CURR:1")
+        self.assertEqual(replies[2], "0.1")
+        self.assertEqual(replies[3:], ["CURR:1"] * 40)
+        self.assertEqual(commander.read_buffer, b"")
+
+    @parameterized.parameterized.expand(BRANDS)
+    async def test_send_plan(self, brand):
+        commander = await self.make_commander(brand)
+        commands = getattr(electrometer, f"{brand}ElectrometerCommandFactory")()
+        plan = electrometer.compile_plan(
+            [commands.clear_buffer(), commands.get_mode()],
+            commander.terminator,
+            commander.encoding,
+        )
+        replies = await commander.send_plan(plan)
+        self.assertEqual(replies, ["CURR:1"])
+        self.assertEqual(commander.read_buffer, b"")
+
+    async def test_leftover_bytes(self):
+        commander = await self.make_commander("Keithley")
+        async with commander.lock:
+            await commander.client.write(b"*idn?;\r:sens:func?;\r")
+            first = await commander.read_reply()
+            second = await commander.read_reply()
+        self.assertIn(b"KEITHLEY", first)
+        self.assertEqual(second, b"CURR:1")
+
+
+class BatchCommandsTestCase(unittest.TestCase):
+    def test_batch_commands(self):
+        lines = batch_commands(["*idn?;", ":trac:cle;", "ABOR", ":sens:func?;"])
+        self.assertEqual(lines, [("*idn?;:trac:cle;:ABOR;:sens:func?;", 2)])
+
+    def test_root_path(self):
+        keysight = electrometer.KeysightElectrometerCommandFactory()
+        lines = batch_commands(
+            [keysight.clear_buffer(), keysight.clear_array(), keysight.select_source()]
+        )
+        self.assertEqual(lines, [(":trac:cle;:sens:data:cle;:trig:sour TIM;", 0)])
+        keithley = electrometer.KeithleyElectrometerCommandFactory()
+        lines = batch_commands(
+            [
+                keithley.enable_display(False),
+                keithley.set_autodischarge("OFF"),
+                keithley.discharge_capacitor(),
+            ]
+        )
+        self.assertEqual(
+            lines, [(":disp:enab OFF;:sens:char:adis:stat OFF;:SYST:ZCH OFF;", 0)]
+        )
+
+    def test_line_breaks(self):
+        lines = batch_commands([":sens:CURR:rang:auto OFF;\n:sens:CURR:rang 0.1;"])
+        self.assertEqual(lines, [(":sens:CURR:rang:auto OFF;:sens:CURR:rang 0.1;", 0)])
+
+    def test_max_length(self):
+        lines = batch_commands([":sens:func?;"] * 5, max_length=30)
+        self.assertEqual(
+            lines,
+            [(":sens:func?;:sens:func?;", 2)] * 2 + [(":sens:func?;", 1)],
+        )
+
+
+class ScanPlanCacheTestCase(unittest.TestCase):
+    def test_compile_plan(self):
+        plan = electrometer.compile_plan(["*idn?;", ":trac:cle;"], b"\r", "utf-8")
+        self.assertEqual(plan.data, b"*idn?;:trac:cle;\r")
+        self.assertEqual(plan.num_queries, (1,))
+
+    def test_cache(self):
+        cache = electrometer.ScanPlanCache()
+        built = []
+
+        def build_commands():
+            built.append(None)
+            return [":sens:func?;"]
+
+        first = cache.get(("scan", "CURR"), build_commands, b"\r", "utf-8")
+        second = cache.get(("scan", "CURR"), build_commands, b"\r", "utf-8")
+        self.assertIs(first, second)
+        self.assertEqual(len(built), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        cache.get(("scan", "CURR"), build_commands, b"\r", "utf-8")
+        self.assertEqual(len(built), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
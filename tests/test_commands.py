@@ -87,6 +87,25 @@ class TestElectrometerCommandFactory(unittest.TestCase):
         reply = self.commands.read_buffer()
         self.assertEqual(reply, ":trac:data?;")
 
+    def test_read_buffer_range(self):
+        reply = self.commands.read_buffer_range(start=100, count=50)
+        self.assertEqual(reply, ":trac:data:sel? 100,50;")
+
+    def test_operation_complete(self):
+        self.assertEqual(self.commands.operation_complete(), "*OPC;")
+        self.assertEqual(self.commands.get_event_status(), "*ESR?;")
+        self.assertEqual(self.commands.get_status_byte(), "*STB?;")
+
+    def test_set_data_format(self):
+        reply = self.commands.set_data_format(enums.DataFormat.REAL64)
+        self.assertEqual(reply, ":form:data REAL,64;")
+        reply = self.commands.set_data_format(enums.DataFormat.ASCII)
+        self.assertEqual(reply, ":form:data ASC;")
+
+    def test_set_byte_order(self):
+        reply = self.commands.set_byte_order()
+        self.assertEqual(reply, ":form:bord NORM;")
+
     def test_reset_device(self):
         reply = self.commands.reset_device()
         self.assertEqual(reply, "*RST; :trac:cle;")
@@ -0,0 +1,298 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import pathlib
+import tempfile
+import types
+import unittest
+import unittest.mock
+
+import numpy as np
+import parameterized
+import yaml
+from lsst.ts import electrometer
+from lsst.ts.electrometer.controller import BUFFER_SIZE, KEYSIGHT_BUFFER_SIZE
+
+CONFIG_PATH = pathlib.Path(__file__).parent / "data" / "config" / "_init.yaml"
+
+
+def make_config(brand):
+    """Return the configuration of the test instance of a brand, with the
+    defaults of the schema filled in.
+    """
+    with open(CONFIG_PATH) as f:
+        instances = yaml.safe_load(f)["instances"]
+    instance = next(
+        instance for instance in instances if instance["electrometer_type"] == brand
+    )
+    properties = electrometer.CONFIG_SCHEMA["properties"]["instances"]["items"][
+        "properties"
+    ]
+    for name, schema in properties.items():
+        if "default" in schema:
+            instance.setdefault(name, schema["default"])
+    return types.SimpleNamespace(**instance)
+
+
+class DrainBufferTestCase(unittest.IsolatedAsyncioTestCase):
+    def make_controller(self, brand):
+        controller = getattr(electrometer, f"{brand}ElectrometerController")(csc=None)
+        controller.electrometer_type = brand
+        controller.model_id = "test"
+        controller.drain_store = electrometer.ColumnStore(num_columns=1)
+        controller.get_buffer_quantity = unittest.mock.AsyncMock()
+        controller.send_command = unittest.mock.AsyncMock()
+        controller.commander.send_command_streaming = unittest.mock.AsyncMock()
+        return controller
+
+    @parameterized.parameterized.expand(
+        [
+            ("Keithley", BUFFER_SIZE, ":trac:cle;"),
+            ("Keysight", KEYSIGHT_BUFFER_SIZE, "sens:data:cle;"),
+        ]
+    )
+    async def test_recycle(self, brand, buffer_size, clear_command):
+        controller = self.make_controller(brand)
+        self.assertEqual(controller.buffer_size, buffer_size)
+
+        # Not full: the buffer keeps filling.
+        for num_readings in [BUFFER_SIZE // 2, buffer_size - 1]:
+            controller.get_buffer_quantity.return_value = num_readings
+            await controller.drain_buffer()
+            self.assertEqual(controller.drained_readings, num_readings)
+        controller.send_command.assert_not_awaited()
+
+        # Full: the buffer is cleared, and read from the start again.
+        controller.get_buffer_quantity.return_value = buffer_size
+        self.assertEqual(await controller.drain_buffer(), 1)
+        controller.send_command.assert_awaited_once()
+        self.assertIn(clear_command, controller.send_command.await_args.args[0])
+        self.assertEqual(controller.drained_readings, 0)
+
+        controller.get_buffer_quantity.return_value = 10
+        self.assertEqual(await controller.drain_buffer(), 10)
+        self.assertEqual(controller.drained_readings, 10)
+
+
+class ScanPlanTestCase(unittest.IsolatedAsyncioTestCase):
+    def make_controller(self, brand):
+        controller = getattr(electrometer, f"{brand}ElectrometerController")(csc=None)
+        controller.configure(make_config(brand))
+        self.addCleanup(controller.fits_executor.shutdown)
+        controller.mode = "CHAR"
+        controller.commander.send_plan = unittest.mock.AsyncMock(return_value=[])
+        controller.wait_until_ready = unittest.mock.AsyncMock(return_value=True)
+        controller.check_error = unittest.mock.AsyncMock(return_value=True)
+        controller.get_mode = unittest.mock.AsyncMock()
+        controller.get_range = unittest.mock.AsyncMock()
+        return controller
+
+    async def get_plan_data(self, controller, coro):
+        """Await ``coro`` twice, returning the data of the plans sent."""
+        data = []
+        for _ in range(2):
+            await coro()
+            data.append(controller.commander.send_plan.await_args.args[0].data)
+        return data
+
+    @parameterized.parameterized.expand(
+        [
+            (
+                "Keithley",
+                b":trac:cle;:trac:cle;:trac:points 50000;:trig:count 50000;"
+                b":trig:sour TIM;:trig:coun INF;:disp:enab OFF;"
+                b":sens:char:adis:stat OFF;:SYST:ZCH OFF;:trac:feed:cont NEXT;"
+                b":trac:feed:cont NEXT;:init;\r",
+                b":syst:zch ON;:sens:func 'CHAR';:sens:CHAR:rang:auto OFF;"
+                b":sens:CHAR:rang 2e-08;:syst:zch OFF;\r",
+            ),
+            (
+                "Keysight",
+                b":trac:cle;:sens:data:cle;:trig:sour TIM;:trig:coun INF;"
+                b":disp:enab OFF;:sens:char:adis:stat OFF;:SENS:CHAR:DISC;"
+                b":trac:feed:cont NEXT;:init:acq;\r\n",
+                b":sens:func:on 'CHAR';:inp on;:sens:CHAR:rang:auto OFF;"
+                b":sens:CHAR:rang 2e-08;\r\n",
+            ),
+        ]
+    )
+    async def test_plans(self, brand, start_scan, zero_calibration):
+        controller = self.make_controller(brand)
+
+        async def send_start_scan_plan():
+            await controller.send_plan(
+                controller.get_plan_key("start_scan"),
+                controller.get_start_scan_commands,
+            )
+
+        # The cached plan is sent the second time.
+        self.assertEqual(
+            await self.get_plan_data(controller, send_start_scan_plan),
+            [start_scan] * 2,
+        )
+        self.assertEqual(
+            await self.get_plan_data(controller, controller.perform_zero_calibration),
+            [zero_calibration] * 2,
+        )
+        self.assertEqual(controller.scan_plans.misses, 2)
+        self.assertEqual(controller.scan_plans.hits, 2)
+
+
+class SkippedSettingTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.csc = types.SimpleNamespace(
+            evt_measureType=types.SimpleNamespace(set_write=unittest.mock.AsyncMock()),
+            evt_measureRange=types.SimpleNamespace(set_write=unittest.mock.AsyncMock()),
+        )
+        self.controller = electrometer.KeithleyElectrometerController(csc=self.csc)
+        self.controller.mode = "CHAR"
+        self.controller.range = 2e-8
+        self.controller.perform_zero_calibration = unittest.mock.AsyncMock()
+        self.controller.record_settings(
+            mode="CHAR", range=self.controller.get_range_setting(False, 2e-8)
+        )
+
+    async def test_set_mode(self):
+        await self.controller.set_mode("CHAR")
+        self.controller.perform_zero_calibration.assert_not_awaited()
+        self.csc.evt_measureType.set_write.assert_awaited_once_with(
+            mode=2, force_output=True
+        )
+
+    async def test_set_range(self):
+        await self.controller.set_range(2e-8)
+        self.controller.perform_zero_calibration.assert_not_awaited()
+        self.csc.evt_measureRange.set_write.assert_awaited_once_with(
+            rangeValue=2e-8, force_output=True
+        )
+
+
+class ReadyTimeoutTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.controller = electrometer.KeithleyElectrometerController(csc=None)
+        self.controller.electrometer_type = "Keithley"
+        self.controller.mode = "CURR"
+        self.controller.auto_range = False
+        self.controller.range = 2e-8
+        self.controller.manual_start_time = 1.8e9
+        self.controller.send_plan = unittest.mock.AsyncMock()
+        self.controller.send_command = unittest.mock.AsyncMock()
+        self.controller.wait_until_ready = unittest.mock.AsyncMock(return_value=False)
+        self.controller.check_error = unittest.mock.AsyncMock(return_value=True)
+        self.controller.read_buffer = unittest.mock.AsyncMock()
+        self.controller.write_fits_file = unittest.mock.AsyncMock()
+
+    async def test_perform_zero_calibration(self):
+        self.controller.record_settings(mode="CHAR")
+        with self.assertRaises(RuntimeError):
+            await self.controller.perform_zero_calibration()
+        # The settings are not known anymore.
+        self.assertNotIn("mode", self.controller.instrument_state)
+        self.controller.check_error.assert_not_awaited()
+
+    async def test_stop_scan(self):
+        with self.assertRaises(RuntimeError):
+            await self.controller.stop_scan()
+        self.controller.read_buffer.assert_not_awaited()
+        self.controller.write_fits_file.assert_not_awaited()
+
+
+class LocalBucket:
+    """Local stand-in for the LFA bucket."""
+
+    def __init__(self):
+        self.files = {}
+
+    def make_key(self, salname, salindexname, generator, date, other, suffix):
+        return f"{salname}:{salindexname}/{generator}/{other}{suffix}"
+
+    async def upload(self, fileobj, key):
+        self.files[key] = fileobj.read()
+        return f"https://lfa/{key}"
+
+
+class FitsUploadTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.directory.name)
+        self.csc = types.SimpleNamespace(
+            bucket=LocalBucket(),
+            salinfo=types.SimpleNamespace(name="Electrometer", index=1),
+            evt_largeFileObjectAvailable=types.SimpleNamespace(
+                set_write=unittest.mock.AsyncMock()
+            ),
+        )
+        self.controller = electrometer.KeithleyElectrometerController(csc=self.csc)
+        config = make_config("Keithley")
+        config.fits_file_path = self.directory.name
+        self.controller.configure(config)
+        self.controller.manual_start_time = 1.8e9
+        self.controller.manual_end_time = 1.8e9 + 1
+        self.controller.scan_duration = 1
+        self.controller.obs_id_pool = electrometer.ObsIdPool(
+            self.get_next_obs_id, size=0
+        )
+
+    async def asyncTearDown(self):
+        self.controller.fits_executor.shutdown()
+        self.directory.cleanup()
+
+    async def get_next_obs_id(self, num_images):
+        return [1], ["EM1_O_20261016_000001"]
+
+    async def write_fits_file(self):
+        signal = np.linspace(1e-9, 2e-9, 100)
+        times = np.arange(100) * 0.01
+        await self.controller.write_fits_file([signal, times], ["CURR", "TIME"])
+        async with asyncio.timeout(10):
+            await self.controller.upload_spool.join()
+        await self.controller.upload_spool.stop()
+
+    async def test_spool(self):
+        await self.controller.upload_spool.start()
+        await self.write_fits_file()
+        self.assertEqual(
+            list(self.csc.bucket.files),
+            ["Electrometer:1/fits/EM1_O_20261016_000001.fits"],
+        )
+        self.csc.evt_largeFileObjectAvailable.set_write.assert_awaited_once()
+        self.assertEqual(list((self.path / "upload_spool").iterdir()), [])
+
+    async def test_spool_not_writable(self):
+        # The spool cannot be made where a file is.
+        (self.path / "upload_spool").write_bytes(b"")
+        await self.controller.upload_spool.start()
+        await self.write_fits_file()
+        (data,) = self.csc.bucket.files.values()
+        self.assertTrue(data.startswith(b"SIMPLE"))
+        self.csc.evt_largeFileObjectAvailable.set_write.assert_awaited_once()
+
+    async def test_event_failure(self):
+        self.csc.evt_largeFileObjectAvailable.set_write.side_effect = RuntimeError(
+            "Event failed"
+        )
+        await self.controller.upload_spool.start()
+        await self.write_fits_file()
+        # The file is not uploaded again because the event failed.
+        self.assertEqual(len(self.csc.bucket.files), 1)
+        self.assertEqual(self.controller.upload_spool.uploaded, 1)
+        self.assertEqual(self.controller.upload_spool.failed_attempts, 0)
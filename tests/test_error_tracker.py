@@ -0,0 +1,71 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import unittest
+
+from lsst.ts.electrometer import ErrorTracker
+
+
+class ErrorTrackerTestCase(unittest.TestCase):
+    def test_needs_status(self):
+        tracker = ErrorTracker()
+        self.assertFalse(tracker.needs_status)
+        tracker.sent(":sens:func:on 'CURR';", "*OPC;", "*ESR?;")
+        self.assertTrue(tracker.needs_status)
+        # The operation complete bit alone is not an error.
+        tracker.read_event_status(1)
+        self.assertFalse(tracker.needs_status)
+        self.assertFalse(tracker.has_error)
+        tracker.sent(":sens:CURR:rang:auto ON;")
+        self.assertTrue(tracker.needs_status)
+        tracker.read_status_byte(0)
+        self.assertFalse(tracker.needs_status)
+        self.assertFalse(tracker.has_error)
+        tracker.checked()
+        self.assertEqual(tracker.unchecked, [])
+        self.assertEqual(tracker.num_checks, 1)
+        self.assertEqual(tracker.num_status_queries, 1)
+
+    def test_errors(self):
+        tracker = ErrorTracker()
+        tracker.sent(":sens:func:on 'AMPS';")
+        tracker.read_event_status(1 | 0b10_0000)
+        self.assertTrue(tracker.has_error)
+        tracker.add_error("set_mode", -113, '"Undefined header"')
+        tracker.checked()
+        self.assertFalse(tracker.has_error)
+
+        tracker.sent(":sens:CURR:rang 3;")
+        tracker.read_status_byte(0b100)
+        self.assertTrue(tracker.has_error)
+        tracker.add_error("set_range", -222, '"Data out of range"')
+        tracker.add_error("set_range", -222, '"Data out of range"')
+        tracker.checked()
+
+        self.assertEqual(tracker.counts, {"set_mode": 1, "set_range": 2})
+        self.assertEqual(tracker.num_errors, 3)
+        self.assertEqual(tracker.recent[0].commands, [":sens:func:on 'AMPS';"])
+        self.assertEqual(tracker.recent[-1].error_code, -222)
+
+
+if __name__ == "__main__":
+    unittest.main()
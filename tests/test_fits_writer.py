@@ -0,0 +1,130 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import gzip
+import io
+import pathlib
+import tempfile
+import unittest
+
+import astropy.io.fits as fits
+import numpy as np
+from astropy import table
+from lsst.ts.electrometer import BufferReader, encode_fits, write_fits
+
+NAMES = ["Signal", "RNUM", "Elapsed Time"]
+META = {"name": "Single Electrometer scan readout"}
+
+
+class FitsWriterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.primary_hdu = fits.PrimaryHDU()
+        self.primary_hdu.header["OBSID"] = "EM1_O_20261016_000001"
+
+    def encode_qtable(self, columns):
+        file = io.BytesIO()
+        table_hdu = fits.table_to_hdu(
+            table.QTable(data=dict(zip(NAMES, columns)), meta=META)
+        )
+        fits.HDUList([self.primary_hdu, table_hdu]).writeto(file)
+        return file.getvalue()
+
+    def test_matches_qtable(self):
+        for num_rows in [0, 1, 1000]:
+            with self.subTest(num_rows=num_rows):
+                columns = np.random.default_rng(seed=1).normal(
+                    size=(len(NAMES), num_rows)
+                )
+                file = encode_fits(self.primary_hdu.header, columns, NAMES, META)
+                self.assertEqual(bytes(file), self.encode_qtable(columns))
+
+    def test_read_back(self):
+        columns = np.arange(30, dtype=float).reshape(len(NAMES), -1)
+        file = encode_fits(self.primary_hdu.header, columns, NAMES, META)
+        with fits.open(io.BytesIO(file)) as hdul:
+            hdul.verify("exception")
+            self.assertEqual(hdul[0].header["OBSID"], "EM1_O_20261016_000001")
+            self.assertEqual(hdul[1].header["NAME"], META["name"])
+            for name, column in zip(NAMES, columns):
+                np.testing.assert_array_equal(hdul[1].data[name], column)
+
+    def test_reuse_buffer(self):
+        buffer = bytearray()
+        rng = np.random.default_rng(seed=1)
+        for num_rows in [1000, 10, 2000]:
+            with self.subTest(num_rows=num_rows):
+                columns = rng.normal(size=(len(NAMES), num_rows))
+                with encode_fits(
+                    self.primary_hdu.header, columns, NAMES, META, buffer
+                ) as file:
+                    self.assertEqual(bytes(file), self.encode_qtable(columns))
+        # The buffer only grows to fit the largest file.
+        self.assertEqual(len(buffer), len(self.encode_qtable(columns)))
+
+    def test_write_fits(self):
+        columns = np.arange(3000, dtype=float).reshape(len(NAMES), -1)
+        file = encode_fits(self.primary_hdu.header, columns, NAMES, META)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir) / "file.fits"
+            write_fits(path, file)
+            self.assertEqual(path.read_bytes(), bytes(file))
+
+            path = pathlib.Path(tmpdir) / "file.fits.gz"
+            write_fits(path, file, "gzip", level=1)
+            self.assertLess(path.stat().st_size, len(file))
+            with fits.open(path) as hdul:
+                np.testing.assert_array_equal(hdul[1].data["RNUM"], columns[1])
+            self.assertEqual(gzip.decompress(path.read_bytes()), bytes(file))
+
+            with self.assertRaises(ValueError):
+                write_fits(path, file, "bzip2")
+
+    def test_buffer_reader(self):
+        buffer = bytearray()
+        columns = np.arange(3000, dtype=float).reshape(len(NAMES), -1)
+        with encode_fits(self.primary_hdu.header, columns, NAMES, META, buffer) as file:
+            with BufferReader(file) as reader:
+                self.assertEqual(reader.read(10), bytes(file[:10]))
+                self.assertEqual(reader.tell(), 10)
+                self.assertEqual(reader.read(), bytes(file[10:]))
+                self.assertEqual(reader.read(), b"")
+                self.assertEqual(reader.seek(-10, io.SEEK_END), len(file) - 10)
+                self.assertEqual(reader.read(20), bytes(file[-10:]))
+                reader.seek(0)
+                with fits.open(reader) as hdul:
+                    np.testing.assert_array_equal(hdul[1].data["RNUM"], columns[1])
+            with self.assertRaises(ValueError):
+                reader.read()
+        # Closed, the reader no longer holds the buffer.
+        buffer.extend(b"\0")
+
+    def test_bad_columns(self):
+        columns = np.zeros((len(NAMES), 10))
+        with self.assertRaises(ValueError):
+            encode_fits(self.primary_hdu.header, columns, NAMES[:2])
+        with self.assertRaises(ValueError):
+            encode_fits(
+                self.primary_hdu.header, [columns[0], columns[1][:5]], NAMES[:2]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
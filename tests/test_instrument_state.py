@@ -0,0 +1,58 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import unittest
+
+from lsst.ts.electrometer import InstrumentState
+
+
+class InstrumentStateTestCase(unittest.TestCase):
+    def test_matches(self):
+        state = InstrumentState()
+        self.assertFalse(state.matches("mode", "CURR"))
+        state.update(mode="CURR")
+        self.assertFalse(state.matches("mode", "CHAR"))
+        self.assertTrue(state.matches("mode", "CURR"))
+        self.assertTrue(state.matches("mode", "CURR"))
+        self.assertEqual(state.skipped, {"mode": 2})
+        self.assertEqual(state.num_skipped, 2)
+
+    def test_lookup(self):
+        state = InstrumentState()
+        self.assertIsNone(state.lookup("trace_elements"))
+        state.update(trace_elements=("READ", "TST"))
+        self.assertEqual(state.lookup("trace_elements"), ("READ", "TST"))
+        self.assertEqual(state.get("trace_elements"), ("READ", "TST"))
+        self.assertEqual(state.num_skipped, 1)
+
+    def test_forget(self):
+        state = InstrumentState()
+        state.update(mode="CURR", nplc=("CURR", 1))
+        state.update(nplc=None)
+        self.assertNotIn("nplc", state)
+        self.assertIn("mode", state)
+        state.invalidate()
+        self.assertEqual(len(state), 0)
+        self.assertFalse(state.matches("mode", "CURR"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import math
+import unittest
+
+import numpy as np
+from lsst.ts.electrometer import IntensityWindow
+
+
+class IntensityWindowTestCase(unittest.TestCase):
+    def test_add(self):
+        window = IntensityWindow()
+        self.assertEqual(window.count, 0)
+        self.assertTrue(math.isnan(window.mean))
+
+        window.add(np.array([2.0, -1.0, 5.0]))
+        window.add(3.0)
+        window.add(np.array([]))
+        self.assertEqual(window.count, 4)
+        self.assertEqual(window.min, -1)
+        self.assertEqual(window.max, 5)
+        self.assertEqual(window.mean, 2.25)
+        self.assertEqual(window.last, 3)
+
+    def test_clear(self):
+        window = IntensityWindow()
+        window.add([1.0, 2.0])
+        window.clear()
+        self.assertEqual(window.count, 0)
+        window.add([4.0])
+        self.assertEqual((window.min, window.max, window.last), (4, 4, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
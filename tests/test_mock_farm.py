@@ -0,0 +1,135 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import pathlib
+import tempfile
+import unittest
+
+import yaml
+from lsst.ts import electrometer
+from lsst.ts.electrometer.commander import Commander
+
+CONFIG_PATH = pathlib.Path(__file__).parent / "data" / "config" / "_init.yaml"
+
+
+class MockFarmTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.farm = None
+        self.commanders = []
+
+    async def asyncTearDown(self):
+        for commander in self.commanders:
+            await commander.disconnect()
+        if self.farm is not None:
+            await self.farm.close()
+
+    async def connect(self, sal_index):
+        commander = Commander(brand=self.farm.servers[sal_index].brand)
+        commander.port = self.farm.ports[sal_index]
+        await commander.connect()
+        self.commanders.append(commander)
+        return commander
+
+    async def test_farm(self):
+        self.farm = electrometer.MockFarm.from_config(CONFIG_PATH, base_port=0)
+        await self.farm.start()
+        self.assertEqual(list(self.farm.servers), [101, 102, 103, 201])
+        self.assertEqual(len(set(self.farm.ports.values())), 4)
+
+        commanders = [await self.connect(sal_index) for sal_index in self.farm.servers]
+        replies = await asyncio.gather(
+            *[
+                commander.send_command("*idn?;", has_reply=True)
+                for commander in commanders
+            ]
+        )
+        for commander, reply in zip(commanders, replies):
+            self.assertIn(commander.brand.upper(), reply.upper())
+
+        stats = self.farm.get_stats()
+        self.assertEqual(stats.num_connected, 4)
+        self.assertGreater(stats.reply_rate, 0)
+        self.assertGreaterEqual(stats.max_lag, stats.mean_lag)
+
+        instances = self.farm.get_instances()
+        self.assertEqual(
+            [instance["tcpip"]["port"] for instance in instances],
+            list(self.farm.ports.values()),
+        )
+        self.assertEqual(instances[0]["sensor"]["model"], "S2281")
+
+    async def test_signal(self):
+        self.farm = electrometer.MockFarm.from_config(
+            CONFIG_PATH, indices=[103], base_port=0, signal=True
+        )
+        await self.farm.start()
+        self.assertIsNotNone(self.farm.servers[103].device.buffer.generator)
+
+    def test_bad_instances(self):
+        with self.assertRaisesRegex(ValueError, "port"):
+            electrometer.MockFarm.from_config(CONFIG_PATH)
+        with self.assertRaisesRegex(ValueError, "999"):
+            electrometer.MockFarm.from_config(CONFIG_PATH, indices=[101, 999])
+        with self.assertRaisesRegex(ValueError, "electrometer_type"):
+            electrometer.MockFarm([{"sal_index": 1, "tcpip": {"port": 0}}])
+        instance = {"sal_index": 1, "electrometer_type": "Keithley"}
+        with self.assertRaisesRegex(ValueError, "sal_index"):
+            electrometer.MockFarm(
+                [dict(instance, tcpip={"port": 0}), dict(instance, tcpip={"port": 0})]
+            )
+        # The ports in the file are not used when ports are assigned.
+        farm = electrometer.MockFarm.from_config(CONFIG_PATH, base_port=5000)
+        self.assertEqual(list(farm.ports.values()), [5000, 5001, 5002, 5003])
+
+    async def test_amain(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = pathlib.Path(tmpdir) / "_init.yaml"
+            task = asyncio.create_task(
+                electrometer.MockFarm.amain(
+                    [
+                        str(CONFIG_PATH),
+                        "--index",
+                        "103",
+                        "201",
+                        "--base-port",
+                        "0",
+                        "--output",
+                        str(output),
+                        "--stats-interval",
+                        "0.1",
+                    ]
+                )
+            )
+            try:
+                async with asyncio.timeout(5):
+                    while not output.exists():
+                        await asyncio.sleep(0.05)
+                    await asyncio.sleep(0.2)
+                config = await asyncio.to_thread(output.read_text)
+                instances = yaml.safe_load(config)["instances"]
+            finally:
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+        self.assertEqual([instance["sal_index"] for instance in instances], [103, 201])
+        for instance in instances:
+            self.assertNotEqual(instance["tcpip"]["port"], 0)
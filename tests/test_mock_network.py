@@ -0,0 +1,166 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+import unittest
+
+from lsst.ts import electrometer
+from lsst.ts.electrometer.commander import Commander
+
+CONNECTION_ERRORS = (TimeoutError, ConnectionError, asyncio.IncompleteReadError)
+
+
+class NetworkProfileTestCase(unittest.TestCase):
+    def test_ideal(self):
+        plan = electrometer.NETWORK_PROFILES["ideal"].plan_reply(100)
+        self.assertEqual(plan.delay, 0)
+        self.assertFalse(plan.stalled)
+        self.assertEqual(plan.pieces, [100])
+        self.assertIsNone(plan.drop_at)
+
+    def test_plan_reply(self):
+        profile = electrometer.NetworkProfile(
+            latency=0.1,
+            jitter=0.05,
+            drop_probability=0.2,
+            partial_write_probability=0.5,
+            stall_probability=0.1,
+            stall_duration=10,
+            seed=1,
+        )
+        plans = [profile.plan_reply(num_bytes) for num_bytes in range(1, 1001)]
+        for num_bytes, plan in enumerate(plans, start=1):
+            self.assertEqual(sum(plan.pieces), num_bytes)
+            self.assertTrue(all(piece > 0 for piece in plan.pieces))
+            self.assertLessEqual(
+                len(plan.pieces), electrometer.mock_network.MAX_PARTIAL_WRITES
+            )
+            self.assertGreaterEqual(plan.delay, 0.1 + 10 * plan.stalled)
+            self.assertLessEqual(plan.delay, 0.15 + 10 * plan.stalled)
+            if plan.drop_at is not None:
+                self.assertLess(plan.drop_at, num_bytes)
+        self.assertTrue(any(len(plan.pieces) > 1 for plan in plans))
+        self.assertTrue(any(plan.drop_at is not None for plan in plans))
+        self.assertTrue(any(plan.stalled for plan in plans))
+
+    def test_seed(self):
+        kwargs = dict(jitter=1, drop_probability=0.5, partial_write_probability=0.5)
+        profiles = [electrometer.NetworkProfile(seed=5, **kwargs) for _ in range(2)]
+        self.assertEqual(
+            [vars(profiles[0].plan_reply(50)) for _ in range(20)],
+            [vars(profiles[1].plan_reply(50)) for _ in range(20)],
+        )
+
+    def test_chunk_size(self):
+        self.assertIsNone(electrometer.NetworkProfile().get_chunk_size())
+        self.assertEqual(
+            electrometer.NETWORK_PROFILES["moxa"].get_chunk_size(),
+            int(5760 * electrometer.mock_network.BANDWIDTH_TICK),
+        )
+        self.assertEqual(electrometer.NetworkProfile(bandwidth=1).get_chunk_size(), 1)
+
+
+class MockServerNetworkTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = None
+        self.commander = None
+
+    async def asyncTearDown(self):
+        if self.commander is not None:
+            await self.commander.disconnect()
+        if self.server is not None:
+            await self.server.close()
+
+    async def make_commander(self, profile):
+        self.server = electrometer.MockServer("Keithley", profile=profile)
+        await self.server.start_task
+        self.commander = Commander(brand="Keithley")
+        self.commander.port = self.server.port
+        await self.commander.connect()
+        return self.commander
+
+    async def test_unstable(self):
+        for unstable, profile in [
+            (True, electrometer.NETWORK_PROFILES["unstable"]),
+            (False, None),
+        ]:
+            self.server = electrometer.MockServer("Keithley", unstable=unstable)
+            await self.server.start_task
+            self.assertIs(self.server.profile, profile)
+            await self.server.close()
+
+    async def test_latency(self):
+        commander = await self.make_commander(electrometer.NetworkProfile(latency=0.2))
+        t0 = time.monotonic()
+        reply = await commander.send_command(":sens:func?;", has_reply=True)
+        self.assertGreaterEqual(time.monotonic() - t0, 0.2)
+        self.assertEqual(reply, "CURR:1")
+        # Commands without a reply are not delayed.
+        t0 = time.monotonic()
+        await commander.send_command(":sens:func 'CURR';", has_reply=False)
+        self.assertLess(time.monotonic() - t0, 0.2)
+
+    async def test_bandwidth(self):
+        bandwidth = 20000
+        commander = await self.make_commander(
+            electrometer.NetworkProfile(bandwidth=bandwidth)
+        )
+        commands = electrometer.KeithleyElectrometerCommandFactory()
+        expected = self.server.device.do_read_buffer().rstrip()
+        t0 = time.monotonic()
+        reply = await commander.send_command(commands.read_buffer(), has_reply=True)
+        duration = time.monotonic() - t0
+        self.assertEqual(reply.rstrip(), expected)
+        self.assertGreaterEqual(duration, len(expected) / bandwidth * 0.9)
+        self.assertEqual(self.server.network_stats.replies, 1)
+
+    async def test_partial_writes(self):
+        commander = await self.make_commander(
+            electrometer.NetworkProfile(partial_write_probability=1, seed=2)
+        )
+        commands = electrometer.KeithleyElectrometerCommandFactory()
+        expected = self.server.device.do_read_buffer().rstrip()
+        for _ in range(5):
+            reply = await commander.send_command(commands.read_buffer(), has_reply=True)
+            self.assertEqual(reply.rstrip(), expected)
+        self.assertEqual(self.server.network_stats.partial, 5)
+
+    async def test_stall(self):
+        commander = await self.make_commander(
+            electrometer.NetworkProfile(stall_probability=1, stall_duration=10)
+        )
+        with self.assertRaises(TimeoutError):
+            await commander.send_command(":sens:func?;", has_reply=True, timeout=0.2)
+        self.assertEqual(self.server.network_stats.stalled, 1)
+
+    async def test_drop(self):
+        profile = electrometer.NetworkProfile(drop_probability=1, seed=3)
+        commander = await self.make_commander(profile)
+        with self.assertRaises(CONNECTION_ERRORS):
+            await commander.send_command(":sens:func?;", has_reply=True, timeout=1)
+        self.assertEqual(self.server.network_stats.dropped, 1)
+
+        profile.drop_probability = 0
+        await commander.disconnect()
+        await commander.connect()
+        reply = await commander.send_command(":sens:func?;", has_reply=True)
+        self.assertEqual(reply, "CURR:1")
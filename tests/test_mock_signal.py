@@ -0,0 +1,146 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import unittest
+
+import numpy as np
+from lsst.ts import electrometer
+
+
+class FakeClock:
+    def __init__(self):
+        self.time = 100.0
+
+    def __call__(self):
+        return self.time
+
+
+class SignalGeneratorTestCase(unittest.TestCase):
+    def test_steps(self):
+        generator = electrometer.SignalGenerator(
+            level=1e-9, noise=0, steps=[(2, 5e-9), (1, 3e-9)]
+        )
+        np.testing.assert_array_equal(
+            generator.get_signal([0, 0.5, 1, 1.5, 2, 10]),
+            [1e-9, 1e-9, 3e-9, 3e-9, 5e-9, 5e-9],
+        )
+
+    def test_noise(self):
+        generator = electrometer.SignalGenerator(level=1e-9, noise=1e-12, seed=1)
+        signal = generator.get_signal(np.arange(10000) * 0.01)
+        self.assertAlmostEqual(signal.mean() / 1e-9, 1, places=3)
+        self.assertAlmostEqual(signal.std() / 1e-12, 1, places=1)
+
+    def test_saturation(self):
+        generator = electrometer.SignalGenerator(
+            level=1e-3, noise=0, steps=[(1, -1e-1)], saturation_level=2e-2
+        )
+        np.testing.assert_array_equal(generator.get_signal([0, 1]), [1e-3, -9.9e37])
+
+    def test_readings(self):
+        generator = electrometer.SignalGenerator(level=1e-9, noise=0)
+        readings = generator.get_readings(["TST", " ETEM", " VSO", " CURR"], [0, 0.5])
+        np.testing.assert_array_equal(readings, [[0, 23, 0, 1e-9], [0.5, 23, 0, 1e-9]])
+
+
+class MockBufferTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.generator = electrometer.SignalGenerator(level=1e-9, noise=0)
+
+    def make_buffer(self, **kwargs):
+        return electrometer.MockBuffer(
+            self.generator, elements=["TST", "CURR"], clock=self.clock, **kwargs
+        )
+
+    def test_fill(self):
+        buffer = self.make_buffer()
+        buffer.nplc = 6
+        self.assertEqual(buffer.interval, 0.1)
+        self.assertEqual(len(buffer), 0)
+        buffer.start()
+        self.assertEqual(len(buffer), 1)
+        self.clock.time += 1.05
+        self.assertEqual(len(buffer), 11)
+        np.testing.assert_allclose(buffer.get_readings()[:, 0], np.arange(11) * 0.1)
+        buffer.stop()
+        self.clock.time += 1
+        self.assertEqual(len(buffer), 11)
+        buffer.clear()
+        self.assertEqual(len(buffer), 0)
+
+    def test_timer(self):
+        buffer = self.make_buffer()
+        buffer.aperture = 0.01
+        buffer.trigger_source = "TIM"
+        buffer.timer = 0.5
+        buffer.start()
+        self.clock.time += 2
+        self.assertEqual(len(buffer), 5)
+
+    def test_capacity(self):
+        buffer = self.make_buffer(capacity=100_000)
+        buffer.aperture = 1e-3
+        buffer.start()
+        self.clock.time += 1000
+        self.assertEqual(len(buffer), 100_000)
+
+
+class MockDeviceTestCase(unittest.TestCase):
+    def test_keithley(self):
+        clock = FakeClock()
+        generator = electrometer.SignalGenerator(level=1e-9, noise=0)
+        device = electrometer.MockKeithley(generator=generator)
+        device.buffer.clock = clock
+        device.parse_message(":sens:curr:nplc 1.2")
+        device.parse_message(":trig:sour IMM")
+        device.parse_message(":init")
+        clock.time += 1
+        self.assertEqual(device.parse_message(":trac:poin:act?"), "51")
+        self.assertEqual(device.parse_message(":sens:data:latest?"), "+1.000000E-09")
+        device.parse_message(":form:data REAL,64")
+        readings = device.buffer_readings()
+        self.assertEqual(readings.shape, (51, 2))
+        np.testing.assert_array_equal(readings[:, 1], 1e-9)
+        self.assertEqual(device.parse_message(":trac:feed:cont NEV"), None)
+        clock.time += 1
+        self.assertEqual(device.do_get_buffer_quantity(), "51")
+
+    def test_keysight(self):
+        clock = FakeClock()
+        generator = electrometer.SignalGenerator(level=1e-9, noise=0)
+        device = electrometer.MockKeysight(generator=generator)
+        device.buffer.clock = clock
+        device.parse_message(":sens:CURR:aper 0.01")
+        device.parse_message(":trig:tim 0.020")
+        device.parse_message(":trig:sour TIM")
+        device.parse_message(":init:acq")
+        clock.time += 1
+        self.assertEqual(device.parse_message(":trac:poin:act?"), "51")
+        reply = device.parse_message(":sens:data? 10,2")
+        values = np.array(reply.split(","), dtype=float).reshape(-1, 4)
+        np.testing.assert_allclose(values[:, 0], [0.2, 0.22])
+        np.testing.assert_array_equal(values[:, 3], 1e-9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import unittest
+import unittest.mock
+
+from lsst.ts import electrometer
+
+STD_TIMEOUT = 10
+
+
+class LocalNameService:
+    """Local stand-in for the image name service.
+
+    Parameters
+    ----------
+    delay : `float`
+        How long each request takes (s).
+    """
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.available = True
+        self.requests = []
+        self.sequence_number = 0
+
+    async def get_next_obs_id(self, num_images):
+        self.requests.append(num_images)
+        await asyncio.sleep(self.delay)
+        if not self.available:
+            raise RuntimeError("Image name service unavailable")
+        numbers = list(
+            range(self.sequence_number + 1, self.sequence_number + num_images + 1)
+        )
+        self.sequence_number += num_images
+        return numbers, [f"EM1_O_20261016_{number:06d}" for number in numbers]
+
+
+class ObsIdPoolTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = LocalNameService()
+
+    async def test_prefetch(self):
+        pool = electrometer.ObsIdPool(self.service.get_next_obs_id, size=3)
+        pool.prefetch()
+        await asyncio.wait_for(pool.refill_task, timeout=STD_TIMEOUT)
+        self.assertEqual(len(pool), 3)
+        self.assertEqual(self.service.requests, [3])
+
+        for number in range(1, 5):
+            self.assertEqual(await pool.get(), f"EM1_O_20261016_{number:06d}")
+            await asyncio.wait_for(pool.refill_task, timeout=STD_TIMEOUT)
+        self.assertEqual(self.service.requests, [3, 1, 1, 1, 1])
+        self.assertEqual(len(pool), 3)
+        self.assertEqual(pool.hits, 4)
+        self.assertEqual(pool.misses, 0)
+        self.assertEqual(pool.hit_rate, 1)
+
+    async def test_wait_for_refill(self):
+        self.service.delay = 0.1
+        pool = electrometer.ObsIdPool(self.service.get_next_obs_id, size=2)
+        pool.prefetch()
+        self.assertEqual(await pool.get(), "EM1_O_20261016_000001")
+        # The refill under way was used instead of a separate request.
+        self.assertEqual(self.service.requests, [2])
+        self.assertEqual(pool.hits, 1)
+        pool.clear()
+
+    async def test_disabled(self):
+        pool = electrometer.ObsIdPool(self.service.get_next_obs_id, size=0)
+        pool.prefetch()
+        self.assertEqual(await pool.get(), "EM1_O_20261016_000001")
+        self.assertEqual(await pool.get(), "EM1_O_20261016_000002")
+        self.assertEqual(self.service.requests, [1, 1])
+        self.assertEqual(pool.misses, 2)
+        self.assertEqual(pool.hit_rate, 0)
+
+    async def test_unavailable(self):
+        pool = electrometer.ObsIdPool(self.service.get_next_obs_id, size=2)
+        self.service.available = False
+        pool.prefetch()
+        await asyncio.wait_for(pool.refill_task, timeout=STD_TIMEOUT)
+        self.assertEqual(len(pool), 0)
+        self.assertEqual(pool.failed_refills, 1)
+        with self.assertRaises(RuntimeError):
+            await pool.get()
+
+        # Once the service is back, the obs ID is requested directly.
+        self.service.available = True
+        self.assertEqual(await pool.get(), "EM1_O_20261016_000001")
+        self.assertEqual(pool.misses, 2)
+        await asyncio.wait_for(pool.refill_task, timeout=STD_TIMEOUT)
+        self.assertEqual(len(pool), 2)
+
+    async def test_expired(self):
+        pool = electrometer.ObsIdPool(self.service.get_next_obs_id, size=2)
+        pool.prefetch()
+        await asyncio.wait_for(pool.refill_task, timeout=STD_TIMEOUT)
+        with unittest.mock.patch.object(electrometer.obs_id_pool, "MAX_AGE", -1):
+            self.assertEqual(await pool.get(), "EM1_O_20261016_000003")
+        self.assertEqual(pool.misses, 1)
+        pool.clear()
+        self.assertEqual(len(pool), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
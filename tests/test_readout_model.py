@@ -0,0 +1,101 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import pathlib
+import tempfile
+import unittest
+import unittest.mock
+
+from lsst.ts import electrometer
+from lsst.ts.electrometer import ReadoutModel
+from lsst.ts.electrometer.readout_model import (
+    DEFAULT_SECONDS_PER_READING,
+    MIN_TIMEOUT,
+    SAFETY_FACTOR,
+)
+
+KEY = "Keithley 6517B stream"
+
+
+class ReadoutModelTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.directory.name) / "readout_model.yaml"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_default(self):
+        model = ReadoutModel(path=self.path)
+        self.assertEqual(
+            model.get_seconds_per_reading(KEY), DEFAULT_SECONDS_PER_READING
+        )
+        self.assertEqual(model.get_timeout(KEY, num_readings=0), MIN_TIMEOUT)
+        self.assertFalse(self.path.exists())
+
+    def test_update(self):
+        model = ReadoutModel(path=self.path)
+        model.update(KEY, num_readings=10000, duration=5)
+        self.assertAlmostEqual(model.get_seconds_per_reading(KEY), 5e-4)
+        self.assertAlmostEqual(
+            model.get_timeout(KEY, num_readings=100000, latency=2),
+            2 + SAFETY_FACTOR * 50,
+        )
+        model.update(KEY, num_readings=10000, duration=15)
+        self.assertGreater(model.get_seconds_per_reading(KEY), 5e-4)
+        self.assertLess(model.get_seconds_per_reading(KEY), 15e-4)
+        self.assertEqual(model.num_measurements[KEY], 2)
+
+        # Too few readings to measure the readout time.
+        model.update("other", num_readings=10, duration=5)
+        self.assertNotIn("other", model.seconds_per_reading)
+
+    def test_persistence(self):
+        model = ReadoutModel(path=self.path)
+        model.update(KEY, num_readings=10000, duration=5)
+        loaded = ReadoutModel(path=self.path)
+        self.assertEqual(loaded.seconds_per_reading, model.seconds_per_reading)
+        self.assertEqual(loaded.num_measurements, model.num_measurements)
+
+    def test_save_interval(self):
+        model = ReadoutModel(path=self.path)
+        model.update(KEY, num_readings=10000, duration=5)
+        self.assertFalse(model.unsaved)
+        # Saved only once in SAVE_INTERVAL.
+        model.update(KEY, num_readings=10000, duration=15)
+        self.assertTrue(model.unsaved)
+        self.assertEqual(ReadoutModel(path=self.path).num_measurements[KEY], 1)
+        model.save()
+        self.assertFalse(model.unsaved)
+        self.assertEqual(ReadoutModel(path=self.path).num_measurements[KEY], 2)
+        with unittest.mock.patch.object(electrometer.readout_model, "SAVE_INTERVAL", 0):
+            model.update(KEY, num_readings=10000, duration=5)
+        self.assertFalse(model.unsaved)
+        self.assertEqual(ReadoutModel(path=self.path).num_measurements[KEY], 3)
+
+    def test_bad_file(self):
+        self.path.write_text("not: [a, model")
+        model = ReadoutModel(path=self.path)
+        self.assertEqual(model.seconds_per_reading, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+import unittest
+
+from lsst.ts.electrometer import TickScheduler
+
+PERIOD = 0.05
+
+
+class TickSchedulerTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_ticks(self):
+        scheduler = TickScheduler(period=PERIOD, duration=5.5 * PERIOD)
+        ticks = 0
+        while await scheduler.wait_next():
+            ticks += 1
+        self.assertEqual(ticks, 5)
+        self.assertGreaterEqual(time.monotonic(), scheduler.end)
+        stats = scheduler.get_stats()
+        self.assertEqual(stats.count, 5)
+        self.assertEqual(stats.skipped, 0)
+        self.assertAlmostEqual(stats.mean_period, PERIOD, delta=PERIOD / 2)
+
+    async def test_skip_late_ticks(self):
+        scheduler = TickScheduler(period=PERIOD, duration=10.5 * PERIOD)
+        await asyncio.sleep(3.5 * PERIOD)
+        self.assertTrue(await scheduler.wait_next())
+        self.assertEqual(scheduler.tick, 4)
+        self.assertEqual(scheduler.skipped, 3)
+
+    async def test_no_ticks(self):
+        scheduler = TickScheduler(period=PERIOD, duration=0)
+        self.assertFalse(await scheduler.wait_next())
+        stats = scheduler.get_stats()
+        self.assertEqual(stats.count, 0)
+        self.assertIsNone(stats.mean_period)
+
+    def test_bad_period(self):
+        with self.assertRaises(ValueError):
+            TickScheduler(period=0, duration=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+# This file is part of ts_electrometer.
+#
+# Developed for the Vera C. Rubin Observatory Telescope and Site System.
+# This product includes software developed by the LSST Project
+# (https://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import asyncio
+import os
+import pathlib
+import tempfile
+import unittest
+import unittest.mock
+
+from lsst.ts import electrometer, salobj
+
+STD_TIMEOUT = 10
+
+
+class UploadSpoolTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        os.environ["LSST_SITE"] = "test"
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = pathlib.Path(self.directory.name) / "upload_spool"
+        self.bucket = salobj.AsyncS3Bucket(
+            salobj.AsyncS3Bucket.make_bucket_name(s3instance="test"),
+            create=True,
+            domock=True,
+        )
+        self.num_failures = 0
+        self.uploaded = []
+
+    def tearDown(self):
+        self.bucket.stop_mock()
+        self.directory.cleanup()
+
+    async def upload(self, path, metadata):
+        if self.num_failures > 0:
+            self.num_failures -= 1
+            raise RuntimeError("Upload failed")
+        file = await asyncio.to_thread(open, path, "rb")
+        with file:
+            await self.bucket.upload(fileobj=file, key=metadata["key"])
+        self.uploaded.append(metadata["key"])
+
+    async def check_uploaded(self, spool, name, data):
+        async with asyncio.timeout(STD_TIMEOUT):
+            await spool.join()
+        self.assertEqual((await self.bucket.download(name)).getvalue(), data)
+        self.assertEqual(list(self.path.iterdir()), [])
+
+    async def test_upload(self):
+        spool = electrometer.UploadSpool(self.path, upload=self.upload)
+        await spool.start()
+        try:
+            spool.write("scan.fits", b"data", dict(key="scan.fits"))
+            spool.add("scan.fits")
+            await self.check_uploaded(spool, "scan.fits", b"data")
+        finally:
+            await spool.stop()
+        self.assertEqual(spool.uploaded, 1)
+
+    async def test_retry(self):
+        self.num_failures = 2
+        spool = electrometer.UploadSpool(self.path, upload=self.upload)
+        await spool.start()
+        try:
+            with unittest.mock.patch.object(
+                electrometer.upload_spool, "MIN_RETRY_DELAY", 0.01
+            ):
+                spool.write("scan.fits", b"data", dict(key="scan.fits"))
+                spool.add("scan.fits")
+                await self.check_uploaded(spool, "scan.fits", b"data")
+        finally:
+            await spool.stop()
+        self.assertEqual(spool.failed_attempts, 2)
+
+    async def test_leftovers(self):
+        spool = electrometer.UploadSpool(self.path, upload=self.upload)
+        spool.write("first.fits", b"first", dict(key="first.fits"))
+        spool.write("second.fits", b"second", dict(key="second.fits"))
+        # Files without metadata, or metadata without its file, were not
+        # written or removed completely.
+        (self.path / "partial.fits").write_bytes(b"partial")
+        (self.path / "partial.fits.yaml.tmp").write_text("key: partial.fits")
+        (self.path / "removed.fits.yaml").write_text("key: removed.fits")
+
+        restarted = electrometer.UploadSpool(self.path, upload=self.upload)
+        await restarted.start()
+        try:
+            async with asyncio.timeout(STD_TIMEOUT):
+                await restarted.join()
+        finally:
+            await restarted.stop()
+        self.assertEqual(self.uploaded, ["first.fits", "second.fits"])
+        self.assertEqual(list(self.path.iterdir()), [])
+
+    async def test_restart(self):
+        self.num_failures = 1
+        spool = electrometer.UploadSpool(self.path, upload=self.upload)
+        await spool.start()
+        with unittest.mock.patch.object(
+            electrometer.upload_spool, "MIN_RETRY_DELAY", STD_TIMEOUT
+        ):
+            spool.write("scan.fits", b"data", dict(key="scan.fits"))
+            spool.add("scan.fits")
+            await asyncio.sleep(0.1)
+            # The retry is waiting; starting again stops it first.
+            task = spool.task
+            await spool.start()
+        self.assertTrue(task.done())
+        try:
+            await self.check_uploaded(spool, "scan.fits", b"data")
+        finally:
+            await spool.stop()
+        self.assertEqual(self.uploaded, ["scan.fits"])
+
+
+if __name__ == "__main__":
+    unittest.main()